@@ -1,75 +1,175 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from bs4 import BeautifulSoup
-import pandas as pd
+# Selenium, boto3, BeautifulSoup, pandas and the pyarrow writers are imported where
+# they are used, so a Lambda cold start that only needs HTTP fetching does not pay for them
 import re
-from concurrent.futures import ThreadPoolExecutor
 import logging
-from typing import List, Dict, Tuple
-import time
-from io import StringIO
+from typing import List, Optional, Tuple, TYPE_CHECKING
+import os
 from datetime import datetime
-import boto3
-from tempfile import mkdtemp
+from category_scraper import PagedCategoryScraper
+from fetchers import HttpFetcher, SeleniumFetcher, FallbackFetcher
+from driver_pool import DriverPool, lambda_chrome, with_profile_dirs
+from pagination import COVERAGE
+from rate_limit import FETCH_STATS, RATE_LIMITER, HostRateLimiter, RetryPolicy
+from parsers import PARSER_VERSION, default_backend, get_extractor
+from checkpoints import open_checkpoint_store
+from response_cache import ReplayFetcher
+from telemetry import TELEMETRY, profiled
+from lean_browsing import lean_options, prepare_driver
+from readiness import TimeToContent, tiles_ready, wait_for_absent, wait_for_selector
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+    from selenium import webdriver
+
+# The pager reads "of <pages>"; matched on the raw HTML so discovery does not need BeautifulSoup
+PAGER_PATTERN = re.compile(r'<span[^>]*\bclass="d-flex-inline pt-2"[^>]*>(.*?)</span>', re.S)
+
+# Kept at module level so warm Lambda invocations reuse the client, the
+# scraper and its Chrome drivers instead of building them again
+_S3_CLIENT = None
+_SCRAPER = None
+
+
+def get_s3_client():
+    """boto3 S3 client, created on first use."""
+    global _S3_CLIENT
+    if _S3_CLIENT is None:
+        import boto3
+        _S3_CLIENT = boto3.client('s3')
+    return _S3_CLIENT
+
+
+class AldiScraper(PagedCategoryScraper):
+    retailer = 'aldi'
+    base_url = "https://groceries.aldi.co.uk/en-GB"
+    tile_selector = "a.p.text-default-font"
+    # The pager or product total, present once the listing has rendered, even with no tiles
+    rendered_selector = "span.d-flex-inline.pt-2, div.result-count"
+    # parse_page returns names, prices, weights and urls
+    row_fields = ('product_name', 'price', 'weight', 'category', 'product_url')
+    category_workers = 2
+
+    def __init__(self, fetch_backend: str = 'auto', page_workers: int = 4, per_host_limit: int = 4,
+                 driver_pool: DriverPool = None, parser: str = None, checkpoint_store=None,
+                 resume: bool = False, product_index=None, response_cache=None,
+                 rate_limiter: HostRateLimiter = None, retry: RetryPolicy = None, lean: bool = True,
+                 pagination: str = 'auto'):
+        # 'http' uses a pooled requests.Session, 'selenium' uses Chrome,
+        # 'auto' tries HTTP first and only falls back to Chrome when needed
+        # and 'replay' serves a previous run from response_cache offline
+        self.fetch_backend = fetch_backend
+        # Pages of a category are fetched concurrently by this many fetchers
+        self.page_workers = page_workers
+        self.per_host_limit = per_host_limit
+        self.page_window = page_workers * 4
+        # How the page count is found when the pager is missing: 'auto', 'next' or 'probe' (see pagination)
+        self.pagination = pagination
+        # 'selectolax' or 'lxml' use precompiled selectors, 'bs4' is the reference path
+        self.parser = parser or default_backend()
+        # Completed pages are recorded per run date; with resume=True they are not fetched again
+        self.checkpoint_store = checkpoint_store
+        self.resume = resume
+        # Each row gets a stable product_id from its product URL (or name) when an index is given
+        self.product_index = product_index
+        # Pages are revalidated against (and parsed rows reused from) this ResponseCache when given
+        self.response_cache = response_cache
+        # Requests are paced per host by the process-wide limiter; failed pages are retried with backoff
+        if fetch_backend == 'replay':
+            # Nothing goes over the network, so neither pacing nor retries apply
+            rate_limiter, retry = rate_limiter or HostRateLimiter(rate=None), retry or RetryPolicy(max_attempts=1)
+        self.rate_limiter = rate_limiter or RATE_LIMITER
+        self.retry = retry or RetryPolicy()
+        self.run_date = datetime.now().strftime('%Y%m%d')
+        # Chrome options and service are built by the first make_driver call;
+        # HTTP-only runs never import selenium
+        self.chrome_options = None
+        self.service = None
+        # Chrome skips images, fonts, media and third-party trackers (see lean_browsing)
+        self.lean = lean
 
-class AldiScraper:
-    def __init__(self):
-        self.chrome_options = Options()
-        
-        # Configure Chrome for Lambda layer
-        # self.chrome_options.binary_location = '/opt/python/headless-chromium/headless-chromium'
-        self.chrome_options = Options()
-        self.chrome_options.add_argument('--start-maximized')  # Ensures the window is maximized
-        self.chrome_options.add_argument('--enable-javascript')  # Explicitly enable JavaScript
-        self.chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])  # Disable automation flag
-        self.chrome_options.add_experimental_option('useAutomationExtension', False)
-        self.chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        self.chrome_options.add_argument('--headless')
-        self.chrome_options.add_argument("--no-sandbox")
-        self.chrome_options.add_argument("--disable-dev-shm-usage")
-        self.chrome_options.add_argument("--disable-gpu")
-        self.chrome_options.add_argument("--disable-dev-tools")
-        self.chrome_options.add_argument("--no-zygote")
-        self.chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36...")
-        self.chrome_options.add_argument(f"--user-data-dir={mkdtemp()}")
-        self.chrome_options.add_argument(f"--data-path={mkdtemp()}")
-        self.chrome_options.add_argument(f"--disk-cache-dir={mkdtemp()}")
-        self.chrome_options.add_argument("--remote-debugging-pipe")
-        self.chrome_options.add_argument("--verbose")
-        self.chrome_options.add_argument("--log-path=/tmp")
-        self.chrome_options.binary_location = "/opt/chrome/chrome-linux64/chrome"
-
-        self.service = Service(
-        executable_path="/opt/chrome-driver/chromedriver-linux64/chromedriver",
-        service_log_path="/tmp/chromedriver.log")
-        
         self.logger = logging.getLogger()
         self.logger.setLevel(logging.INFO)
 
+        # Seconds from navigation to rendered product tiles, per page
+        self.time_to_content = TimeToContent()
+
+        # Chrome drivers are shared across categories (and scrapers, if a pool is passed in)
+        self.driver_pool = driver_pool or DriverPool(self.make_driver, size=page_workers)
+
 # # If you want to keep the same format as your original setup
 # formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 # for handler in logger.handlers:
 #     handler.setFormatter(formatter)
 
-    def get_max_pages(self, driver: webdriver.Chrome, category: str) -> int:
-        """Fetch the maximum number of pages for a category."""
-        try:
-            url = f"https://groceries.aldi.co.uk/en-GB/{category}?&page=1"
-            driver.get(url)
-            time.sleep(4)
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            x = soup.find('span', class_='d-flex-inline pt-2')
-            return int(re.findall(r'\d+', x.text)[0]) if x else 1
-        except Exception as e:
-            self.logger.error(f"Error getting max pages for {category}: {e}")
-            return 1
+    def category_url(self, category: str, page: int) -> str:
+        return f"{self.base_url}/{category}?&page={page}"
 
-    def handle_cookies(self, driver: webdriver.Chrome):
+    def build_chrome_options(self) -> Tuple['Options', Optional['Service']]:
+        """Chrome options and driver service (the Lambda image's chromedriver, when there is one)."""
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        options.add_argument('--start-maximized')  # Ensures the window is maximized
+        options.add_argument('--enable-javascript')  # Explicitly enable JavaScript
+        options.add_experimental_option('excludeSwitches', ['enable-automation'])  # Disable automation flag
+        options.add_experimental_option('useAutomationExtension', False)
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_argument('--headless')
+        options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36...")
+        if self.lean:
+            lean_options(options)
+        return options, lambda_chrome(options)
+
+    def make_driver(self) -> 'webdriver.Chrome':
+        from selenium import webdriver
+        if self.chrome_options is None:
+            self.chrome_options, self.service = self.build_chrome_options()
+        options = with_profile_dirs(self.chrome_options)
+        return prepare_driver(webdriver.Chrome(options=options, service=self.service), lean=self.lean)
+
+    def start_driver(self, driver: 'webdriver.Chrome'):
+        """Accept cookies once so later page loads render the product grid."""
+        driver.get(self.base_url)
+        self.handle_cookies(driver)
+
+    def page_has_products(self, html: str) -> bool:
+        # The tile markup extract_page_data matches; a substring test, as process_page parses the page anyway
+        return 'class="p text-default-font"' in html
+
+    def reset_stats(self):
+        """Zero the per-run counters this scraper holds, e.g. when a warm Lambda reuses it."""
+        self.time_to_content.reset()
+        if self.response_cache:
+            self.response_cache.reset_stats()
+
+    def make_fetcher(self):
+        """Build the page fetcher for the configured backend."""
+        if self.fetch_backend == 'replay':
+            return ReplayFetcher(self.response_cache, label=self.retailer)
+        if self.fetch_backend == 'http':
+            return HttpFetcher(cache=self.response_cache, label=self.retailer)
+        selenium_fetcher = SeleniumFetcher(self.driver_pool, self.base_url, on_start=self.start_driver,
+                                           ready=tiles_ready(self.tile_selector, rendered_selector=self.rendered_selector),
+                                           time_to_content=self.time_to_content, label='aldi',
+                                           cache=self.response_cache)
+        if self.fetch_backend == 'selenium':
+            return selenium_fetcher
+        if self.fetch_backend == 'auto':
+            return FallbackFetcher(HttpFetcher(cache=self.response_cache, label=self.retailer), selenium_fetcher,
+                                   is_usable=self.page_has_products)
+        raise ValueError("Supported fetch backends are 'http', 'selenium', 'auto' and 'replay'")
+
+    def read_pager(self, html: str) -> Optional[int]:
+        """Page count from the listing's pager, or None when the pager is not there."""
+        pager = PAGER_PATTERN.search(html)
+        numbers = re.findall(r'\d+', re.sub(r'<[^>]+>', '', pager.group(1))) if pager else []
+        return int(numbers[0]) if numbers else None
+
+    def handle_cookies(self, driver: 'webdriver.Chrome'):
         """Handle cookie consent popup."""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
         try:
             # Wait longer for the cookie popup and add a small initial delay
             cookie_button = WebDriverWait(driver, 10).until(
@@ -78,43 +178,68 @@ class AldiScraper:
             # Add a small delay before clicking to ensure the element is truly interactive
             cookie_button.click()
             # Wait for the cookie banner to disappear
-            time.sleep(1)
+            wait_for_absent(driver, "#onetrust-banner-sdk")
         except Exception as e:
                 self.logger.warning(f"Cookie handling failed")
 
-    def extract_page_data(self, soup: BeautifulSoup) -> Tuple[List[str], List[str], List[str]]:
+    def extract_page_data(self, soup: 'BeautifulSoup') -> Tuple[List[str], List[str], List[str], List[str]]:
         """Extract product data from a page."""
         try:
-            names = [x['title'] for x in soup.find_all('a', class_="p text-default-font")]
+            links = soup.find_all('a', class_="p text-default-font")
+            names = [x['title'] for x in links]
+            urls = [x.get('href') for x in links]
             prices = [x.text for x in soup.find_all('span',class_='h4')]
             weights = [x.text for x in soup.find_all('div', class_='text-gray-small')]
             # print(names)
-            return names, prices, weights
+            return names, prices, weights, urls
         except Exception as e:
             self.logger.error(f"Error extracting page data: {e}")
-            return [], [], []
+            return [], [], [], []
+
+    def parse_page(self, html: str) -> Tuple[List[str], List[str], List[str], List[str]]:
+        """Extract product data from raw HTML with the configured parser backend.
+
+        With a response cache, HTML that was already parsed (e.g. an unchanged page) is not parsed again.
+        """
+        parser_key = f"{self.retailer}:{self.parser}:v{PARSER_VERSION}"
+        if self.response_cache:
+            cached = self.response_cache.load_parsed(html, parser_key, self.retailer)
+            if cached is not None:
+                return tuple(cached)
+        if self.parser == 'bs4':
+            from bs4 import BeautifulSoup
+            result = self.extract_page_data(BeautifulSoup(html, 'html.parser'))
+        else:
+            try:
+                result = get_extractor('aldi', self.parser)(html)
+            except Exception as e:
+                self.logger.error(f"Error extracting page data: {e}")
+                return [], [], [], []
+        if self.response_cache and result[0]:
+            self.response_cache.store_parsed(html, parser_key, result)
+        return result
 
     def get_brands_categories(self,categories: List[str]) -> Tuple[List[str], List[str]]:
-        driver = webdriver.Chrome(options=self.chrome_options, service = self.service)
-        self.handle_cookies(driver)
+        from bs4 import BeautifulSoup
         brands = []
         sub_categories = []
-        for category in categories:
-            url = f'https://groceries.aldi.co.uk/en-GB/{category}?&page=1'
-            driver.get(url)
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            try:
-                brands_checkpoint = soup.find('span', class_ ='align-left text-capitalize', string = ' Brand')
+        with self.driver_pool.driver(self.base_url, self.start_driver, pages=len(categories)) as driver:
+            for category in categories:
+                url = self.category_url(category, 1)
+                driver.get(url)
+                wait_for_selector(driver, "h6.facet-checkbox")
+                soup = BeautifulSoup(driver.page_source, 'html.parser')
+                try:
+                    brands_checkpoint = soup.find('span', class_ ='align-left text-capitalize', string = ' Brand')
             
-                for x in brands_checkpoint.find_all_next("h6", class_ = 'facet-checkbox'):
-                    cleaned = re.sub(r"\(\d+\)" , "", x.text).rstrip()
-                    brands.append(cleaned)
-                for x in brands_checkpoint.find_all_previous("h6", class_ = 'facet-checkbox'):
-                    cleaned = re.sub(r"\(\d+\)" , "", x.text).rstrip().lstrip()
-                    sub_categories.append(cleaned)
-            except AttributeError as e:
-                self.logger.error(f"Brand extraction failed on {url}")
-                print(epy)
+                    for x in brands_checkpoint.find_all_next("h6", class_ = 'facet-checkbox'):
+                        cleaned = re.sub(r"\(\d+\)" , "", x.text).rstrip()
+                        brands.append(cleaned)
+                    for x in brands_checkpoint.find_all_previous("h6", class_ = 'facet-checkbox'):
+                        cleaned = re.sub(r"\(\d+\)" , "", x.text).rstrip().lstrip()
+                        sub_categories.append(cleaned)
+                except AttributeError as e:
+                    self.logger.error(f"Brand extraction failed on {url}: {e}")
 
         brands = list(set(brands))
         brands.remove('Vegan')
@@ -124,51 +249,6 @@ class AldiScraper:
         sub_categories = list(set(sub_categories))
         return brands,sub_categories
 
-    def scrape_category(self, category: str) -> pd.DataFrame:
-        """Scrape all products from a category."""
-        all_data = []
-        driver = webdriver.Chrome(options=self.chrome_options, service = self.service)
-        
-        try:
-            # Handle cookies once at the start
-            driver.get(f"https://groceries.aldi.co.uk/en-GB/{category}?&page=1")
-            self.handle_cookies(driver)
-            
-            max_pages = self.get_max_pages(driver, category)
-            self.logger.info(f"Category {category}: {max_pages} pages found")
-
-            for page in range(1, 1+max_pages):
-                try:
-                    url = f"https://groceries.aldi.co.uk/en-GB/{category}?&page={page}"
-                    driver.get(url)
-                    time.sleep(4)
-                    soup = BeautifulSoup(driver.page_source, 'html.parser')
-                    names, prices, weights = self.extract_page_data(soup)
-                    
-                    for name, price, weight in zip(names, prices, weights):
-                        all_data.append({
-                            'product_name': name,
-                            'price': price,
-                            'weight': weight,
-                            'category': category
-                        })
-                    
-                    self.logger.info(f"Scraped page {page}/{max_pages} of {category}")
-                    
-                except Exception as e:
-                    self.logger.error(f"Error on page {page} of {category}: {e}")
-                    continue
-                    
-        finally:
-            driver.quit()   
-        return pd.DataFrame(all_data)
-
-    def scrape_all_categories(self, categories: List[str], max_workers: int = 2) -> pd.DataFrame:
-        """Scrape all categories using ThreadPoolExecutor."""
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            results = list(executor.map(self.scrape_category, categories))
-        return pd.concat(results, ignore_index=True)
-
     def save_df_to_s3(self,df, bucket_name, file_prefix, folder=None, file_format='csv'):
         """
         Save a pandas DataFrame to an S3 bucket with today's date in the filename.
@@ -184,31 +264,42 @@ class AldiScraper:
         folder : str, optional
             Folder path within the bucket (e.g., 'aldi', 'aldi/raw_data')
         file_format : str, optional
-            Format to save the file in ('csv' or 'parquet'), defaults to 'csv'
+            Format to save the file in ('csv', 'parquet' or 'lake'), defaults to 'csv'.
+            'lake' writes Hive-partitioned Parquet (retailer/date/category) under
+            the folder instead of a single dated file.
         
         Returns:
         --------
         str
             The S3 path where the file was saved
         """
-        # Create S3 client
-        s3_client = boto3.client('s3')
+        if file_format.lower() == 'lake':
+            from lake_writer import write_lake
+            target = f"s3://{bucket_name}/{folder.strip('/')}" if folder else f"s3://{bucket_name}"
+            write_lake(df, target, retailer=self.retailer)
+            self.logger.info(f"Aldi data written to lake at {target}")
+            return target
+
+        # Reuse the process-wide S3 client
+        s3_client = get_s3_client()
         
         # Generate filename with today's date
         today_str = datetime.now().strftime('%Y%m%d')
         filename = f"{file_prefix}_{today_str}"
         
         # Create a buffer to store the file
-        if file_format.lower() == 'csv':
-            buffer = df.to_csv(index=False)
-            filename += '.csv'
-            content_type = 'text/csv'
-        elif file_format.lower() == 'parquet':
-            buffer = df.to_parquet()
-            filename += '.parquet'
-            content_type = 'application/octet-stream'
-        else:
-            raise ValueError("Supported formats are 'csv' and 'parquet'")
+        with TELEMETRY.stage('serialise') as measured:
+            if file_format.lower() == 'csv':
+                buffer = df.to_csv(index=False)
+                filename += '.csv'
+                content_type = 'text/csv'
+            elif file_format.lower() == 'parquet':
+                buffer = df.to_parquet()
+                filename += '.parquet'
+                content_type = 'application/octet-stream'
+            else:
+                raise ValueError("Supported formats are 'csv' and 'parquet'")
+            measured['bytes'], measured['rows'] = len(buffer), len(df)
         
         # Construct the full S3 key (path)
         if folder:
@@ -220,29 +311,103 @@ class AldiScraper:
         
         # Upload to S3
         try:
-            s3_client.put_object(
-                Bucket=bucket_name,
-                Key=s3_key,
-                Body=buffer,
-                ContentType=content_type
-            )
+            with TELEMETRY.stage('upload') as measured:
+                s3_client.put_object(
+                    Bucket=bucket_name,
+                    Key=s3_key,
+                    Body=buffer,
+                    ContentType=content_type
+                )
+                measured['bytes'] = len(buffer)
             s3_path = f"s3://{bucket_name}/{s3_key}"
             self.logger.info(f"Aldi data uploaded to {bucket_name}")
         except Exception as e:
             raise Exception(f"Error saving file to S3: {str(e)}")
 
 
+    def stream_to_s3(self, categories: List[str], bucket_name: str, file_prefix: str, folder: str = None,
+                     max_workers: int = 2) -> str:
+        """Scrape categories straight into a Parquet file in S3 via a multipart upload.
+
+        Rows are written as pages arrive, so memory stays flat however many
+        categories are scraped. Returns the S3 path of the file.
+        """
+        from row_pipeline import S3MultipartSink, stream_categories
+        filename = f"{file_prefix}_{datetime.now().strftime('%Y%m%d')}.parquet"
+        s3_key = f"{folder.strip('/')}/{filename}" if folder else filename
+        sink = S3MultipartSink(bucket_name, s3_key)
+        try:
+            rows = stream_categories(self, categories, sink, max_workers=max_workers)
+        except Exception:
+            sink.abort()
+            raise
+        sink.close()
+        self.logger.info(f"Aldi data streamed to {bucket_name} ({rows} rows)")
+        return f"s3://{bucket_name}/{s3_key}"
+
     #def save_to_s3_bucket 
 
+def get_scraper(checkpoint_uri: str) -> AldiScraper:
+    """The scraper for this container, built on the first (cold) invocation and reused while warm."""
+    global _SCRAPER
+    if _SCRAPER is None or _SCRAPER.checkpoint_uri != checkpoint_uri:
+        _SCRAPER = AldiScraper(checkpoint_store=open_checkpoint_store(checkpoint_uri))
+        _SCRAPER.checkpoint_uri = checkpoint_uri
+    return _SCRAPER
+
+
+def prewarm():
+    """Do the import work of a first invocation up front, during Lambda init.
+
+    Only modules are loaded: the S3 client and the scraper (whose checkpoint
+    store is picked by the event) are still built by the first invocation.
+    """
+    import pandas, bs4, requests, row_pipeline, lake_writer, price_diff  # noqa: F401
+    from selenium import webdriver  # noqa: F401
+
+
 def lambda_handler(event,context):
-    
+    """Scrape and save, then print the run's stage timings as CloudWatch EMF.
+
+    Optional event keys: 'report' (path for the full JSON run report) and
+    'profile' (cProfile .prof or pyinstrument .html path, e.g. under /tmp).
+    """
+    # Module-level counters survive in a warm container; each invocation reports only its own run
+    TELEMETRY.reset()
+    FETCH_STATS.reset()
+    COVERAGE.reset()
+    try:
+        with profiled(event.get('profile')):
+            handle(event)
+    finally:
+        TELEMETRY.emit('aldi', path=event.get('report'))
+
+
+def handle(event):
     categories = ['frozen','food-cupboard','fresh-food','bakery','chilled-food']   # Add your categories here
-    scraper = AldiScraper()
+    # Pages are checkpointed to S3 so a retried invocation with {"resume": true} skips finished pages
+    scraper = get_scraper(event.get('checkpoint_uri', 's3://uksupermarketdata/checkpoints'))
+    scraper.reset_stats()
+    scraper.resume = bool(event.get('resume', False))
+    # A warm container can outlive the day it was started on
+    scraper.run_date = datetime.now().strftime('%Y%m%d')
     
     # Run the scraper
+    if event.get('stream'):
+        # Write Parquet row groups to S3 as pages arrive instead of holding a DataFrame
+        scraper.stream_to_s3(event.get('categories', ['frozen']), bucket_name='uksupermarketdata',
+                             file_prefix='aldi', folder='aldi')
+        print('success')
+        return
     df = scraper.scrape_category('frozen')
     # df = scraper.scrape_category('frozen')
-    scraper.save_df_to_s3(df=df,bucket_name='uksupermarketdata',file_prefix='aldi',folder='aldi')
+    if event.get('cdc'):
+        from price_diff import ChangeCapture
+        # Store only inserts, deletes and price changes since the previous run
+        ChangeCapture(event.get('cdc_uri', 's3://uksupermarketdata/cdc'), 'aldi').capture(df)
+    else:
+        scraper.save_df_to_s3(df=df,bucket_name='uksupermarketdata',file_prefix='aldi',folder='aldi',
+                              file_format=event.get('file_format', 'csv'))
     # brands, sub_categories = scraper.get_brands_categories(categories)
     # Save results
     # print(brands)
@@ -253,4 +418,10 @@ def lambda_handler(event,context):
     
 
 # if __name__ == "__main__":
-#     main()
\ No newline at end of file
+#     main()
+
+
+# With ALDI_PREWARM set, the init phase (which Lambda runs once per container,
+# before the first invocation is billed) also imports pandas, Selenium and the writers
+if os.environ.get('ALDI_PREWARM'):
+    prewarm()
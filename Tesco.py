@@ -1,18 +1,62 @@
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
-import pandas as pd
-import re
-from concurrent.futures import ThreadPoolExecutor
 import logging
-from typing import List, Dict, Tuple
-import time
+from typing import List, Optional, Tuple
+import argparse
+from datetime import datetime
+from category_scraper import PagedCategoryScraper
+from fetchers import SeleniumFetcher
+from driver_pool import DriverPool, lambda_chrome, with_profile_dirs
+from parsers import PARSER_VERSION, default_backend, get_extractor
+from checkpoints import open_checkpoint_store
+from product_index import ProductIndex
+from response_cache import ReplayFetcher, ResponseCache
+from normaliser import normalise
+from row_pipeline import stream_categories
+from telemetry import TELEMETRY, profiled
+from lean_browsing import lean_options, prepare_driver
+from readiness import TimeToContent, tiles_ready
+from rate_limit import RATE_LIMITER, HostRateLimiter, RetryPolicy
 
-class TescoScraper:
-    def __init__(self):
+class TescoScraper(PagedCategoryScraper):
+    retailer = 'tesco'
+    base_url = "https://www.tesco.com/groceries/en-GB/shop"
+    tile_selector = "div[class*='StyledVerticalTile']"
+    # The pager, present once the listing has rendered, even with no tiles
+    rendered_selector = "nav span.ddsweb-link__text"
+    # parse_page returns names and prices
+    row_fields = ('product_name', 'price', 'category')
+
+    def __init__(self, page_workers: int = 3, per_host_limit: int = 3, driver_pool: DriverPool = None,
+                 parser: str = None, checkpoint_store=None, resume: bool = False, product_index=None,
+                 response_cache=None, replay: bool = False, rate_limiter: HostRateLimiter = None,
+                 retry: RetryPolicy = None, lean: bool = True,
+                 pagination: str = 'auto'):
+        # Pages of a category are fetched concurrently, one Chrome driver per worker
+        self.page_workers = page_workers
+        self.per_host_limit = per_host_limit
+        self.page_window = page_workers * 4
+        # How the page count is found when the pager is missing: 'auto', 'next' or 'probe' (see pagination)
+        self.pagination = pagination
+        # 'selectolax' or 'lxml' use precompiled selectors, 'bs4' is the reference path
+        self.parser = parser or default_backend()
+        # Completed pages are recorded per run date; with resume=True they are not fetched again
+        self.checkpoint_store = checkpoint_store
+        self.resume = resume
+        # Each row gets a stable product_id (from its normalised name) when an index is given
+        self.product_index = product_index
+        # Rendered pages go into this ResponseCache so unchanged ones skip parsing;
+        # replay=True serves a previous run from it without a browser
+        self.response_cache = response_cache
+        # Requests are paced per host by the process-wide limiter; failed pages are retried with backoff
+        if replay:
+            # Nothing goes over the network, so neither pacing nor retries apply
+            rate_limiter, retry = rate_limiter or HostRateLimiter(rate=None), retry or RetryPolicy(max_attempts=1)
+        self.rate_limiter = rate_limiter or RATE_LIMITER
+        self.retry = retry or RetryPolicy()
+        self.replay = replay
+        self.run_date = datetime.now().strftime('%Y%m%d')
         self.chrome_options = Options()
         self.chrome_options.add_argument('--start-maximized')  # Ensures the window is maximized
         self.chrome_options.add_argument('--enable-javascript')  # Explicitly enable JavaScript
@@ -21,6 +65,12 @@ class TescoScraper:
         self.chrome_options.add_argument('--disable-blink-features=AutomationControlled')
         self.chrome_options.add_argument('--headless')
         self.chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36...")
+        # Chrome skips images, fonts, media and third-party trackers (see lean_browsing)
+        self.lean = lean
+        if lean:
+            lean_options(self.chrome_options)
+        # In the Lambda image Chrome and chromedriver are not on the PATH
+        self.service = lambda_chrome(self.chrome_options)
     
         logging.basicConfig(
             level=logging.INFO,
@@ -28,17 +78,31 @@ class TescoScraper:
         )
         self.logger = logging.getLogger(__name__)
 
-    def get_max_pages(self, driver: webdriver.Chrome, category: str) -> int:
-        """Fetch the maximum number of pages for a category."""
-        try:
-            url = f"https://www.tesco.com/groceries/en-GB/shop/{category}/all?page=1"
-            driver.get(url)
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            max_pages = [x.text for x in soup.find_all('span',class_="styled__Text-sc-1i711qa-1 bsLJsh ddsweb-link__text")][-1]
-            return int(max_pages) if max_pages else 1
-        except Exception as e:
-            self.logger.error(f"Error getting max pages for {category}: {e}")
-            return 1
+        # Seconds from navigation to rendered product tiles, per page
+        self.time_to_content = TimeToContent()
+
+        # Chrome drivers are shared across categories (and scrapers, if a pool is passed in)
+        self.driver_pool = driver_pool or DriverPool(self.make_driver, size=page_workers)
+
+    def category_url(self, category: str, page: int) -> str:
+        return f"{self.base_url}/{category}/all?page={page}"
+
+    def make_driver(self) -> webdriver.Chrome:
+        options = with_profile_dirs(self.chrome_options)
+        return prepare_driver(webdriver.Chrome(options=options, service=self.service), lean=self.lean)
+
+    def make_fetcher(self):
+        if self.replay:
+            return ReplayFetcher(self.response_cache, label=self.retailer)
+        return SeleniumFetcher(self.driver_pool, self.base_url, ready=tiles_ready(self.tile_selector, rendered_selector=self.rendered_selector),
+                               time_to_content=self.time_to_content, label='tesco', cache=self.response_cache)
+
+    def read_pager(self, html: str) -> Optional[int]:
+        """Page count from the listing's pager, or None when the pager is not there."""
+        soup = BeautifulSoup(html, 'html.parser')
+        # Pager links share their class with product names, so the last one is the page count only if numeric
+        max_pages = [x.text for x in soup.find_all('span',class_="styled__Text-sc-1i711qa-1 bsLJsh ddsweb-link__text")]
+        return int(max_pages[-1]) if max_pages and max_pages[-1].strip().isdigit() else None
 
     def extract_page_data(self, soup: BeautifulSoup) -> Tuple[List[str], List[str]]:
         """Extract product data from a page."""
@@ -61,60 +125,79 @@ class TescoScraper:
             self.logger.error(f"Error extracting page data: {e}")
             return [], []
 
-    def scrape_category(self, category: str) -> pd.DataFrame:
-        """Scrape all products from a category."""
-        all_data = []
-        driver = webdriver.Chrome(options=self.chrome_options)
-        
-        try:
-            # Handle cookies once at the start
-            driver.get(f"https://www.tesco.com/groceries/en-GB/shop/{category}/all?page=1")
-            # self.handle_cookies(driver)
-            
-            max_pages = self.get_max_pages(driver, category)
-            self.logger.info(f"Category {category}: {max_pages} pages found")
-
-            for page in range(1, 1 + max_pages):
-                try:
-                    url = f"https://www.tesco.com/groceries/en-GB/shop/{category}/all?page={page}"
-                    driver.get(url)
-                    # driver.save_screenshot(f"debug{page}.png")
-                    time.sleep(2)
-                    soup = BeautifulSoup(driver.page_source, 'html.parser')
-                    names, prices = self.extract_page_data(soup)
-                    
-                    for name, price in zip(names, prices):
-                        all_data.append({
-                            'product_name': name,
-                            'price': price,
-                            #'weight': weight,
-                            'category': category
-                        })
-                    
-                    self.logger.info(f"Scraped page {page}/{max_pages} of {category}")
-                    
-                except Exception as e:
-                    self.logger.error(f"Error on page {page} of {category}: {e}")
-                    continue
-                    
-        finally:
-            driver.quit()   
-        return pd.DataFrame(all_data)
+    def parse_page(self, html: str) -> Tuple[List[str], List[str]]:
+        """Extract product data from raw HTML with the configured parser backend.
 
-    def scrape_all_categories(self, categories: List[str], max_workers: int = 5) -> pd.DataFrame:
-        """Scrape all categories using ThreadPoolExecutor."""
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            results = list(executor.map(self.scrape_category, categories))
-        return pd.concat(results, ignore_index=True)
+        With a response cache, HTML that was already parsed (e.g. an unchanged page) is not parsed again.
+        """
+        parser_key = f"{self.retailer}:{self.parser}:v{PARSER_VERSION}"
+        if self.response_cache:
+            cached = self.response_cache.load_parsed(html, parser_key, self.retailer)
+            if cached is not None:
+                return tuple(cached)
+        if self.parser == 'bs4':
+            result = self.extract_page_data(BeautifulSoup(html, 'html.parser'))
+        else:
+            try:
+                result = get_extractor('tesco', self.parser)(html)
+            except Exception as e:
+                self.logger.error(f"Error extracting page data: {e}")
+                return [], []
+        if self.response_cache and result[0]:
+            self.response_cache.store_parsed(html, parser_key, result)
+        return result
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape Tesco groceries")
+    parser.add_argument('--resume', action='store_true', help="skip pages already completed today")
+    parser.add_argument('--checkpoint', default='checkpoints.sqlite',
+                        help="SQLite path or s3://bucket/prefix for page checkpoints")
+    parser.add_argument('--stream', metavar='PATH',
+                        help="stream rows into this Parquet file as pages arrive instead of building a DataFrame")
+    parser.add_argument('--products', metavar='PATH',
+                        help="SQLite product index; adds a stable product_id to every row")
+    parser.add_argument('--report', metavar='PATH', help="write a JSON run report with per-stage timings")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="profile the run into a cProfile .prof file (or pyinstrument .html)")
+    parser.add_argument('--full-browser', action='store_true',
+                        help="load images, fonts, media and third-party scripts like a normal browser")
+    parser.add_argument('--cache', metavar='DIR',
+                        help="response cache directory; unchanged pages are not parsed again")
+    parser.add_argument('--replay', action='store_true', help="serve pages from --cache instead of the site")
+    args = parser.parse_args()
+    if args.replay and not args.cache:
+        parser.error("--replay needs --cache")
+
     categories = ['frozen-food',"food-cupboard","fresh-food","bakery" ]  # Add your categories here
-    scraper = TescoScraper()
+    product_index = ProductIndex(args.products) if args.products else None
+    response_cache = ResponseCache(args.cache) if args.cache else None
+    scraper = TescoScraper(checkpoint_store=open_checkpoint_store(args.checkpoint), resume=args.resume,
+                           product_index=product_index, response_cache=response_cache, replay=args.replay,
+                           lean=not args.full_browser)
     
     # Run the scraper
-    df = scraper.scrape_all_categories(categories)
+    if args.stream:
+        try:
+            with profiled(args.profile):
+                rows = stream_categories(scraper, categories, args.stream)
+        finally:
+            scraper.driver_pool.close()
+            if product_index:
+                product_index.close()
+        TELEMETRY.emit('tesco', path=args.report, emf=False)
+        print(f"Streamed {rows} products across {len(categories)} categories to {args.stream}")
+        return None
+    try:
+        with profiled(args.profile):
+            df = scraper.scrape_all_categories(categories)
+    finally:
+        scraper.driver_pool.close()
+        if product_index:
+            product_index.close()
     
+    TELEMETRY.emit('tesco', path=args.report, emf=False)
     # Save results
+    df = normalise(df, 'tesco')
     df.to_csv('tesco_test.csv', index=False)
     print(f"Scraped {len(df)} products across {len(categories)} categories")
     return df
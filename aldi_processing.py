@@ -1,20 +1,29 @@
-df['price'] = df['price'].str.replace(r'£', '', regex=True)  #make function later on??
-df['unit'] = df['weight'].str.extract(r'([a-zA-Z]+\b)')
-df['product_name'] = df['product_name'].str.extract('^(\D+)')
-df['weight'] = df['weight'].str.extract(r'(\d+)')
-df = df.astype({'price':'float', 'unit':'string','product_name':'string','weight':'float'})
-df['price_per_unit'] = df['price']/df['weight']
-#df['Weight'] = df['Weight'].str.split('(')[0]
-#get list of aldi brands to extract from prodcut name string 
-def remove_brands_regex(df, brands_list, column_name='product_name'):
-    # Escape special regex characters and join with '|'
-    pattern = '|'.join(map(re.escape, sorted(brands_list, key=len, reverse=True)))
-    # Compile pattern once for better performance
-    regex = re.compile(f'({pattern})')
-    # Use vectorized string operations
-    df[column_name] = (df[column_name]
-                            .str.replace(regex, '', regex=True)
-                            .str.strip()
-                            .str.replace(r'\s+', ' ', regex=True))
-    return df
-df_cleaned = remove_brands_regex(df, aldi_brands)
\ No newline at end of file
+"""Clean a scraped Aldi snapshot: numeric prices, quantities, price per unit and brand-free names.
+
+Usage: python aldi_processing.py aldi_products.csv aldi_brands.csv [aldi_cleaned.csv]
+
+The brands file is the output of AldiScraper.get_brands_categories (one brand per
+row, first column). The parsing itself lives in normaliser.py and is shared with
+the other retailers.
+"""
+import sys
+
+import pandas as pd
+
+from normaliser import normalise
+
+
+def clean_aldi(df: pd.DataFrame, aldi_brands) -> pd.DataFrame:
+    df = normalise(df, 'aldi', brands=aldi_brands)
+    df['product_name'] = df['clean_name']
+    return df.drop(columns=['clean_name'])
+
+
+if __name__ == '__main__':
+    products_path, brands_path = sys.argv[1], sys.argv[2]
+    output_path = sys.argv[3] if len(sys.argv) > 3 else 'aldi_cleaned.csv'
+    df = pd.read_csv(products_path)
+    aldi_brands = pd.read_csv(brands_path).iloc[:, 0].dropna().astype(str).tolist()
+    df_cleaned = clean_aldi(df, aldi_brands)
+    df_cleaned.to_csv(output_path, index=False)
+    print(f"Cleaned {len(df_cleaned)} products into {output_path}")
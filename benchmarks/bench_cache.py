@@ -0,0 +1,54 @@
+"""Repeat-run cost with the response cache: cold, revalidated (304), re-downloaded unchanged, and replayed.
+
+Usage: python -m benchmarks.bench_cache [--pages 40] [--latency 0.05] [--parser bs4]
+
+The stub server sends ETags for the 'revalidate' run and omits them for the
+'unchanged' run, where pages are downloaded again but matched by content hash.
+The 'replay' run serves everything from the cache with no server at all.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from Aldi import AldiScraper
+from benchmarks.fixtures import write_aldi_fixtures
+from benchmarks.stub_server import serve_fixtures
+from response_cache import ResponseCache
+from rate_limit import HostRateLimiter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--products', type=int, default=60, help='products per page')
+    parser.add_argument('--parser', default='bs4')
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp()
+    paths = write_aldi_fixtures(os.path.join(work, 'pages'), max_pages=args.pages, n_products=args.products)
+    cache_dir = os.path.join(work, 'cache')
+    server, _ = serve_fixtures(paths, latency=args.latency)
+
+    for run, etags, backend in (('cold', True, 'http'), ('revalidate', True, 'http'),
+                                ('unchanged', False, 'http'), ('replay', True, 'replay')):
+        server.etags = etags
+        cache = ResponseCache(cache_dir)
+        scraper = AldiScraper(fetch_backend=backend, parser=args.parser, response_cache=cache,
+                              rate_limiter=HostRateLimiter(rate=None))
+        scraper.base_url = f'http://127.0.0.1:{server.server_port}/en-GB'
+        start = time.perf_counter()
+        df = scraper.scrape_category('frozen')
+        elapsed = time.perf_counter() - start
+        stats = cache.summary().get('aldi', {})
+        print(f"{run:>10}: {elapsed:6.2f}s  {len(df)} rows  hit rate {stats.get('hit_rate', 0):.2f}  "
+              f"parse reused {stats.get('parse_reused', 0):3d}  replayed {stats.get('replayed', 0):3d}  "
+              f"bytes fetched {stats.get('bytes_fetched', 0) / 1e6:6.2f}MB  "
+              f"saved {stats.get('bytes_saved', 0) / 1e6:6.2f}MB")
+        cache.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
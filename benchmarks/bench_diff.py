@@ -0,0 +1,66 @@
+"""Diff time and peak memory: price_diff's hash index vs a pandas outer merge.
+
+Usage: python -m benchmarks.bench_diff [--rows 2000000] [--churn 0.05] [--method both]
+
+Builds two synthetic days where ``churn`` of the products changed price, a few
+were delisted and a few are new, then diffs them. Run each method on its own
+(--method index / --method merge) for a clean peak RSS figure.
+"""
+import argparse
+import resource
+import time
+
+import numpy as np
+import pandas as pd
+
+from price_diff import PriceIndex, diff
+
+
+def synthetic_days(rows: int, churn: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    pence = rng.integers(30, 999, rows)
+    day1 = pd.DataFrame({
+        'product_name': [f'product {i}' for i in range(rows)],
+        'price': [f'£{p / 100:.2f}' for p in pence],
+        'weight': '500g',
+        'category': 'frozen',
+    })
+    day2 = day1.iloc[rows // 1000:].copy()
+    changed = rng.choice(len(day2), int(len(day2) * churn), replace=False)
+    day2.iloc[changed, 1] = [f'£{p / 100:.2f}' for p in rng.integers(30, 999, len(changed))]
+    new = pd.DataFrame({'product_name': [f'new product {i}' for i in range(rows // 1000)],
+                        'price': '£1.00', 'weight': '1kg', 'category': 'frozen'})
+    return day1, pd.concat([day2, new], ignore_index=True)
+
+
+def merge_diff(day1: pd.DataFrame, day2: pd.DataFrame) -> pd.DataFrame:
+    """The straightforward approach: outer-merge both full snapshots on the product key."""
+    merged = day1.merge(day2, on=['product_name', 'weight'], how='outer', suffixes=('_old', ''), indicator=True)
+    return merged[(merged['_merge'] != 'both') | (merged['price_old'] != merged['price'])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--churn', type=float, default=0.05)
+    parser.add_argument('--method', choices=['index', 'merge', 'both'], default='both')
+    args = parser.parse_args()
+
+    day1, day2 = synthetic_days(args.rows, args.churn)
+    # The index is what a real run loads from storage; building it is a one-off per snapshot
+    previous, _ = PriceIndex.from_frame(day1)
+    baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    methods = {'index': lambda: diff(previous, day2)[0], 'merge': lambda: merge_diff(day1, day2)}
+    for label in (['index', 'merge'] if args.method == 'both' else [args.method]):
+        start = time.perf_counter()
+        delta = methods[label]()
+        elapsed = time.perf_counter() - start
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{label:>6}: {elapsed:6.2f}s  {len(delta):8d} changed rows  "
+              f"peak RSS +{peak_mb - baseline_mb:7.1f}MB")
+    print(f"index size {(previous.keys.nbytes + previous.prices.nbytes) / 1e6:.1f}MB for {len(previous)} products")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Compare AldiScraper fetch backends against saved listing pages.
+
+Usage: python -m benchmarks.bench_fetch [--fixtures DIR] [--backend http selenium]
+
+Pages are served from a local HTTP server so numbers are not affected by the
+live site. Without --fixtures a set of synthetic pages is generated.
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from Aldi import AldiScraper
+from benchmarks.fixtures import write_aldi_fixtures
+from benchmarks.stub_server import serve_fixtures
+from rate_limit import HostRateLimiter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fixtures', help='directory of saved Aldi listing pages (*.html)')
+    parser.add_argument('--backend', nargs='+', default=['http'], choices=['http', 'selenium', 'auto'])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        paths = sorted(glob.glob(os.path.join(args.fixtures, '*.html')))
+    else:
+        paths = write_aldi_fixtures(tempfile.mkdtemp(), max_pages=10)
+    server, hits = serve_fixtures(paths)
+    base_url = f'http://127.0.0.1:{server.server_port}/en-GB'
+
+    for backend in args.backend:
+        scraper = AldiScraper(fetch_backend=backend, rate_limiter=HostRateLimiter(rate=None))
+        scraper.base_url = base_url
+        hits['count'] = 0
+        rows = 0
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            rows += len(scraper.scrape_category('frozen'))
+        elapsed = time.perf_counter() - start
+        print(f"{backend:>9}: {hits['count'] / elapsed:8.1f} pages/s  {rows / elapsed:9.1f} rows/s  "
+              f"({hits['count']} pages in {elapsed:.2f}s)")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
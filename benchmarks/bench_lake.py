@@ -0,0 +1,79 @@
+"""Bytes written and scan time: flat CSV snapshot vs the partitioned Parquet lake.
+
+Usage: python -m benchmarks.bench_lake [--rows 500000] [--days 3]
+
+Writes the same synthetic snapshots both ways to a temp directory, then times a
+typical query (average price of one category on one day) against each.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+from benchmarks.fixtures import product_name, UNITS
+from lake_writer import read_lake, write_lake
+from normaliser import parse_price
+
+CATEGORIES = ['frozen', 'food-cupboard', 'fresh-food', 'bakery', 'chilled-food']
+
+
+def synthetic_snapshot(rows: int, seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    names = [product_name(rng) for _ in range(2000)]
+    return pd.DataFrame({
+        'product_name': [rng.choice(names) for _ in range(rows)],
+        'price': [f'£{rng.randint(30, 999) / 100:.2f}' for _ in range(rows)],
+        'weight': [f'{rng.choice([100, 250, 400, 500, 1000])}{rng.choice(UNITS)}' for _ in range(rows)],
+        'category': [rng.choice(CATEGORIES) for _ in range(rows)],
+    })
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=500_000, help='rows per daily snapshot')
+    parser.add_argument('--days', type=int, default=3)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp()
+    csv_dir, lake_dir = os.path.join(work, 'csv'), os.path.join(work, 'lake')
+    os.makedirs(csv_dir)
+    dates = [f'2024-01-{day + 1:02d}' for day in range(args.days)]
+    for day, snapshot_date in enumerate(dates):
+        df = synthetic_snapshot(args.rows, seed=day)
+        # Same serialisation save_df_to_s3 uses for its default csv output
+        with open(os.path.join(csv_dir, f"aldi_{snapshot_date.replace('-', '')}.csv"), 'w') as f:
+            f.write(df.to_csv(index=False))
+        write_lake(df, lake_dir, 'aldi', snapshot_date)
+
+    csv_bytes, lake_bytes = directory_size(csv_dir), directory_size(lake_dir)
+    print(f"bytes written  csv {csv_bytes / 1e6:8.1f}MB  lake {lake_bytes / 1e6:8.1f}MB  "
+          f"({csv_bytes / lake_bytes:.1f}x smaller)")
+
+    target_date, target_category = dates[-1], 'bakery'
+    start = time.perf_counter()
+    df = pd.read_csv(os.path.join(csv_dir, f"aldi_{target_date.replace('-', '')}.csv"))
+    csv_result = parse_price(df.loc[df['category'] == target_category, 'price']).mean()
+    csv_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    table = read_lake(lake_dir).to_table(
+        columns=['price_gbp'],
+        filter=(ds.field('date') == target_date) & (ds.field('category') == target_category),
+    )
+    lake_result = table.column('price_gbp').to_pandas().mean()
+    lake_seconds = time.perf_counter() - start
+
+    print(f"avg price query csv {csv_seconds * 1000:8.1f}ms  lake {lake_seconds * 1000:8.1f}ms  "
+          f"({csv_seconds / lake_seconds:.1f}x faster)  results {csv_result:.4f} / {lake_result:.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Bytes and render time per page with the lean browser profile on and off.
+
+Usage: python -m benchmarks.bench_lean [--categories 2] [--pages 5] [--asset-kb 40] [--latency 0.05]
+
+Tesco-style listing pages are served by the local stub server with an image
+per product tile, a web font and a video poster, each ``--asset-kb`` in size.
+The Tesco scraper then runs through Chrome once with ``lean=False`` and once
+with ``lean=True``; bytes transferred and DOMContentLoaded time come from the
+'render' telemetry stage, pages/s from the stub server's hit count. Needs
+Chrome and chromedriver.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fixtures import write_tesco_fixtures
+from benchmarks.stub_server import serve_fixtures
+from rate_limit import HostRateLimiter
+from telemetry import TELEMETRY
+from Tesco import TescoScraper
+
+TILE = '<div class="styled__StyledVerticalTile-sc-1r1v9f3-1 iAEUS">'
+HEAD = ('<head><style>@font-face { font-family: Shop; src: url(/fonts/shop.woff2) format("woff2"); }'
+        ' body { font-family: Shop, sans-serif; }</style></head>'
+        '<video poster="/media/banner.jpg" src="/media/banner.mp4" autoplay muted></video>')
+
+
+def add_assets(paths):
+    """Give every product tile an image and every page a web font and a video."""
+    for path in paths:
+        with open(path) as f:
+            html = f.read()
+        tiles = html.split(TILE)
+        html = tiles[0] + ''.join(f'{TILE}<img src="/images/{n}.jpg" width="200">{tile}'
+                                  for n, tile in enumerate(tiles[1:]))
+        with open(path, 'w') as f:
+            f.write(html.replace('<html>', '<html>' + HEAD, 1))
+    return paths
+
+
+def run(site, base_url, hits, lean: bool):
+    scraper = TescoScraper(lean=lean, rate_limiter=HostRateLimiter(rate=None))
+    scraper.base_url = base_url
+    TELEMETRY.reset()
+    hits['count'] = hits['assets'] = 0
+    start = time.perf_counter()
+    try:
+        df = scraper.scrape_all_categories(list(site))
+    finally:
+        scraper.driver_pool.close()
+    elapsed = time.perf_counter() - start
+    render = TELEMETRY.summary().get('render', {})
+    pages = render.get('count', 0) or 1
+    return {
+        'seconds': elapsed,
+        'pages_per_s': hits['count'] / elapsed,
+        'kb_per_page': render.get('bytes', 0) / pages / 1024,
+        'render_p50_ms': render.get('p50', 0) * 1000,
+        'asset_requests': hits['assets'],
+        'rows': len(df),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--categories', type=int, default=2)
+    parser.add_argument('--pages', type=int, default=5, help='pages per category')
+    parser.add_argument('--asset-kb', type=int, default=40, help='size of every image, font and video')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every page response')
+    args = parser.parse_args()
+
+    try:
+        TescoScraper().make_driver().quit()
+    except Exception as e:
+        print(f"Could not start Chrome ({e.__class__.__name__}); this benchmark needs Chrome and chromedriver.")
+        return
+
+    work = tempfile.mkdtemp()
+    site = {f'tesco-category-{n}': add_assets(write_tesco_fixtures(os.path.join(work, str(n)), max_pages=args.pages))
+            for n in range(args.categories)}
+    server, hits = serve_fixtures(next(iter(site.values())), latency=args.latency, categories=site,
+                                  asset_size=args.asset_kb * 1024)
+    base_url = f'http://127.0.0.1:{server.server_port}/groceries/en-GB/shop'
+    try:
+        for lean in (False, True):
+            result = run(site, base_url, hits, lean)
+            print(f"{'lean' if lean else 'full':>4}: {result['kb_per_page']:8.1f} KB/page  "
+                  f"render p50 {result['render_p50_ms']:6.1f}ms  {result['pages_per_s']:5.1f} pages/s  "
+                  f"{result['asset_requests']} asset requests  {result['rows']} rows")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Throughput of the normaliser against the old aldi_processing regex passes.
+
+Usage: python -m benchmarks.bench_normaliser [--rows 1000000] [--brands 2000]
+
+Also compares ``normaliser.extract`` (str.extract over the distinct values)
+with str.extract on every row, per column. Prices and weights repeat
+heavily; names are nearly all distinct, so they gain nothing from it.
+"""
+import argparse
+import random
+import re
+import time
+
+import pandas as pd
+
+from benchmarks.fixtures import WORDS, UNITS
+from normaliser import PRICE_PATTERN, QUANTITY_PATTERN, extract, normalise
+
+
+def legacy_normalise(df: pd.DataFrame, brands_list) -> pd.DataFrame:
+    """The regex passes aldi_processing.py used before normaliser.py existed."""
+    df = df.copy()
+    df['price'] = df['price'].str.replace(r'£', '', regex=True)
+    df['unit'] = df['weight'].str.extract(r'([a-zA-Z]+\b)')
+    df['product_name'] = df['product_name'].str.extract(r'^(\D+)')
+    df['weight'] = df['weight'].str.extract(r'(\d+)')
+    df['price'] = pd.to_numeric(df['price'], errors='coerce')
+    df['weight'] = pd.to_numeric(df['weight'], errors='coerce')
+    df['price_per_unit'] = df['price'] / df['weight']
+    pattern = '|'.join(map(re.escape, sorted(brands_list, key=len, reverse=True)))
+    regex = re.compile(f'({pattern})')
+    df['product_name'] = (df['product_name']
+                          .str.replace(regex, '', regex=True)
+                          .str.strip()
+                          .str.replace(r'\s+', ' ', regex=True))
+    return df
+
+
+def synthetic(rows: int, n_brands: int, seed: int = 0):
+    rng = random.Random(seed)
+    brands = sorted({' '.join(rng.choice(WORDS) + str(i) for _ in range(rng.randint(1, 2))) for i in range(n_brands)})
+    names, prices, weights = [], [], []
+    for _ in range(rows):
+        name = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 5)))
+        names.append(f'{rng.choice(brands)} {name}')
+        prices.append(rng.choice([f'£{rng.randint(30, 999) / 100:.2f}', f'{rng.randint(10, 99)}p', 'Out of Stock']))
+        weights.append(rng.choice([f'{rng.randint(1, 1000)}{rng.choice(UNITS)}',
+                                   f'{rng.randint(2, 12)} x {rng.randint(25, 500)}g']))
+    return pd.DataFrame({'product_name': names, 'price': prices, 'weight': weights, 'category': 'x'}), brands
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--brands', type=int, default=2000)
+    args = parser.parse_args()
+
+    df, brands = synthetic(args.rows, args.brands)
+    for label, func in (('legacy regex', legacy_normalise), ('normaliser', lambda d, b: normalise(d, 'aldi', b))):
+        start = time.perf_counter()
+        func(df, brands)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>12}: {elapsed:7.2f}s  {args.rows / elapsed:10.0f} rows/s")
+
+    for column, pattern in (('price', PRICE_PATTERN), ('weight', QUANTITY_PATTERN), ('product_name', QUANTITY_PATTERN)):
+        times = {}
+        for label, func in (('every row', lambda: df[column].str.extract(pattern)),
+                            ('distinct', lambda: extract(df[column], pattern))):
+            start = time.perf_counter()
+            func()
+            times[label] = time.perf_counter() - start
+        print(f"extract {column:<12} {df[column].nunique():>8} distinct: every row {times['every row']:6.2f}s  "
+              f"distinct only {times['distinct']:6.2f}s  (x{times['every row'] / times['distinct']:.1f})")
+
+
+if __name__ == '__main__':
+    main()
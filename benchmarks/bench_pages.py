@@ -0,0 +1,47 @@
+"""Measure the speedup of concurrent page fetching within one category.
+
+Usage: python -m benchmarks.bench_pages [--pages 40] [--latency 0.2] [--workers 1 4 8]
+
+A local stub server adds a fixed latency per page so the serial loop and the
+page scheduler can be compared without touching the live site.
+"""
+import argparse
+import tempfile
+import time
+
+from Aldi import AldiScraper
+from benchmarks.fixtures import write_aldi_fixtures
+from benchmarks.stub_server import serve_fixtures
+from rate_limit import HostRateLimiter
+
+# The stub server is local; pacing would only hide the effect being measured
+UNLIMITED = HostRateLimiter(rate=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds added to every response')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    paths = write_aldi_fixtures(tempfile.mkdtemp(), max_pages=args.pages)
+    server, hits = serve_fixtures(paths, latency=args.latency)
+    base_url = f'http://127.0.0.1:{server.server_port}/en-GB'
+
+    baseline = None
+    for workers in args.workers:
+        scraper = AldiScraper(fetch_backend='http', page_workers=workers, per_host_limit=workers,
+                              rate_limiter=UNLIMITED)
+        scraper.base_url = base_url
+        start = time.perf_counter()
+        df = scraper.scrape_category('frozen')
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3} {elapsed:6.2f}s  {args.pages / elapsed:7.1f} pages/s  "
+              f"{len(df)} rows  speedup x{baseline / elapsed:.1f}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
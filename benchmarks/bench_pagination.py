@@ -0,0 +1,52 @@
+"""Requests spent finding and scraping a category, by how its page count is shown.
+
+Usage: python -m benchmarks.bench_pagination [--pages 23] [--latency 0.05] [--strategy auto]
+
+Aldi categories are served by the local stub server with the page count shown
+as the pager, as a product total only, as rel=next links only, or not at all;
+pages past the last one come back empty. For each layout the scraper's
+requests are compared with the pages in the category (page 1 is fetched once,
+so they should match outside probing) and the rows collected with the rows
+the category holds.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from Aldi import AldiScraper
+from benchmarks.fixtures import write_aldi_fixtures
+from benchmarks.stub_server import serve_fixtures
+from pagination import COVERAGE
+from rate_limit import HostRateLimiter
+
+LAYOUTS = ('pager', 'total', 'next', 'none')
+PRODUCTS_PER_PAGE = 30
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=23)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--strategy', default='auto', choices=['auto', 'next', 'probe'])
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp()
+    for layout in LAYOUTS:
+        paths = write_aldi_fixtures(os.path.join(work, layout), max_pages=args.pages,
+                                    n_products=PRODUCTS_PER_PAGE, layout=layout)
+        server, hits = serve_fixtures(paths, latency=args.latency, cycle=False)
+        scraper = AldiScraper(fetch_backend='http', rate_limiter=HostRateLimiter(rate=None),
+                              pagination=args.strategy)
+        scraper.base_url = f'http://127.0.0.1:{server.server_port}/en-GB'
+        start = time.perf_counter()
+        rows = len(scraper.scrape_category(layout))
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+        coverage = COVERAGE.summary()[f'aldi/{layout}']
+        print(f"{layout:>5}: {coverage['source']:>5}  {coverage['pages']:3d}/{args.pages} pages  "
+              f"{hits['count']:3d} requests  {rows:5d}/{args.pages * PRODUCTS_PER_PAGE} rows  {elapsed:5.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Parse time and peak memory per parser backend, checked against the BeautifulSoup path.
+
+Usage: python -m benchmarks.bench_parsers [--fixtures DIR] [--cache DIR] [--repeat 20]
+
+--fixtures may hold saved pages named aldi*.html, tesco*.html and ocado*.html,
+and --cache replays every page a scraper stored in a ResponseCache directory;
+retailers without saved pages use synthetic ones. Each backend runs in its own
+process so peak RSS is not polluted by the other parsers.
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import statistics
+import time
+import tracemalloc
+
+from Aldi import AldiScraper
+from Tesco import TescoScraper
+from marks import OcadoScraper
+from parsers import available_backends
+from response_cache import ResponseCache
+from benchmarks.fixtures import aldi_listing_html, tesco_listing_html, ocado_listing_html
+
+SCRAPERS = {'aldi': AldiScraper, 'tesco': TescoScraper, 'ocado': OcadoScraper}
+
+
+def load_pages(fixtures, cache_dir=None):
+    pages = {}
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    for retailer in SCRAPERS:
+        paths = sorted(glob.glob(os.path.join(fixtures, f'{retailer}*.html'))) if fixtures else []
+        if paths:
+            pages[retailer] = [open(path, encoding='utf-8').read() for path in paths]
+        elif cache:
+            cached = [html for _, html in cache.bodies(retailer)]
+            if cached:
+                pages[retailer] = cached
+    pages.setdefault('aldi', [aldi_listing_html(page, 5) for page in range(1, 6)])
+    pages.setdefault('tesco', [tesco_listing_html(page, 5) for page in range(1, 6)])
+    pages.setdefault('ocado', [ocado_listing_html()])
+    return pages
+
+
+def rss_kb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1])
+    return 0
+
+
+def run_backend(retailer, backend, pages, repeat, queue):
+    scraper = SCRAPERS[retailer](parser=backend)
+    base_rss = rss_kb('VmRSS:')
+    tracemalloc.start()
+    timings = []
+    for _ in range(repeat):
+        for html in pages:
+            start = time.perf_counter()
+            scraper.parse_page(html)
+            timings.append(time.perf_counter() - start)
+    py_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    queue.put((statistics.median(timings) * 1000, py_peak / 1024 / 1024,
+               (rss_kb('VmHWM:') - base_rss) / 1024, [scraper.parse_page(html) for html in pages]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fixtures')
+    parser.add_argument('--cache', help='ResponseCache directory from an earlier run')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages(args.fixtures, args.cache)
+    ctx = multiprocessing.get_context('fork')
+    for retailer, html_pages in pages.items():
+        reference = None
+        for backend in ['bs4'] + [b for b in available_backends() if b != 'bs4']:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=run_backend, args=(retailer, backend, html_pages, args.repeat, queue))
+            proc.start()
+            ms, py_peak, rss_peak, output = queue.get()
+            proc.join()
+            reference = reference or output
+            status = 'same output' if output == reference else 'OUTPUT DIFFERS FROM bs4'
+            print(f"{retailer:>6} {backend:>10}: {ms:7.2f} ms/page  py peak {py_peak:6.1f}MB  "
+                  f"rss peak +{rss_peak:6.1f}MB  {status}")
+
+
+if __name__ == '__main__':
+    main()
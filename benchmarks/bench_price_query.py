@@ -0,0 +1,121 @@
+"""Refresh and query latency of price_query against scanning the lake for every question.
+
+Usage: python -m benchmarks.bench_price_query [--days 30] [--products 2000] [--queries 200]
+
+A synthetic lake is written with write_lake: three retailers selling
+overlapping products in four categories, with prices drifting day to day.
+Reported: the first full refresh, an incremental refresh after one more day
+is written (it should only read that day's three partitions), and the mean
+latency of cheapest-equivalent, price history and daily aggregate queries,
+next to answering the same cheapest-equivalent question by scanning the lake.
+"""
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import product_name
+from lake_writer import read_lake, write_lake
+from price_query import PriceQuery, name_tokens
+
+RETAILERS = ('aldi', 'tesco', 'ocado')
+CATEGORIES = ('frozen', 'fresh', 'bakery', 'drinks')
+SIZES = ('250g', '500g', '1kg', '2 x 400g', '330ml', '1l', '2l', '6 pack')
+
+
+def catalogue(products: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [(product_name(rng), rng.choice(SIZES), rng.choice(CATEGORIES), rng.uniform(0.4, 9.0))
+            for _ in range(products)]
+
+
+def snapshot(items, retailer: str, day: int) -> pd.DataFrame:
+    rng = random.Random(hash((retailer, day)))
+    rows = []
+    for n, (name, size, category, base) in enumerate(items):
+        if hash((retailer, n)) % 10 >= 7:
+            continue  # not every retailer sells every product
+        price = base * (1 + 0.1 * RETAILERS.index(retailer)) * (1 + 0.002 * day) * rng.uniform(0.95, 1.05)
+        row = {'product_name': f'{name} {size}' if retailer == 'tesco' else name,
+               'price': 'Out of Stock' if rng.random() < 0.03 else f'£{price:.2f}',
+               'category': category}
+        if retailer != 'tesco':
+            row['weight'] = size
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def timed(call, repeat: int = 1):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        times.append(time.perf_counter() - start)
+    return result, statistics.mean(times)
+
+
+def scan_cheapest(lake: str, name: str) -> pd.DataFrame:
+    """The same question answered by reading the lake: latest day per retailer, token match, sort."""
+    df = read_lake(lake).to_table(columns=['retailer', 'date', 'product_name', 'price_gbp',
+                                           'price_per_unit', 'unit_basis']).to_pandas()
+    df = df[df['date'] == df.groupby('retailer', observed=True)['date'].transform('max')]
+    tokens = set(name_tokens(name))
+    overlap = df['product_name'].map(lambda text: len(tokens & set(name_tokens(text))))
+    return df[overlap >= max(1, len(tokens) // 2)].sort_values('price_per_unit').head(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    lake = tempfile.mkdtemp()
+    items = catalogue(args.products)
+    first = date(2026, 1, 1)
+    start = time.perf_counter()
+    for day in range(args.days):
+        for retailer in RETAILERS:
+            write_lake(snapshot(items, retailer, day), lake, retailer, first + timedelta(days=day))
+    print(f"wrote {args.days} days x {len(RETAILERS)} retailers in {time.perf_counter() - start:.1f}s")
+
+    query = PriceQuery(lake)
+    refreshed, seconds = timed(query.refresh)
+    print(f"full refresh:        {seconds * 1000:8.1f} ms  {len(refreshed)} partitions")
+    for retailer in RETAILERS:
+        write_lake(snapshot(items, retailer, args.days), lake, retailer, first + timedelta(days=args.days))
+    refreshed, seconds = timed(query.refresh)
+    print(f"incremental refresh: {seconds * 1000:8.1f} ms  {len(refreshed)} partitions")
+    _, seconds = timed(query.refresh)
+    print(f"no-op refresh:       {seconds * 1000:8.1f} ms")
+
+    rng = np.random.default_rng(0)
+    names = [f'{items[i][0]} {items[i][1]}' for i in rng.integers(0, len(items), args.queries)]
+    _, seconds = timed(lambda: query.cheapest_equivalent(names[0]))
+    print(f"first query (loads the latest snapshot): {seconds * 1000:8.1f} ms")
+    latencies = [timed(lambda: query.cheapest_equivalent(name))[1] for name in names]
+    print(f"cheapest_equivalent: {statistics.mean(latencies) * 1000:8.2f} ms mean  "
+          f"{max(latencies) * 1000:8.2f} ms max  ({args.queries} queries)")
+    _, seconds = timed(query.history)
+    print(f"history load:        {seconds * 1000:8.1f} ms  ({len(query.history())} product-days)")
+    latencies = [timed(lambda: query.price_history(name))[1] for name in names[:50]]
+    example = query.price_history(names[0])
+    print(f"price_history:       {statistics.mean(latencies) * 1000:8.2f} ms mean  "
+          f"({len(example)} rows for '{names[0]}')")
+    _, seconds = timed(lambda: query.daily(retailer='tesco', category='fresh'), repeat=20)
+    print(f"daily:               {seconds * 1000:8.2f} ms mean")
+    _, seconds = timed(lambda: scan_cheapest(lake, names[0]))
+    print(f"scan the lake instead: {seconds * 1000:8.1f} ms for one cheapest-equivalent question")
+    print(query.cheapest_equivalent(names[0], limit=5).to_string(index=False))
+    shutil.rmtree(lake)
+
+
+if __name__ == '__main__':
+    main()
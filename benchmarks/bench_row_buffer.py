@@ -0,0 +1,110 @@
+"""Memory and time to collect scraped rows: row dicts and per-category DataFrames vs RowBuffer.
+
+Usage: python -m benchmarks.bench_row_buffer [--rows 300000] [--categories 6] [--page-size 30] [--repeat 3]
+
+Pages of Aldi-shaped rows (fresh strings per product, as the parsers make
+them) are collected the way ``scrape_all_categories`` used to (a list of
+dicts per category, a DataFrame each, then ``pd.concat``) and through
+``RowBuffer`` (columns per category, concatenated, one DataFrame or Arrow
+table at the end). Each path runs in its own process. Time is the best of
+``--repeat`` runs collecting pages made beforehand; peak Python memory is traced in a second run, with
+pages made as they are collected, as during a scrape.
+"""
+import argparse
+import multiprocessing
+import random
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.fixtures import UNITS, product_name
+from row_buffer import RowBuffer
+
+
+def pages(categories: int, rows: int, page_size: int):
+    """Yield (category, rows of one page) until ``rows`` rows have been made."""
+    rng = random.Random(0)
+    per_category = rows // categories
+    for n in range(categories):
+        category = f'category-{n}'
+        for start in range(0, per_category, page_size):
+            yield category, [{
+                'product_name': product_name(rng),
+                'price': f'£{rng.randint(30, 999) / 100:.2f}',
+                'weight': f'{rng.randint(1, 1000)}{rng.choice(UNITS)}',
+                'category': category,
+                'product_url': f'/product/{start + i:018d}',
+            } for i in range(min(page_size, per_category - start))]
+
+
+def with_dicts(page_source):
+    by_category = {}
+    for category, rows in page_source:
+        if category not in by_category:
+            by_category[category] = []
+        by_category[category].extend(rows)
+    return pd.concat([pd.DataFrame(rows) for rows in by_category.values()], ignore_index=True)
+
+
+def with_buffer(page_source):
+    by_category = {}
+    for category, rows in page_source:
+        if category not in by_category:
+            by_category[category] = RowBuffer()
+        by_category[category].extend(rows)
+    return RowBuffer.concat(by_category.values()).to_pandas()
+
+
+def with_buffer_arrow(page_source):
+    by_category = {}
+    for category, rows in page_source:
+        if category not in by_category:
+            by_category[category] = RowBuffer()
+        by_category[category].extend(rows)
+    return RowBuffer.concat(by_category.values()).to_arrow()
+
+
+PATHS = {'dicts + concat': with_dicts, 'RowBuffer -> pandas': with_buffer, 'RowBuffer -> arrow': with_buffer_arrow}
+
+
+def measure(name: str, args, queue):
+    build = PATHS[name]
+    made = list(pages(args.categories, args.rows, args.page_size))
+    elapsed = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        table = build(made)
+        elapsed = min(elapsed or float('inf'), time.perf_counter() - start)
+        del table
+    del made
+    tracemalloc.start()
+    table = build(pages(args.categories, args.rows, args.page_size))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put((elapsed, peak, len(table)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=300_000)
+    parser.add_argument('--categories', type=int, default=6)
+    parser.add_argument('--page-size', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('fork')
+    baseline = None
+    for name in PATHS:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=measure, args=(name, args, queue))
+        proc.start()
+        elapsed, peak, rows = queue.get()
+        proc.join()
+        baseline = baseline or (elapsed, peak)
+        print(f"{name:<20} {elapsed:6.2f}s  {rows / elapsed / 1000:7.1f}k rows/s  peak {peak / 2 ** 20:7.1f}MB  "
+              f"(x{baseline[0] / elapsed:.2f} time, x{baseline[1] / peak:.2f} memory)  {rows} rows")
+
+
+if __name__ == '__main__':
+    main()
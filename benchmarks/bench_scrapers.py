@@ -0,0 +1,125 @@
+"""End-to-end scraper benchmark against the local stub retail server.
+
+Usage: python -m benchmarks.bench_scrapers [--fixtures DIR] [--retailers aldi tesco ocado]
+           [--categories 4] [--pages 10] [--latency 0.05] [--jitter 0.05] [--fail-rate 0.02]
+           [--browser] [--json results.json]
+
+Each retailer runs the real scraper's ``scrape_all_categories`` in its own
+process (so peak RSS is its own) against a stub server that serves recorded
+pages (--fixtures, from benchmarks.record_fixtures) or synthetic ones, with
+the given latency, jitter and share of failed responses. Reported: pages/s,
+rows/s, p50/p99 page latency, peak RSS, retries and dropped pages.
+
+Without --browser pages are fetched over HTTP (Tesco's Chrome fetcher is
+swapped for an HttpFetcher) and Ocado, which scrapes from a live browser
+session, is skipped.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.fixtures import (load_recorded, write_aldi_fixtures, write_ocado_fixtures,
+                                 write_tesco_fixtures)
+from benchmarks.stub_server import serve_fixtures
+from fetchers import HttpFetcher
+from rate_limit import FETCH_STATS, HostRateLimiter, RetryPolicy
+from telemetry import TELEMETRY
+from work_queue import SCRAPERS
+
+# Path of each retailer's base_url, so category URLs look like the live site's
+BASE_PATHS = {'aldi': '/en-GB', 'tesco': '/groceries/en-GB/shop', 'ocado': '/browse/m-s-at-ocado-294578'}
+
+
+def synthetic_site(retailer: str, directory: str, categories: int, pages: int):
+    writers = {'aldi': lambda d: write_aldi_fixtures(d, max_pages=pages),
+               'tesco': lambda d: write_tesco_fixtures(d, max_pages=pages),
+               'ocado': lambda d: write_ocado_fixtures(d)}
+    return {f'{retailer}-category-{n}': writers[retailer](os.path.join(directory, retailer, str(n)))
+            for n in range(categories)}
+
+
+def build_scraper(retailer: str, base_url: str, browser: bool):
+    options = {'rate_limiter': HostRateLimiter(rate=None), 'retry': RetryPolicy(max_attempts=4, base_delay=0.05)}
+    if retailer == 'aldi':
+        options['fetch_backend'] = 'selenium' if browser else 'http'
+    scraper = SCRAPERS[retailer](**options)
+    scraper.base_url = base_url
+    if retailer == 'tesco' and not browser:
+        scraper.make_fetcher = lambda: HttpFetcher(label='tesco')
+    return scraper
+
+
+def run_retailer(retailer: str, site: dict, args, queue):
+    server, hits = serve_fixtures(next(iter(site.values())), latency=args.latency, jitter=args.jitter,
+                                  fail_rate=args.fail_rate, categories=site)
+    scraper = build_scraper(retailer, f'http://127.0.0.1:{server.server_port}{BASE_PATHS[retailer]}', args.browser)
+    TELEMETRY.reset()
+    start = time.perf_counter()
+    try:
+        df = scraper.scrape_all_categories(list(site))
+    finally:
+        scraper.driver_pool.close()
+        server.shutdown()
+    elapsed = time.perf_counter() - start
+    stages = TELEMETRY.summary()
+    latency = stages.get('fetch') or stages.get('navigate') or {}
+    counts = next(iter(FETCH_STATS.summary().values()), {})
+    queue.put({
+        'retailer': retailer,
+        'seconds': round(elapsed, 3),
+        'requests': hits['count'],
+        'pages_per_s': round(hits['count'] / elapsed, 1),
+        'rows': len(df),
+        'rows_per_s': round(len(df) / elapsed, 1),
+        'p50_ms': round(latency.get('p50', 0) * 1000, 1),
+        'p99_ms': round(latency.get('p99', 0) * 1000, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'injected_failures': hits['failed'],
+        'retries': counts.get('retries', 0),
+        'drops': counts.get('drops', 0),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', help='directory written by benchmarks.record_fixtures')
+    parser.add_argument('--retailers', nargs='+', default=list(SCRAPERS), choices=list(SCRAPERS))
+    parser.add_argument('--categories', type=int, default=4, help='synthetic categories per retailer')
+    parser.add_argument('--pages', type=int, default=10, help='synthetic pages per category')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.05, help='up to this many extra seconds, uniformly')
+    parser.add_argument('--fail-rate', type=float, default=0.02, help='share of responses that are HTTP 500s')
+    parser.add_argument('--browser', action='store_true', help='fetch through Chrome as in production')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    recorded = load_recorded(args.fixtures) if args.fixtures else {}
+    work = tempfile.mkdtemp()
+    ctx = multiprocessing.get_context('fork')
+    results = []
+    for retailer in args.retailers:
+        if retailer == 'ocado' and not args.browser:
+            print(f"{retailer:>6}: skipped, Ocado is scraped from a live browser session (use --browser)")
+            continue
+        site = recorded.get(retailer) or synthetic_site(retailer, work, args.categories, args.pages)
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run_retailer, args=(retailer, site, args, queue))
+        proc.start()
+        result = queue.get()
+        proc.join()
+        results.append(result)
+        print(f"{retailer:>6}: {result['pages_per_s']:7.1f} pages/s  {result['rows_per_s']:8.1f} rows/s  "
+              f"p50 {result['p50_ms']:6.1f}ms  p99 {result['p99_ms']:6.1f}ms  "
+              f"peak RSS {result['peak_rss_mb']:6.1f}MB  {result['rows']} rows  "
+              f"retries {result['retries']}  drops {result['drops']}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
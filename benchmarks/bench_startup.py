@@ -0,0 +1,106 @@
+"""Cold-start and warm-invoke latency of the Aldi Lambda entry path.
+
+Usage: python -m benchmarks.bench_startup [--repeat 5] [--pages 3] [--history startup.jsonl]
+
+'import' is ``python -X importtime -c "import Aldi"`` (the slowest direct
+imports are listed too). 'cold' is a fresh interpreter importing Aldi,
+building the scraper through ``get_scraper`` and scraping a category from the
+local stub server; 'warm' is the next scrape in the same process, which reuses
+the scraper. --history appends one JSON line per run so the numbers can be
+tracked over time.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.fixtures import write_aldi_fixtures
+from benchmarks.stub_server import serve_fixtures
+
+INVOKE = """
+import json, sys, time
+start = time.perf_counter()
+import Aldi
+from rate_limit import HostRateLimiter
+imported = time.perf_counter()
+timings = []
+for _ in range(2):
+    begin = time.perf_counter()
+    scraper = Aldi.get_scraper(sys.argv[2])
+    scraper.base_url = sys.argv[1]
+    scraper.rate_limiter = HostRateLimiter(rate=None)
+    rows = len(scraper.scrape_category('frozen'))
+    timings.append(time.perf_counter() - begin)
+print(json.dumps({'import': imported - start, 'first': timings[0], 'warm': timings[1], 'rows': rows}))
+"""
+
+
+def import_times(module: str):
+    """Total import time of module and its slowest direct imports, in ms, from -X importtime."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    direct = []
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            # Children are printed before their parent, so keep only the ones under module
+            if name.strip() == module:
+                total = int(cumulative) / 1000
+                break
+            direct = []
+        elif depth == 1:
+            direct.append((int(cumulative) / 1000, name.strip()))
+    return total, sorted(direct, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--pages', type=int, default=3)
+    parser.add_argument('--history', help='append results to this JSON lines file')
+    args = parser.parse_args()
+
+    total, direct = import_times('Aldi')
+    print(f"import Aldi: {total:7.1f} ms (-X importtime)")
+    for ms, name in direct[:8]:
+        print(f"  {name:<20} {ms:7.1f} ms")
+
+    work = tempfile.mkdtemp()
+    paths = write_aldi_fixtures(os.path.join(work, 'pages'), max_pages=args.pages)
+    server, _ = serve_fixtures(paths)
+    base_url = f'http://127.0.0.1:{server.server_port}/en-GB'
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    runs = []
+    for n in range(args.repeat):
+        start = time.perf_counter()
+        checkpoints = os.path.join(work, f'checkpoints-{n}.sqlite')
+        result = subprocess.run([sys.executable, '-c', INVOKE, base_url, checkpoints],
+                                capture_output=True, text=True, check=True, env=env)
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        run['cold'] = time.perf_counter() - start
+        runs.append(run)
+    server.shutdown()
+
+    summary = {key: statistics.median([run[key] for run in runs]) * 1000 for key in ('cold', 'import', 'first', 'warm')}
+    print(f"cold invoke: {summary['cold']:7.1f} ms  (import {summary['import']:.1f} ms, "
+          f"first scrape {summary['first']:.1f} ms)")
+    print(f"warm invoke: {summary['warm']:7.1f} ms  ({runs[0]['rows']} rows, median of {args.repeat})")
+    if args.history:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+        with open(args.history, 'a') as f:
+            f.write(json.dumps({'at': datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+                                'import_tree_ms': round(total, 1),
+                                **{f'{key}_ms': round(value, 1) for key, value in summary.items()}}) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Pages kept versus dropped when the site throttles, with and without the retry scheduler.
+
+Usage: python -m benchmarks.bench_throttle [--pages 30] [--server-rate 20] [--workers 8]
+
+The stub server answers 429 (Retry-After: 1) to requests faster than
+--server-rate per second. 'no retry' is the old behaviour (one attempt,
+failures dropped); 'retry' re-enqueues with backoff; 'retry + limiter' also
+paces each host and halves its rate on every 429.
+"""
+import argparse
+import tempfile
+import time
+
+from Aldi import AldiScraper
+from benchmarks.fixtures import write_aldi_fixtures
+from benchmarks.stub_server import serve_fixtures
+from rate_limit import FetchStats, HostRateLimiter, RetryPolicy
+import page_scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=30)
+    parser.add_argument('--server-rate', type=float, default=20.0, help='requests/s the stub server allows')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    paths = write_aldi_fixtures(tempfile.mkdtemp(), max_pages=args.pages)
+    server, hits = serve_fixtures(paths, max_rate=args.server_rate)
+    runs = (('no retry', HostRateLimiter(rate=None), RetryPolicy(max_attempts=1)),
+            ('retry', HostRateLimiter(rate=None), RetryPolicy(max_attempts=6, base_delay=0.5)),
+            ('retry + limiter', HostRateLimiter(rate=args.workers, burst=1, pause=1.0),
+             RetryPolicy(max_attempts=6, base_delay=0.5)))
+    for run, limiter, retry in runs:
+        stats = FetchStats()
+        scraper = AldiScraper(fetch_backend='http', page_workers=args.workers, per_host_limit=args.workers,
+                              rate_limiter=limiter, retry=retry)
+        scraper.base_url = f'http://127.0.0.1:{server.server_port}/en-GB'
+        # Count into a fresh FetchStats so runs do not add up
+        page_scheduler.FETCH_STATS = stats
+        hits.update(count=0, throttled=0)
+        start = time.perf_counter()
+        df = scraper.scrape_category('frozen')
+        elapsed = time.perf_counter() - start
+        counts = next(iter(stats.summary().values()), {})
+        rate = limiter.rates_by_host()
+        print(f"{run:>15}: {elapsed:6.2f}s  {len(df):5d} rows  requests {hits['count']:4d}  "
+              f"429s {hits['throttled']:4d}  retries {counts.get('retries', 0):3d}  "
+              f"drops {counts.get('drops', 0):3d}" + (f"  rate {rate}" if rate else ''))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
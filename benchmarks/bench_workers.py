@@ -0,0 +1,68 @@
+"""Work queue throughput as worker processes are added.
+
+Usage: python -m benchmarks.bench_workers [--categories 6] [--pages 20] [--latency 0.1] [--workers 1 2 4 8]
+
+Aldi categories are served by the local stub server with --latency seconds per
+page. Each run enqueues the same units into a fresh SQLite queue, drains it
+with N worker processes writing to a scratch lake, and checks every unit is
+done and the lake holds every row exactly once.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from Aldi import AldiScraper
+from benchmarks.fixtures import write_aldi_fixtures
+from benchmarks.stub_server import serve_fixtures
+from lake_writer import read_lake
+from rate_limit import HostRateLimiter
+from work_queue import SQLiteWorkQueue, expand_units, run_workers
+
+BASE_URL = None
+
+
+def stub_scraper(retailer):
+    scraper = AldiScraper(fetch_backend='http', page_workers=2, per_host_limit=2,
+                          rate_limiter=HostRateLimiter(rate=None))
+    scraper.base_url = BASE_URL
+    return scraper
+
+
+def main():
+    global BASE_URL
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--categories', type=int, default=6)
+    parser.add_argument('--pages', type=int, default=20, help='pages per category')
+    parser.add_argument('--pages-per-unit', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.1, help='seconds added to every response')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp()
+    paths = write_aldi_fixtures(os.path.join(work, 'pages'), max_pages=args.pages)
+    server, hits = serve_fixtures(paths, latency=args.latency)
+    BASE_URL = f'http://127.0.0.1:{server.server_port}/en-GB'
+    categories = [f'category-{n}' for n in range(args.categories)]
+    units = expand_units('aldi', categories, args.pages_per_unit, scraper=stub_scraper('aldi'))
+
+    baseline = None
+    for workers in args.workers:
+        queue_path = os.path.join(work, f'queue-{workers}.sqlite')
+        lake = os.path.join(work, f'lake-{workers}')
+        queue = SQLiteWorkQueue(queue_path)
+        queue.put(units)
+        queue.close()
+        hits['count'] = 0
+        start = time.perf_counter()
+        counts = run_workers(queue_path, lake, workers=workers, scraper_factory=stub_scraper, poll_seconds=0.2)
+        elapsed = time.perf_counter() - start
+        rows = read_lake(lake).count_rows()
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3} {elapsed:6.2f}s  {hits['count'] / elapsed:7.1f} pages/s  {rows} rows  "
+              f"units {counts}  speedup x{baseline / elapsed:.1f}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
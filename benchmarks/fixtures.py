@@ -0,0 +1,124 @@
+"""Synthetic listing pages that match the selectors used by the scrapers, and loading of recorded ones."""
+import glob
+import os
+import random
+from typing import Dict, List
+
+WORDS = ['Organic', 'British', 'Chicken', 'Tomato', 'Pasta', 'Cheddar', 'Frozen', 'Peas',
+         'Garden', 'Mixed', 'Berries', 'Whole', 'Milk', 'Sourdough', 'Bread', 'Free Range', 'Eggs']
+UNITS = ['g', 'kg', 'ml', 'l']
+
+
+def product_name(rng: random.Random) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 5)))
+
+
+def aldi_listing_html(page: int, max_pages: int, n_products: int = 30, seed: int = 0, layout: str = 'pager') -> str:
+    """Build an Aldi-style listing page.
+
+    ``layout`` is how the page count shows: 'pager' (the page count span), 'total'
+    (a product total only), 'next' (a rel=next link only) or 'none'.
+    """
+    rng = random.Random(seed * 100003 + page)
+    tiles = []
+    for _ in range(n_products):
+        name = product_name(rng)
+        url = f"/product/{name.lower().replace(' ', '-')}-{rng.randint(1, 10 ** 6):018d}"
+        tiles.append(
+            '<div class="product-tile">'
+            f'<a class="p text-default-font" title="{name}" href="{url}">x</a>'
+            f'<span class="h4">£{rng.randint(30, 999) / 100:.2f}</span>'
+            f'<div class="text-gray-small">{rng.randint(1, 1000)}{rng.choice(UNITS)}</div>'
+            '</div>'
+        )
+    pager = {
+        'pager': f'<span class="d-flex-inline pt-2">of {max_pages}</span>',
+        'total': f'<div class="result-count">{n_products * max_pages:,} products</div>',
+        'next': f'<a rel="next" href="?page={page + 1}">Next</a>' if page < max_pages else '',
+        'none': '',
+    }[layout]
+    return (
+        '<html><head><title>Aldi</title></head><body>'
+        + pager + ''.join(tiles) +
+        '</body></html>'
+    )
+
+
+def write_aldi_fixtures(directory: str, max_pages: int = 5, n_products: int = 30, layout: str = 'pager') -> List[str]:
+    """Write synthetic Aldi pages to directory and return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for page in range(1, max_pages + 1):
+        path = os.path.join(directory, f'aldi_page{page}.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(aldi_listing_html(page, max_pages, n_products, layout=layout))
+        paths.append(path)
+    return paths
+
+
+def tesco_listing_html(page: int, max_pages: int, n_products: int = 48, seed: int = 0) -> str:
+    """Build a Tesco-style listing page, with some tiles out of stock."""
+    rng = random.Random(seed * 100003 + page + 7)
+    link = 'styled__Text-sc-1i711qa-1 bsLJsh ddsweb-link__text'
+    tiles = []
+    for _ in range(n_products):
+        price = ''
+        if rng.random() > 0.1:
+            price = ('<p class="text__StyledText-sc-1jpzi8m-0 gyHOWz ddsweb-text styled__PriceText-sc-v0qv7n-1 cXlRF">'
+                     f'£{rng.randint(30, 999) / 100:.2f}</p>')
+        tiles.append(
+            '<div class="styled__StyledVerticalTile-sc-1r1v9f3-1 iAEUS">'
+            f'<a href="#"><span class="{link}"> {product_name(rng)} {rng.randint(1, 1000)}{rng.choice(UNITS)} </span></a>'
+            f'{price}</div>'
+        )
+    pager = ''.join(f'<a href="#"><span class="{link}">{n}</span></a>' for n in range(1, max_pages + 1))
+    return '<html><body>' + ''.join(tiles) + f'<nav>{pager}</nav></body></html>'
+
+
+def ocado_listing_html(n_products: int = 600, seed: int = 0) -> str:
+    """Build an Ocado-style listing page with every product on one page."""
+    rng = random.Random(seed + 13)
+    tiles = []
+    for _ in range(n_products):
+        weight = f'<span class="fop-catch-weight">{rng.randint(1, 1000)}{rng.choice(UNITS)}</span>' if rng.random() > 0.2 else ''
+        tiles.append(
+            '<li class="fops-item fops-item--cluster">'
+            f'<div class="fop-contentWrapper"><h4 class="fop-title" title="{product_name(rng)}">x</h4>'
+            f'{weight}<span class="fop-price">£{rng.randint(30, 999) / 100:.2f}</span></div></li>'
+        )
+    return (f'<html><body><div class="total-product-number">{n_products} products</div>'
+            '<ul class="fops">' + ''.join(tiles) + '</ul></body></html>')
+
+
+def write_tesco_fixtures(directory: str, max_pages: int = 5, n_products: int = 48) -> List[str]:
+    """Write synthetic Tesco pages to directory and return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for page in range(1, max_pages + 1):
+        path = os.path.join(directory, f'tesco_page{page}.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(tesco_listing_html(page, max_pages, n_products))
+        paths.append(path)
+    return paths
+
+
+def write_ocado_fixtures(directory: str, n_products: int = 600) -> List[str]:
+    """Write a synthetic Ocado category page (Ocado lists a category on one page) and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'ocado_page1.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(ocado_listing_html(n_products))
+    return [path]
+
+
+def load_recorded(directory: str) -> Dict[str, Dict[str, List[str]]]:
+    """Pages saved by record_fixtures, as {retailer: {category: [page paths in page order]}}."""
+    recorded: Dict[str, Dict[str, List[str]]] = {}
+    for path in glob.glob(os.path.join(directory, '*', '*', 'page*.html')):
+        category_dir, name = os.path.split(path)
+        retailer_dir, category = os.path.split(category_dir)
+        recorded.setdefault(os.path.basename(retailer_dir), {}).setdefault(category, []).append(path)
+    for categories in recorded.values():
+        for paths in categories.values():
+            paths.sort(key=lambda p: int(os.path.basename(p)[len('page'):-len('.html')]))
+    return recorded
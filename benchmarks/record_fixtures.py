@@ -0,0 +1,61 @@
+"""Record live listing pages as benchmark fixtures.
+
+Usage: python -m benchmarks.record_fixtures OUT [--retailers aldi tesco ocado] [--pages 3]
+
+Pages are saved as OUT/<retailer>/<category>/page<N>.html, which
+``bench_scrapers --fixtures OUT`` serves back from the stub server. Aldi is
+fetched over HTTP (falling back to Chrome); Tesco and Ocado need Chrome.
+Requests are paced by the shared per-host rate limiter.
+"""
+import argparse
+import os
+
+from work_queue import DEFAULT_CATEGORIES, SCRAPERS
+
+
+def save(out: str, retailer: str, category: str, page: int, html: str):
+    directory = os.path.join(out, retailer, category)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f'page{page}.html'), 'w', encoding='utf-8') as f:
+        f.write(html)
+
+
+def record(retailer: str, categories, pages: int, out: str) -> int:
+    """Save up to ``pages`` listing pages per category and return how many were saved."""
+    scraper = SCRAPERS[retailer]()
+    saved = 0
+    try:
+        for category in categories:
+            if retailer == 'ocado':
+                # One page per category, rendered in Chrome
+                with scraper.driver_pool.driver(scraper.base_url, scraper.start_driver) as driver:
+                    scraper.get_total_products(driver, category)
+                    save(out, retailer, category, 1, driver.page_source)
+                saved += 1
+                continue
+            fetcher = scraper.make_fetcher()
+            try:
+                for page in range(1, min(pages, scraper.get_max_pages(fetcher, category)) + 1):
+                    url = scraper.category_url(category, page)
+                    scraper.rate_limiter.acquire(url)
+                    save(out, retailer, category, page, fetcher.fetch(url))
+                    saved += 1
+            finally:
+                fetcher.close()
+    finally:
+        scraper.driver_pool.close()
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('out')
+    parser.add_argument('--retailers', nargs='+', default=list(SCRAPERS), choices=list(SCRAPERS))
+    parser.add_argument('--pages', type=int, default=3, help='pages recorded per category')
+    args = parser.parse_args()
+    for retailer in args.retailers:
+        print(f"{retailer}: recorded {record(retailer, DEFAULT_CATEGORIES[retailer], args.pages, args.out)} pages")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Local HTTP server that replays saved listing pages."""
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ASSET_TYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp', 'svg': 'image/svg+xml',
+               'woff2': 'font/woff2', 'woff': 'font/woff', 'mp4': 'video/mp4'}
+EMPTY_PAGE = b'<html><body><p>No products found</p></body></html>'
+
+
+def serve_fixtures(paths, latency: float = 0.0, etags: bool = False, max_rate: float = 0.0, jitter: float = 0.0,
+                   fail_rate: float = 0.0, fail_status: int = 500, categories=None, seed: int = 0,
+                   asset_size: int = 0, cycle: bool = True):
+    """Serve fixture page N for any path with ?page=N. Returns (server, hits).
+
+    ``categories`` maps a category slug to its own page files; a request whose
+    path has that slug as a segment is served from them, anything else from
+    ``paths``. Page numbers past the last file cycle back to the first, or
+    without ``cycle`` get a listing with no products, as a real site would.
+    ``latency`` (plus uniform(0, ``jitter``)) seconds are slept before each
+    response to mimic a remote site, and ``fail_rate`` of requests are answered
+    with ``fail_status`` instead.
+    With ``etags`` pages carry an ETag and a matching If-None-Match gets a 304;
+    it can be toggled later through ``server.etags``. With ``max_rate`` the
+    server answers 429 with Retry-After to requests arriving faster than that.
+    With ``asset_size`` any request for an image, font or media file gets that
+    many bytes back, so pages can reference assets a browser will download.
+    """
+    def load(files):
+        bodies = []
+        for path in files:
+            with open(path, 'rb') as f:
+                bodies.append(f.read())
+        return bodies
+
+    pages = load(paths)
+    category_pages = {category: load(files) for category, files in (categories or {}).items()}
+    rng = random.Random(seed)
+    hits = {'count': 0, 'throttled': 0, 'failed': 0}
+    last = [0.0]
+    lock = threading.Lock()
+
+    def count(name: str):
+        # Handler threads run concurrently; += on a dict entry is not atomic
+        with lock:
+            hits[name] = hits.get(name, 0) + 1
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            extension = url.path.rsplit('.', 1)[-1] if '.' in url.path.rsplit('/', 1)[-1] else ''
+            if asset_size and extension in ASSET_TYPES:
+                count('assets')
+                self.send_response(200)
+                self.send_header('Content-Type', ASSET_TYPES[extension])
+                self.send_header('Content-Length', str(asset_size))
+                self.end_headers()
+                self.wfile.write(b'\0' * asset_size)
+                return
+            page = int(parse_qs(url.query).get('page', ['1'])[0])
+            segments = url.path.split('/')
+            served = next((bodies for category, bodies in category_pages.items() if category in segments), pages)
+            body = served[(page - 1) % len(served)] if cycle or page <= len(served) else EMPTY_PAGE
+            count('count')
+            if max_rate:
+                with lock:
+                    now = time.monotonic()
+                    too_fast = now - last[0] < 1 / max_rate
+                    if not too_fast:
+                        last[0] = now
+                if too_fast:
+                    count('throttled')
+                    self.send_response(429)
+                    self.send_header('Retry-After', '1')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+            with lock:
+                delay = latency + (rng.uniform(0, jitter) if jitter else 0.0)
+                fail = fail_rate and rng.random() < fail_rate
+            if delay:
+                time.sleep(delay)
+            if fail:
+                count('failed')
+                self.send_response(fail_status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            if self.server.etags and self.headers.get('If-None-Match') == etag:
+                count('not_modified')
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            if self.server.etags:
+                self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.etags = etags
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, hits
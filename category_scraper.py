@@ -0,0 +1,209 @@
+"""Category scraping shared by the retailer scrapers.
+
+``CategoryScraper`` turns a retailer's ``iter_category(category)`` (pages of
+row dicts) into RowBuffers, DataFrames and a multi-category run with its
+summaries. ``PagedCategoryScraper`` also provides ``iter_category`` for
+listings split over numbered pages (Aldi, Tesco): page-count discovery,
+windowed concurrent fetching, checkpoints, resume and coverage. A paged
+retailer only supplies ``category_url(category, page)``, ``make_fetcher()``,
+``read_pager(html)``, ``parse_page(html)`` (one list per parsed field) and
+``row_fields``, the row keys in order with 'category' where the category goes.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator, List, Tuple
+
+from page_scheduler import fetch_pages
+from pagination import COVERAGE, Paginator
+from rate_limit import FETCH_STATS
+from row_buffer import CATEGORY, RowBuffer
+from telemetry import TELEMETRY
+
+if TYPE_CHECKING:
+    # pandas is only loaded by RowBuffer.to_pandas, keeping it out of scraper imports
+    import pandas as pd
+
+
+class CategoryScraper:
+    """Collect categories from ``iter_category`` into one DataFrame.
+
+    Subclasses set ``retailer``, ``logger`` and ``time_to_content`` and may set
+    ``response_cache``; ``category_workers`` is how many categories
+    ``scrape_all_categories`` runs at once by default.
+    """
+
+    category_workers = 5
+
+    def iter_category(self, category: str) -> Iterator[List[dict]]:
+        raise NotImplementedError
+
+    def collect_category(self, category: str) -> RowBuffer:
+        """Scrape a category into a columnar RowBuffer, page by page."""
+        buffer = RowBuffer()
+        for page_rows in self.iter_category(category):
+            buffer.extend(page_rows)
+        return buffer
+
+    def scrape_category(self, category: str) -> 'pd.DataFrame':
+        """Scrape all products from a category."""
+        buffer = self.collect_category(category)
+        with TELEMETRY.stage('dataframe', category=category) as measured:
+            measured['rows'] = len(buffer)
+            return buffer.to_pandas()
+
+    def scrape_all_categories(self, categories: List[str], max_workers: int = None) -> 'pd.DataFrame':
+        """Scrape all categories using ThreadPoolExecutor."""
+        with ThreadPoolExecutor(max_workers=max_workers or self.category_workers) as executor:
+            results = list(executor.map(self.collect_category, categories))
+        # One DataFrame for the whole run instead of one per category plus a concat
+        with TELEMETRY.stage('dataframe') as measured:
+            buffer = RowBuffer.concat(results)
+            measured['rows'] = len(buffer)
+            df = buffer.to_pandas()
+        self.log_summaries()
+        return df
+
+    def log_summaries(self):
+        self.time_to_content.log_summary(self.logger)
+        FETCH_STATS.log_summary(self.logger)
+        TELEMETRY.log_summary(self.logger)
+        COVERAGE.log_summary(self.logger)
+        if getattr(self, 'response_cache', None):
+            self.response_cache.log_summary(self.logger)
+
+
+class PagedCategoryScraper(CategoryScraper):
+    """Categories listed over numbered pages, fetched concurrently through ``page_scheduler``.
+
+    Besides the hooks in the module docstring, subclasses set ``page_workers``,
+    ``page_window``, ``per_host_limit``, ``pagination``, ``rate_limiter``,
+    ``retry``, ``checkpoint_store``, ``resume``, ``run_date`` and ``product_index``.
+    """
+
+    row_fields: Tuple[str, ...] = ()
+
+    def paginator(self, fetcher, category: str) -> Paginator:
+        """Page count discovery for a category from its page 1, fetched with the given fetcher."""
+        def fetch_page(page: int):
+            url = self.category_url(category, page)
+            TELEMETRY.label(url, category, page)
+            # Through the scheduler so a throttled page is retried like any other
+            return fetch_pages([url], [fetcher], rate_limiter=self.rate_limiter, retry=self.retry)[0]
+        return Paginator(fetch_page, lambda html: len(self.parse_page(html)[0]), self.read_pager, self.pagination)
+
+    def get_max_pages(self, fetcher, category: str) -> int:
+        """Fetch the maximum number of pages for a category."""
+        try:
+            return self.paginator(fetcher, category).count()
+        except Exception as e:
+            self.logger.error(f"Error getting max pages for {category}: {e}")
+            return 1
+
+    def count_pages(self, category: str) -> int:
+        """Number of listing pages in a category; raises if page 1 can not be fetched."""
+        fetcher = self.make_fetcher()
+        try:
+            return self.paginator(fetcher, category).count()
+        finally:
+            fetcher.close()
+
+    def build_rows(self, category: str, columns: List[list]) -> List[dict]:
+        """Row dicts keyed by ``row_fields`` from the parsed columns, with the category filled in."""
+        columns = list(columns)
+        columns.insert(self.row_fields.index(CATEGORY), [category] * len(columns[0]) if columns else [])
+        return [dict(zip(self.row_fields, values)) for values in zip(*columns)]
+
+    def process_page(self, category: str, page: int, max_pages: int, html: str, error: Exception = None) -> List[dict]:
+        """Parse one fetched page into rows and checkpoint it. Returns [] if the page failed."""
+        try:
+            if error is not None:
+                raise error
+            with TELEMETRY.stage('parse', category=category, page=page) as measured:
+                columns = self.parse_page(html)
+                measured['rows'] = len(columns[0]) if columns else 0
+
+            with TELEMETRY.stage('build_rows', category=category, page=page) as measured:
+                rows = self.build_rows(category, columns)
+                if self.product_index:
+                    self.product_index.tag(self.retailer, rows)
+                if self.checkpoint_store:
+                    self.checkpoint_store.record(self.retailer, category, page, self.run_date, rows)
+                measured['rows'] = len(rows)
+
+            self.logger.info(f"Scraped page {page}/{max_pages} of {category}")
+            return rows
+
+        except Exception as e:
+            self.logger.error(f"Error on page {page} of {category}: {e}")
+            if self.checkpoint_store:
+                self.checkpoint_store.record(self.retailer, category, page, self.run_date, None, e)
+            return []
+
+    def iter_category(self, category: str, first_page: int = 1, last_page: int = None) -> Iterator[List[dict]]:
+        """Yield the rows of each page of a category, in page order.
+
+        Pages are fetched concurrently in windows of ``page_window`` so only a
+        window's worth of HTML is held in memory at a time. ``first_page`` and
+        ``last_page`` restrict it to a page range (one work queue unit); without
+        ``last_page`` the page count is discovered from page 1 (see pagination),
+        which is then parsed rather than fetched again. When the listing only
+        has next links, pages are walked until one has no next link or no rows.
+        """
+        fetchers = [self.make_fetcher()]
+        found = None
+        fetched = {}
+        rows_seen = 0
+
+        try:
+            if last_page is None:
+                paginator = self.paginator(fetchers[0], category)
+                found = paginator.discover()
+                fetched = paginator.fetched
+                max_pages = found.pages
+                self.logger.info(f"Category {category}: {found}")
+            else:
+                max_pages = last_page
+
+            done = {}
+            if self.checkpoint_store and self.resume:
+                done = self.checkpoint_store.load_completed(self.retailer, category, self.run_date)
+                self.logger.info(f"Category {category}: resuming, {len(done)}/{max_pages or '?'} pages already done")
+            if max_pages is None:
+                workers = self.page_workers
+            else:
+                workers = len([page for page in range(first_page, 1 + max_pages) if page not in done and page not in fetched])
+            fetchers += [self.make_fetcher() for _ in range(min(self.page_workers, workers) - 1)]
+
+            page = first_page
+            while max_pages is None or page <= max_pages:
+                if page in done:
+                    rows_seen += len(done[page])
+                    yield done[page]
+                    page += 1
+                    continue
+                if page not in fetched:
+                    # While walking next links, read ahead only as far as the fetchers can use
+                    ahead = self.page_window if max_pages is not None else self.page_workers
+                    window = [p for p in range(page, page + ahead)
+                              if p not in done and p not in fetched and (max_pages is None or p <= max_pages)]
+                    urls = [self.category_url(category, p) for p in window]
+                    for p, url in zip(window, urls):
+                        TELEMETRY.label(url, category, p)
+                    fetched.update(zip(window, fetch_pages(urls, fetchers, per_host_limit=self.per_host_limit,
+                                                           rate_limiter=self.rate_limiter, retry=self.retry)))
+                html, error = fetched.pop(page)
+                rows = self.process_page(category, page, max_pages or '?', html, error)
+                if max_pages is None and Paginator.is_last(html, len(rows)):
+                    # Pages fetched ahead of the walk are past the end
+                    max_pages = page
+                    fetched.clear()
+                rows_seen += len(rows)
+                if rows:
+                    yield rows
+                page += 1
+
+            if found:
+                COVERAGE.record(self.retailer, category, found, max_pages, rows_seen)
+
+        finally:
+            for fetcher in fetchers:
+                fetcher.close()
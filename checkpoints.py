@@ -0,0 +1,114 @@
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def today() -> str:
+    return datetime.now().strftime('%Y%m%d')
+
+
+class SQLiteCheckpointStore:
+    """Completed pages and their parsed rows, keyed by (retailer, category, page, run date)."""
+
+    def __init__(self, path: str = 'checkpoints.sqlite'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                retailer TEXT NOT NULL,
+                category TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                run_date TEXT NOT NULL,
+                status TEXT NOT NULL,
+                rows TEXT,
+                error TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (retailer, category, page, run_date)
+            )"""
+        )
+        self._conn.commit()
+
+    def record(self, retailer: str, category: str, page: int, run_date: str,
+               rows: Optional[List[dict]], error: Optional[Exception] = None):
+        """Save a page's rows; pages with an error or no rows are recorded as failed."""
+        status = 'done' if rows and error is None else 'failed'
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (retailer, category, page, run_date, status,
+                 json.dumps(rows) if status == 'done' else None,
+                 str(error) if error is not None else None,
+                 datetime.now().isoformat()),
+            )
+            self._conn.commit()
+
+    def load_completed(self, retailer: str, category: str, run_date: str) -> Dict[int, List[dict]]:
+        """Rows of every completed page of a category, keyed by page number."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT page, rows FROM pages WHERE retailer = ? AND category = ? AND run_date = ? AND status = 'done'",
+                (retailer, category, run_date),
+            )
+            return {page: json.loads(rows) for page, rows in cursor.fetchall()}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class S3CheckpointStore:
+    """Same interface as SQLiteCheckpointStore, with one JSON object per page in S3.
+
+    Works with any S3-compatible endpoint via ``endpoint_url``.
+    """
+
+    def __init__(self, bucket: str, prefix: str = 'checkpoints', endpoint_url: Optional[str] = None):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.s3_client = boto3.client('s3', endpoint_url=endpoint_url)
+
+    def _category_prefix(self, retailer: str, category: str, run_date: str) -> str:
+        return f"{self.prefix}/{run_date}/{retailer}/{category}/"
+
+    def record(self, retailer: str, category: str, page: int, run_date: str,
+               rows: Optional[List[dict]], error: Optional[Exception] = None):
+        status = 'done' if rows and error is None else 'failed'
+        body = {'status': status, 'rows': rows if status == 'done' else None,
+                'error': str(error) if error is not None else None,
+                'updated_at': datetime.now().isoformat()}
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=f"{self._category_prefix(retailer, category, run_date)}page={page}.json",
+            Body=json.dumps(body),
+            ContentType='application/json',
+        )
+
+    def load_completed(self, retailer: str, category: str, run_date: str) -> Dict[int, List[dict]]:
+        completed = {}
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for result in paginator.paginate(Bucket=self.bucket, Prefix=self._category_prefix(retailer, category, run_date)):
+            for obj in result.get('Contents', []):
+                page = int(obj['Key'].rsplit('page=', 1)[1].split('.')[0])
+                body = json.loads(self.s3_client.get_object(Bucket=self.bucket, Key=obj['Key'])['Body'].read())
+                if body['status'] == 'done':
+                    completed[page] = body['rows']
+        return completed
+
+    def close(self):
+        pass
+
+
+def open_checkpoint_store(uri: str):
+    """Open 's3://bucket/prefix' as an S3CheckpointStore, anything else as a SQLite file path."""
+    if uri.startswith('s3://'):
+        bucket, _, prefix = uri[len('s3://'):].partition('/')
+        return S3CheckpointStore(bucket, prefix or 'checkpoints')
+    return SQLiteCheckpointStore(uri)
@@ -0,0 +1,222 @@
+import atexit
+import copy
+import glob
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from tempfile import mkdtemp
+from typing import Callable, Dict, List, Optional
+
+from telemetry import TELEMETRY
+
+# Where the Lambda image (see Dockerfile and chrome-installer.sh) puts Chrome and chromedriver
+LAMBDA_CHROME = "/opt/chrome/chrome-linux64/chrome"
+LAMBDA_CHROMEDRIVER = "/opt/chrome-driver/chromedriver-linux64/chromedriver"
+
+
+def in_lambda_image() -> bool:
+    return os.path.exists(LAMBDA_CHROME)
+
+
+def lambda_chrome(options):
+    """Set up Chrome options for the Lambda image's Chrome and return the chromedriver Service.
+
+    Outside the Lambda image the options are left alone and None is returned,
+    so selenium finds Chrome and chromedriver as usual.
+    """
+    if not in_lambda_image():
+        return None
+    from selenium.webdriver.chrome.service import Service
+    for argument in ("--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu", "--disable-dev-tools",
+                     "--no-zygote", "--remote-debugging-pipe", "--verbose", "--log-path=/tmp"):
+        options.add_argument(argument)
+    options.binary_location = LAMBDA_CHROME
+    return Service(executable_path=LAMBDA_CHROMEDRIVER, service_log_path="/tmp/chromedriver.log")
+
+
+def with_profile_dirs(options):
+    """A copy of options with fresh profile, data and cache dirs; Chrome locks them, so every live driver needs its own."""
+    options = copy.deepcopy(options)
+    options.add_argument(f"--user-data-dir={mkdtemp()}")
+    options.add_argument(f"--data-path={mkdtemp()}")
+    options.add_argument(f"--disk-cache-dir={mkdtemp()}")
+    return options
+
+
+def browser_rss_mb(driver) -> float:
+    """Resident memory of chromedriver and every browser process it spawned, in MB."""
+    try:
+        pids = [driver.service.process.pid]
+    except AttributeError:
+        return 0.0
+    total_kb = 0
+    seen = set()
+    while pids:
+        pid = pids.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+            for children in glob.glob(f'/proc/{pid}/task/*/children'):
+                with open(children) as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+class PooledDriver:
+    __slots__ = ('driver', 'pages', 'sites')
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.sites = set()
+
+
+class DriverPool:
+    """A bounded pool of reusable Chrome drivers shared across categories and scrapers.
+
+    Drivers are started lazily (or up front with ``warm_up``), health checked on
+    checkout and recycled after ``max_pages_per_driver`` pages or once the browser
+    exceeds ``memory_ceiling_mb``. Cookie/consent state is kept per site so a new
+    driver gets the saved cookies instead of repeating the banner handshake.
+    """
+
+    def __init__(self, driver_factory: Callable, size: int = 2, max_pages_per_driver: int = 200,
+                 memory_ceiling_mb: Optional[float] = None):
+        self.driver_factory = driver_factory
+        self.size = size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.memory_ceiling_mb = memory_ceiling_mb
+        self.cookies: Dict[str, List[dict]] = {}
+        self.started = 0
+        self.recycled = 0
+        self._idle: List[PooledDriver] = []
+        self._live = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self.logger = logging.getLogger(__name__)
+        atexit.register(self.close)
+
+    def warm_up(self, count: Optional[int] = None, site: Optional[str] = None, on_start: Optional[Callable] = None):
+        """Start drivers ahead of time, optionally preparing them for a site."""
+        pooled = [self.acquire(site, on_start) for _ in range(min(count or self.size, self.size))]
+        for item in pooled:
+            self.release(item, pages=0)
+
+    def acquire(self, site: Optional[str] = None, on_start: Optional[Callable] = None,
+                timeout: Optional[float] = None) -> PooledDriver:
+        """Check a healthy driver out of the pool, starting one if there is room."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._live < self.size:
+                    self._live += 1
+                    pooled = None
+                    break
+                if not self._cond.wait(timeout):
+                    raise TimeoutError(f"No driver available after {timeout}s")
+
+        try:
+            if pooled is not None and not self.is_healthy(pooled):
+                self.logger.warning("Discarding unhealthy driver")
+                self._quit(pooled)
+                pooled = None
+            if pooled is None:
+                with TELEMETRY.stage('chrome_start'):
+                    pooled = PooledDriver(self.driver_factory())
+                with self._cond:
+                    self.started += 1
+            if site is not None and site not in pooled.sites:
+                with TELEMETRY.stage('site_setup'):
+                    self.prepare_site(pooled, site, on_start)
+        except Exception:
+            if pooled is not None:
+                self._quit(pooled)
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+        return pooled
+
+    def release(self, pooled: PooledDriver, pages: int = 1, healthy: bool = True):
+        """Return a driver to the pool, recycling it if it is worn out."""
+        pooled.pages += pages
+        recycle = not healthy or self._closed or pooled.pages >= self.max_pages_per_driver
+        if not recycle and self.memory_ceiling_mb:
+            rss = browser_rss_mb(pooled.driver)
+            if rss > self.memory_ceiling_mb:
+                self.logger.info(f"Recycling driver using {rss:.0f}MB (ceiling {self.memory_ceiling_mb}MB)")
+                recycle = True
+        if recycle:
+            self._quit(pooled)
+            with self._cond:
+                self.recycled += 1
+                self._live -= 1
+                self._cond.notify()
+        else:
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    @contextmanager
+    def driver(self, site: Optional[str] = None, on_start: Optional[Callable] = None, pages: int = 1):
+        """Context manager yielding a webdriver that is returned to the pool afterwards."""
+        pooled = self.acquire(site, on_start)
+        healthy = True
+        try:
+            yield pooled.driver
+        except Exception:
+            healthy = self.is_healthy(pooled)
+            raise
+        finally:
+            self.release(pooled, pages=pages, healthy=healthy)
+
+    def prepare_site(self, pooled: PooledDriver, site: str, on_start: Optional[Callable]):
+        """Restore saved cookies for site, or run on_start once and save the cookies it sets."""
+        driver = pooled.driver
+        saved = self.cookies.get(site)
+        if saved:
+            driver.get(site)
+            for cookie in saved:
+                try:
+                    driver.add_cookie(cookie)
+                except Exception as e:
+                    self.logger.debug(f"Could not restore cookie {cookie.get('name')}: {e}")
+        elif on_start is not None:
+            on_start(driver)
+            self.cookies[site] = driver.get_cookies()
+        pooled.sites.add(site)
+
+    def is_healthy(self, pooled: PooledDriver) -> bool:
+        try:
+            return pooled.driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    def _quit(self, pooled: PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            self.logger.warning(f"Error quitting driver: {e}")
+
+    def close(self):
+        """Quit every idle driver; drivers still checked out are quit on release."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
@@ -0,0 +1,175 @@
+import logging
+import time
+from typing import Callable, Optional
+
+from lean_browsing import page_weight
+from rate_limit import THROTTLE_STATUS, classify
+from telemetry import TELEMETRY
+
+# Markers only bot-protection vendors put on their interstitials. Words like
+# "captcha" or "Access Denied" also appear on ordinary pages (reCAPTCHA on a
+# newsletter form, a footer link), so they are not matched on their own.
+CHALLENGE_MARKERS = (
+    # Cloudflare
+    'cf-browser-verification',
+    'cf_chl_opt',
+    'cf-chl-widget',
+    '/cdn-cgi/challenge-platform/h/',
+    # Akamai
+    '/_sec/cp_challenge/',
+    'sec-if-cpt-container',
+    'errors.edgesuite.net',
+    # Imperva / Incapsula
+    'Request unsuccessful. Incapsula',
+    '_Incapsula_Resource',
+    'Pardon Our Interruption',
+    # PerimeterX
+    'px-captcha',
+)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-GB,en;q=0.9',
+    'Connection': 'keep-alive',
+}
+
+
+def looks_like_challenge(html: str, status: Optional[int] = None) -> bool:
+    """Return True if the document looks like a bot challenge rather than content.
+
+    A throttling status (403, 429, 503) is a challenge whatever the body says;
+    otherwise the start of the document is searched for vendor markers.
+    """
+    if status in THROTTLE_STATUS:
+        return True
+    head = html[:20000]
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+class HttpFetcher:
+    """Fetch pages over a pooled, keep-alive requests.Session."""
+
+    name = 'http'
+
+    def __init__(self, pool_size: int = 10, timeout: float = 15, headers: Optional[dict] = None,
+                 cache=None, label: str = 'default'):
+        self.timeout = timeout
+        # With a ResponseCache, pages are revalidated with If-None-Match/If-Modified-Since
+        self.cache = cache
+        self.label = label
+        # requests is imported here rather than with the module, which scrapers import at startup
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.logger = logging.getLogger(__name__)
+
+    def fetch(self, url: str) -> str:
+        """Return the HTML body for url, raising on HTTP errors."""
+        entry = self.cache.lookup(url) if self.cache else None
+        headers = entry.conditional_headers() if entry else None
+        with TELEMETRY.stage('download', url) as measured:
+            response = self.session.get(url, timeout=self.timeout, headers=headers)
+            measured['bytes'] = len(response.content)
+        if entry is not None and response.status_code == 304:
+            return self.cache.not_modified(entry, self.label)
+        response.raise_for_status()
+        html = response.text
+        if self.cache and not looks_like_challenge(html, response.status_code):
+            self.cache.store(url, html, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                             self.label)
+        return html
+
+    def close(self):
+        self.session.close()
+
+
+class SeleniumFetcher:
+    """Fetch pages through Chrome drivers checked out of a DriverPool.
+
+    A driver is held only for the duration of one page load, so many fetchers
+    (and scrapers) can share a small pool without starving each other. Instead
+    of a fixed sleep, ``ready(driver) -> bool`` is called after navigation and
+    the time from navigation to ready content is recorded in ``time_to_content``.
+    """
+
+    name = 'selenium'
+
+    def __init__(self, pool, site: Optional[str] = None, on_start: Optional[Callable] = None,
+                 ready: Optional[Callable] = None, time_to_content=None, label: str = 'page', cache=None):
+        self.pool = pool
+        self.site = site
+        self.on_start = on_start
+        self.ready = ready
+        self.time_to_content = time_to_content
+        self.label = label
+        # Rendered pages are stored so unchanged ones skip parsing and runs can be replayed offline
+        self.cache = cache
+        self.logger = logging.getLogger(__name__)
+
+    def fetch(self, url: str) -> str:
+        """Load url in Chrome and return the page source once it is ready."""
+        with self.pool.driver(self.site, self.on_start) as driver:
+            start = time.perf_counter()
+            with TELEMETRY.stage('navigate', url):
+                driver.get(url)
+            with TELEMETRY.stage('wait', url):
+                is_ready = self.ready(driver) if self.ready else True
+            if not is_ready:
+                self.logger.warning(f"Page not ready before timeout: {url}")
+            if self.time_to_content is not None:
+                self.time_to_content.record(self.label, time.perf_counter() - start, is_ready)
+            weight = page_weight(driver)
+            TELEMETRY.record('render', weight['dom_ready'], url, nbytes=weight['bytes'])
+            html = driver.page_source
+        if self.cache and is_ready and not looks_like_challenge(html):
+            self.cache.store(url, html, label=self.label)
+        return html
+
+    def close(self):
+        # Drivers belong to the pool and outlive the fetcher
+        pass
+
+
+class FallbackFetcher:
+    """Try a cheap fetcher first and fall back to another when the result is unusable.
+
+    ``is_usable`` receives the HTML from the primary fetcher and should return False
+    for documents that have no products; challenge pages are always rejected.
+    Throttling errors (429, 403, 503) are raised rather than retried on the
+    fallback, so the scheduler backs off the host instead of hitting it again.
+    """
+
+    def __init__(self, primary, fallback, is_usable: Optional[Callable[[str], bool]] = None):
+        self.primary = primary
+        self.fallback = fallback
+        self.is_usable = is_usable
+        self.name = f'{primary.name}+{fallback.name}'
+        self.fallback_count = 0
+        self.logger = logging.getLogger(__name__)
+
+    def fetch(self, url: str) -> str:
+        try:
+            html = self.primary.fetch(url)
+            if looks_like_challenge(html):
+                reason = 'challenge page'
+            elif self.is_usable and not self.is_usable(html):
+                reason = 'no products'
+            else:
+                return html
+        except Exception as e:
+            if classify(e)[0]:
+                raise
+            reason = str(e)
+        self.fallback_count += 1
+        self.logger.warning(f"{self.primary.name} fetch of {url} unusable ({reason}), using {self.fallback.name}")
+        return self.fallback.fetch(url)
+
+    def close(self):
+        self.primary.close()
+        self.fallback.close()
@@ -0,0 +1,92 @@
+"""Hive-partitioned Parquet writer for the S3 data lake.
+
+Snapshots are written as ``retailer=<r>/date=<YYYY-MM-DD>/category=<c>/part-*.parquet``
+so Athena (or pyarrow) only reads the partitions a query filters on. Prices are
+stored as numbers, and low-cardinality text columns are dictionary encoded.
+"""
+import logging
+from datetime import date as date_type
+from datetime import datetime
+from typing import List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from normaliser import normalise
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMNS = ['retailer', 'date', 'category']
+DICTIONARY_COLUMNS = ['retailer', 'date', 'category', 'brand', 'unit', 'unit_basis', 'weight', 'price_raw']
+
+
+def prepare_table(df: pd.DataFrame, retailer: str, snapshot_date: Union[str, date_type, None] = None) -> pa.Table:
+    """Normalise a scraped DataFrame and add partition columns and dictionary types."""
+    snapshot_date = snapshot_date or datetime.now().date()
+    if 'price_gbp' not in df:
+        df = normalise(df, retailer).rename(columns={'price': 'price_raw'})
+    else:
+        df = df.copy()
+    df['retailer'] = retailer
+    df['date'] = str(snapshot_date)
+    df['category'] = df['category'].astype('string') if 'category' in df else 'unknown'
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for name in DICTIONARY_COLUMNS:
+        if name in table.column_names:
+            index = table.column_names.index(name)
+            column = table.column(name).cast(pa.string()).dictionary_encode()
+            table = table.set_column(index, name, column)
+    return table
+
+
+def resolve_target(target: str, filesystem: Optional[pafs.FileSystem] = None):
+    """Map 's3://bucket/prefix' or a local directory to (filesystem, path)."""
+    if filesystem is not None:
+        return filesystem, target
+    if '://' in target:
+        return pafs.FileSystem.from_uri(target)
+    return pafs.LocalFileSystem(), target
+
+
+def write_lake(df: pd.DataFrame, target: str, retailer: str, snapshot_date: Union[str, date_type, None] = None,
+               filesystem: Optional[pafs.FileSystem] = None, row_group_size: int = 128_000,
+               compression: str = 'zstd', part_name: Optional[str] = None) -> List[str]:
+    """Write a snapshot as Hive-partitioned Parquet under target and return the written paths.
+
+    target is a local directory (handy for tests) or an 's3://bucket/prefix' URI.
+    Rerunning the same retailer/date replaces those partitions rather than duplicating rows.
+    With ``part_name`` only files named ``<part_name>-*.parquet`` are replaced, so
+    several writers (e.g. work queue units) can fill the same partition.
+    """
+    table = prepare_table(df, retailer, snapshot_date)
+    filesystem, base_dir = resolve_target(target, filesystem)
+    partitioning = ds.partitioning(
+        pa.schema([table.schema.field(name) for name in PARTITION_COLUMNS]), flavor='hive')
+    file_options = ds.ParquetFileFormat().make_write_options(
+        compression=compression,
+        use_dictionary=[name for name in DICTIONARY_COLUMNS if name in table.column_names],
+    )
+    written = []
+    ds.write_dataset(
+        table,
+        base_dir,
+        format='parquet',
+        partitioning=partitioning,
+        filesystem=filesystem,
+        file_options=file_options,
+        basename_template=f"{part_name or 'part'}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore' if part_name else 'delete_matching',
+        max_rows_per_group=row_group_size,
+        min_rows_per_group=min(row_group_size, max(1, table.num_rows)),
+        file_visitor=lambda f: written.append(f.path),
+    )
+    logger.info(f"Wrote {table.num_rows} {retailer} rows to {len(written)} files under {target}")
+    return written
+
+
+def read_lake(target: str, filesystem: Optional[pafs.FileSystem] = None) -> ds.Dataset:
+    """Open the lake as a partitioned dataset for filtered scans."""
+    filesystem, base_dir = resolve_target(target, filesystem)
+    return ds.dataset(base_dir, format='parquet', partitioning='hive', filesystem=filesystem)
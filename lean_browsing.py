@@ -0,0 +1,90 @@
+"""Lean browsing: Chrome that skips what the scrapers never read.
+
+The scrapers only read product names, prices and weights from the DOM, so
+images, media, fonts and third-party trackers are pure cost, especially on
+Ocado where display=2400 lazy-loads thousands of product images.
+``lean_options`` turns images off in the profile and ``prepare_driver``
+blocks the rest through CDP ``Network.setBlockedURLs``. The cookie consent
+script is left alone because the sites only render the product grid once it
+has been accepted.
+
+``page_weight`` reads bytes transferred and render time from the browser's
+performance timeline, so lean and full runs can be compared page by page.
+"""
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BLOCKED_EXTENSIONS = ('png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp',
+                      'woff', 'woff2', 'ttf', 'otf', 'eot',
+                      'mp4', 'webm', 'mp3', 'm3u8', 'ogg')
+
+# Ad, analytics and session-replay hosts seen on the three sites; setBlockedURLs
+# matches patterns, so third parties are listed rather than inferred
+THIRD_PARTY_HOSTS = ('googletagmanager.com', 'google-analytics.com', 'analytics.google.com',
+                     'doubleclick.net', 'googlesyndication.com', 'googleadservices.com',
+                     'facebook.net', 'facebook.com', 'connect.facebook.net', 'bat.bing.com',
+                     'hotjar.com', 'optimizely.com', 'criteo.com', 'criteo.net', 'adsrvr.org',
+                     'quantserve.com', 'scorecardresearch.com', 'tiktok.com', 'pinterest.com',
+                     'snapchat.com', 'twitter.com', 'yottaa.net', 'qualtrics.com', 'contentsquare.net',
+                     'dynatrace.com', 'newrelic.com', 'nr-data.net', 'trustpilot.com', 'youtube.com')
+
+# Resource timing keeps 250 entries by default; an Ocado category page loads far more
+TIMING_BUFFER_JS = "performance.setResourceTimingBufferSize(100000);"
+
+PAGE_WEIGHT_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+let bytes = nav ? nav.transferSize : 0;
+for (const r of resources) { bytes += r.transferSize || 0; }
+return [bytes, resources.length, nav ? nav.domContentLoadedEventEnd : 0];
+"""
+
+
+def blocked_url_patterns(extra: Optional[List[str]] = None) -> List[str]:
+    """URL patterns for Network.setBlockedURLs: heavy resource types and third-party hosts."""
+    patterns = [f'*.{ext}' for ext in BLOCKED_EXTENSIONS]
+    patterns += [f'*.{ext}?*' for ext in BLOCKED_EXTENSIONS]
+    patterns += [f'*://*.{host}/*' for host in THIRD_PARTY_HOSTS]
+    patterns += [f'*://{host}/*' for host in THIRD_PARTY_HOSTS]
+    return patterns + list(extra or [])
+
+
+def lean_options(options):
+    """Turn off images (and other heavy content) in the Chrome profile; returns options."""
+    options.add_experimental_option('prefs', {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.default_content_setting_values.notifications': 2,
+        'profile.default_content_setting_values.geolocation': 2,
+        'profile.default_content_setting_values.media_stream': 2,
+    })
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.add_argument('--disable-remote-fonts')
+    options.add_argument('--mute-audio')
+    return options
+
+
+def prepare_driver(driver, lean: bool = True, extra_patterns: Optional[List[str]] = None):
+    """Enable page weight tracking on a new driver and, when lean, block heavy and third-party requests.
+
+    Returns the driver. CDP errors (e.g. a non-Chromium driver) are logged and ignored.
+    """
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': TIMING_BUFFER_JS})
+        if lean:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_url_patterns(extra_patterns)})
+    except Exception as e:
+        logger.warning(f"Could not set up lean browsing: {e}")
+    return driver
+
+
+def page_weight(driver) -> Dict[str, float]:
+    """Bytes transferred, resource count and DOMContentLoaded time (seconds) of the current page."""
+    try:
+        transferred, resources, dom_ready_ms = driver.execute_script(PAGE_WEIGHT_JS)
+    except Exception as e:
+        logger.debug(f"Could not read page weight: {e}")
+        return {'bytes': 0, 'resources': 0, 'dom_ready': 0.0}
+    return {'bytes': int(transferred), 'resources': int(resources), 'dom_ready': dom_ready_ms / 1000}
@@ -5,21 +5,62 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import NoSuchElementException
 from bs4 import BeautifulSoup
-import pandas as pd
 import re
-from concurrent.futures import ThreadPoolExecutor
 import logging
-from typing import List, Dict, Tuple
+from typing import List, Tuple, Iterator
 import time
-from io import StringIO
+import argparse
 from datetime import datetime
+from category_scraper import CategoryScraper
+from driver_pool import DriverPool, lambda_chrome, with_profile_dirs
+from fetchers import looks_like_challenge
+from parsers import default_backend, get_extractor
+from checkpoints import open_checkpoint_store
+from product_index import ProductIndex
+from rate_limit import FETCH_STATS, RATE_LIMITER, HostRateLimiter, RetryPolicy, ThrottledError, classify
+from normaliser import normalise
+from row_pipeline import stream_categories
+from telemetry import TELEMETRY, profiled
+from pagination import COVERAGE, PageCount
+from lean_browsing import lean_options, page_weight, prepare_driver
+from readiness import TimeToContent, wait_for_absent, wait_for_count_stable
 
-class OcadoScraper:
-    def __init__(self):
-        self.chrome_options = Options()
-        
-        # Configure Chrome for Lambda layer
-        # self.chrome_options.binary_location = '/opt/python/headless-chromium/headless-chromium'
+# Reads every product tile in one round trip; missing fields come back as null
+OCADO_EXTRACT_JS = """
+var text = function (el) { return el ? el.innerText.trim() : null; };
+return Array.from(document.querySelectorAll(arguments[0])).map(function (tile) {
+    var title = tile.querySelector('h4.fop-title');
+    return [
+        title && title.getAttribute('title') !== null ? title.getAttribute('title').trim() : null,
+        text(tile.querySelector('span.fop-price')),
+        text(tile.querySelector('span.fop-catch-weight'))
+    ];
+});
+"""
+
+class OcadoScraper(CategoryScraper):
+    retailer = 'ocado'
+    base_url = "https://www.ocado.com/browse/m-s-at-ocado-294578"
+    tile_selector = "li[class*='fops-item']"
+    # The product total, present once the listing has rendered, even with no tiles
+    rendered_selector = "div.total-product-number"
+
+    def __init__(self, driver_pool: DriverPool = None, pool_size: int = 3, extract_mode: str = 'script',
+                 parser: str = None, checkpoint_store=None, resume: bool = False, product_index=None,
+                 rate_limiter: HostRateLimiter = None, retry: RetryPolicy = None, lean: bool = True):
+        # 'script' reads all tiles with one execute_script call, 'html' parses page_source
+        # in one pass and 'elements' reads each tile over WebDriver (also the fallback)
+        self.extract_mode = extract_mode
+        self.parser = parser or default_backend()
+        # Each category is one page (display=2400); completed ones are skipped with resume=True
+        self.checkpoint_store = checkpoint_store
+        self.resume = resume
+        # Each row gets a stable product_id (from its normalised name) when an index is given
+        self.product_index = product_index
+        # Page loads are paced per host by the process-wide limiter and retried with backoff
+        self.rate_limiter = rate_limiter or RATE_LIMITER
+        self.retry = retry or RetryPolicy()
+        self.run_date = datetime.now().strftime('%Y%m%d')
         self.chrome_options = Options()
         self.chrome_options.add_argument('--start-maximized')  # Ensures the window is maximized
         self.chrome_options.add_argument('--enable-javascript')  # Explicitly enable JavaScript
@@ -28,6 +69,13 @@ class OcadoScraper:
         self.chrome_options.add_argument('--disable-blink-features=AutomationControlled')
         self.chrome_options.add_argument('--headless')
         self.chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36...")
+        # Chrome skips images, fonts, media and third-party trackers; display=2400
+        # would otherwise lazy-load thousands of product images (see lean_browsing)
+        self.lean = lean
+        if lean:
+            lean_options(self.chrome_options)
+        # In the Lambda image Chrome and chromedriver are not on the PATH
+        self.service = lambda_chrome(self.chrome_options)
         
         # Set up logging
         logging.basicConfig(
@@ -35,11 +83,35 @@ class OcadoScraper:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
         self.logger = logging.getLogger(__name__)
+
+        # Seconds from navigation to rendered product tiles, per page or scroll batch
+        self.time_to_content = TimeToContent()
+
+        # Chrome drivers are shared across categories (and scrapers, if a pool is passed in)
+        self.driver_pool = driver_pool or DriverPool(self.make_driver, size=pool_size)
+
+    def category_url(self, category: str) -> str:
+        return f"{self.base_url}/{category}?display=2400"
+
+    def make_driver(self) -> webdriver.Chrome:
+        options = with_profile_dirs(self.chrome_options)
+        return prepare_driver(webdriver.Chrome(options=options, service=self.service), lean=self.lean)
+
+    def start_driver(self, driver: webdriver.Chrome):
+        """Accept cookies once so later page loads are not covered by the banner."""
+        driver.get(self.base_url)
+        self.handle_cookies(driver)
+
     def get_total_products(self, driver: webdriver.Chrome, category: str) -> int:
         """Fetch the maximum number of pages for a category."""
         try:
-            url = f"https://www.ocado.com/browse/m-s-at-ocado-294578/{category}?display=2400"
-            driver.get(url)
+            url = self.category_url(category)
+            start = time.perf_counter()
+            with TELEMETRY.stage('navigate', category=category, page=1):
+                driver.get(url)
+            with TELEMETRY.stage('wait', category=category, page=1):
+                ready = wait_for_count_stable(driver, self.tile_selector, timeout=20, rendered_selector=self.rendered_selector)
+            self.time_to_content.record('ocado_page', time.perf_counter() - start, ready)
             total_products = driver.find_element(By.CSS_SELECTOR, "div.total-product-number").text
             return int(re.findall(r'\d+',total_products)[0]) if total_products else 1
         except Exception as e:
@@ -49,15 +121,13 @@ class OcadoScraper:
     def handle_cookies(self, driver: webdriver.Chrome):
         """Handle cookie consent popup."""
         try:
-            # Wait longer for the cookie popup and add a small initial delay
-            time.sleep(2)
             cookie_button = WebDriverWait(driver, 10).until(
                 EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))
             )
             # Add a small delay before clicking to ensure the element is truly interactive
             cookie_button.click()
             # Wait for the cookie banner to disappear
-            time.sleep(2)
+            wait_for_absent(driver, "#onetrust-banner-sdk")
         except Exception as e:
             self.logger.warning(f"Cookie handling failed: {e}")
 
@@ -77,8 +147,18 @@ class OcadoScraper:
                 "arguments[0].scrollIntoView({behavior: 'auto', block: 'center'});", 
                 containers[target_idx]
             )
-            # Tiny delay to allow rendering
-            time.sleep(0.9)
+            # Wait for the lazily rendered titles in view to stop appearing
+            start = time.perf_counter()
+            ready = wait_for_count_stable(driver, f"{self.tile_selector} h4.fop-title", timeout=3, settle=0.3)
+            self.time_to_content.record('ocado_scroll', time.perf_counter() - start, ready)
+
+        if self.extract_mode == 'script':
+            try:
+                return self.extract_with_script(driver)
+            except Exception as e:
+                self.logger.warning(f"Bulk script extraction failed, falling back to per-element: {e}")
+        elif self.extract_mode == 'html':
+            return self.parse_page(driver.page_source)
 
         # Re-fetch containers to avoid staleness
         containers = driver.find_elements(By.CSS_SELECTOR, "li[class*='fops-item']")
@@ -86,73 +166,169 @@ class OcadoScraper:
         product_names = []
         product_prices = []
         product_weights = []
-        for container in containers:
+        for index, container in enumerate(containers):
             try:
                 name = container.find_element(By.CSS_SELECTOR, "h4.fop-title").get_attribute("title").strip()
                 product_names.append(name)
             except NoSuchElementException as e:
-                self.logger.error(f"Error extracting page {i} name data: {e}")
-                container.screenshot(f'error{i}.png')
-                product_names.append("N/A")
+                self.logger.error(f"Error extracting tile {index} name data: {e}")
+                product_names.append(None)
             try:
                 price = container.find_element(By.CSS_SELECTOR, "span.fop-price").text
                 product_prices.append(price)
             except NoSuchElementException as e:
-                self.logger.error(f"Error extracting page {i} price data: {e}")
-                product_prices.append("N/A")
+                self.logger.error(f"Error extracting tile {index} price data: {e}")
+                product_prices.append(None)
             try:
                 weight = container.find_element(By.CSS_SELECTOR, "span.fop-catch-weight").text
                 product_weights.append(weight)
             except NoSuchElementException as e:
-                self.logger.error(f"Error extracting page {i} weight data: {e}")
-                product_weights.append("N/A")
+                self.logger.error(f"Error extracting tile {index} weight data: {e}")
+                product_weights.append(None)
             
         return product_names,product_prices,product_weights
 
-    def scrape_category(self, category: str) -> pd.DataFrame:
-        """Scrape all products from a category."""
+    def extract_with_script(self, driver: webdriver.Chrome) -> Tuple[List[str], List[str], List[str]]:
+        """Extract every tile's name, price and weight in a single in-page script call."""
+        rows = driver.execute_script(OCADO_EXTRACT_JS, self.tile_selector)
+        if not isinstance(rows, list):
+            raise ValueError(f"Unexpected script result: {type(rows).__name__}")
+        names = [row[0] for row in rows]
+        prices = [row[1] for row in rows]
+        weights = [row[2] for row in rows]
+        return names, prices, weights
+
+    def parse_page(self, html: str) -> Tuple[List[str], List[str], List[str]]:
+        """Extract product data from the rendered page source with the configured parser backend.
+
+        Like the script and per-element paths, a tile's missing name, price or weight is None.
+        """
+        if self.parser == 'bs4':
+            soup = BeautifulSoup(html, 'html.parser')
+            names, prices, weights = [], [], []
+            for item in soup.select(self.tile_selector):
+                name = item.select_one("h4.fop-title")
+                names.append(name['title'].strip() if name and name.has_attr('title') else None)
+                price = item.select_one("span.fop-price")
+                prices.append(price.text.strip() if price else None)
+                weight = item.select_one("span.fop-catch-weight")
+                weights.append(weight.text.strip() if weight else None)
+            return names, prices, weights
+        return get_extractor('ocado', self.parser)(html)
+
+    def iter_category(self, category: str) -> Iterator[List[dict]]:
+        """Yield the rows of a category; Ocado lists a whole category on one page."""
         all_data = []
-        driver = webdriver.Chrome(options=self.chrome_options)
+        if self.checkpoint_store and self.resume:
+            done = self.checkpoint_store.load_completed(self.retailer, category, self.run_date)
+            if 1 in done:
+                self.logger.info(f"Category {category}: already done, loaded {len(done[1])} products from checkpoint")
+                yield done[1]
+                return
         
-        try:
-            # Handle cookies once at the start
-            driver.get(f"https://www.ocado.com/browse/m-s-at-ocado-294578/{category}?display=2400")
-            self.handle_cookies(driver)
-            total_products = self.get_total_products(driver, category)
-            self.logger.info(f"Category {category}: {total_products} products found")
-            names, prices, weights = self.extract_page_data(driver)
-            for name, price, weight in zip(names, prices, weights):
-                        all_data.append({
-                            'product_name': name,
-                            'price': price,
-                            'weight': weight,
-                            'category': category
-                        })
-                    
-            self.logger.info(f"Scraped {len(names)}/{total_products} of products for {category}")
-                    
-        except Exception as e:
-            self.logger.error(f"Error on {category} page: {e}")
+        url = self.category_url(category)
+        for attempt in range(self.retry.max_attempts):
+            wait = self.rate_limiter.reserve(url)
+            if wait > 0:
+                TELEMETRY.record('rate_wait', wait, category=category, page=1)
+                time.sleep(wait)
+            FETCH_STATS.add(url, 'requests')
+            try:
+                with self.driver_pool.driver(self.base_url, self.start_driver) as driver:
+                    total_products = self.get_total_products(driver, category)
+                    self.logger.info(f"Category {category}: {total_products} products found")
+                    with TELEMETRY.stage('parse', category=category, page=1) as measured:
+                        names, prices, weights = self.extract_page_data(driver)
+                        measured['rows'] = len(names)
+                    # After extraction, so images lazy-loaded while scrolling are counted
+                    weight = page_weight(driver)
+                    TELEMETRY.record('render', weight['dom_ready'], category=category, page=1,
+                                     nbytes=weight['bytes'])
+                    if not names:
+                        if looks_like_challenge(driver.page_source):
+                            raise ThrottledError(f"bot challenge served for {url}")
+                        raise ValueError(f"no products extracted from {url}")
+                with TELEMETRY.stage('build_rows', category=category, page=1) as measured:
+                    all_data = [{
+                        'product_name': name,
+                        'price': price,
+                        'weight': weight,
+                        'category': category
+                    } for name, price, weight in zip(names, prices, weights)]
+                    if self.product_index:
+                        self.product_index.tag(self.retailer, all_data)
+                    if self.checkpoint_store:
+                        self.checkpoint_store.record(self.retailer, category, 1, self.run_date, all_data)
+                    measured['rows'] = len(all_data)
+                self.logger.info(f"Scraped {len(names)}/{total_products} of products for {category}")
+                COVERAGE.record(self.retailer, category, PageCount(1, 'total', total_products, len(names)),
+                                1, len(all_data))
+                FETCH_STATS.add(url, 'ok')
+                self.rate_limiter.record_success(url)
+                break
+            except Exception as e:
+                throttled, retry_after = classify(e)
+                FETCH_STATS.add(url, 'throttled' if throttled else 'errors')
+                if throttled:
+                    self.rate_limiter.record_throttle(url, retry_after)
+                if attempt + 1 < self.retry.max_attempts:
+                    delay = max(self.retry.delay(attempt), retry_after or 0)
+                    self.logger.warning(f"Error on {category} page (attempt {attempt + 1}), retrying in {delay:.1f}s: {e}")
+                    FETCH_STATS.add(url, 'retries')
+                    time.sleep(delay)
+                    continue
+                self.logger.error(f"Error on {category} page: {e}")
+                FETCH_STATS.add(url, 'drops')
+                if self.checkpoint_store:
+                    self.checkpoint_store.record(self.retailer, category, 1, self.run_date, None, e)
                     
-        finally:
-            driver.quit()   
-        return pd.DataFrame(all_data)
-
-    def scrape_all_categories(self, categories: List[str], max_workers: int = 5) -> pd.DataFrame:
-        """Scrape all categories using ThreadPoolExecutor."""
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            results = list(executor.map(self.scrape_category, categories))
-        return pd.concat(results, ignore_index=True)
+        if all_data:
+            yield all_data
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape M&S products on Ocado")
+    parser.add_argument('--resume', action='store_true', help="skip categories already completed today")
+    parser.add_argument('--checkpoint', default='checkpoints.sqlite',
+                        help="SQLite path or s3://bucket/prefix for page checkpoints")
+    parser.add_argument('--stream', metavar='PATH',
+                        help="stream rows into this Parquet file as pages arrive instead of building a DataFrame")
+    parser.add_argument('--products', metavar='PATH',
+                        help="SQLite product index; adds a stable product_id to every row")
+    parser.add_argument('--report', metavar='PATH', help="write a JSON run report with per-stage timings")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="profile the run into a cProfile .prof file (or pyinstrument .html)")
+    parser.add_argument('--full-browser', action='store_true',
+                        help="load images, fonts, media and third-party scripts like a normal browser")
+    args = parser.parse_args()
     
     categories = ['frozen-303714','best-of-fresh-294566','food-cupboard-drinks-bakery-294572']   # Add your categories here
-    scraper = OcadoScraper()
+    product_index = ProductIndex(args.products) if args.products else None
+    scraper = OcadoScraper(checkpoint_store=open_checkpoint_store(args.checkpoint), resume=args.resume,
+                           product_index=product_index, lean=not args.full_browser)
     
     # Run the scraper
-    df = scraper.scrape_all_categories(categories)
+    if args.stream:
+        try:
+            with profiled(args.profile):
+                rows = stream_categories(scraper, categories, args.stream)
+        finally:
+            scraper.driver_pool.close()
+            if product_index:
+                product_index.close()
+        TELEMETRY.emit('ocado', path=args.report, emf=False)
+        print(f"Streamed {rows} products across {len(categories)} categories to {args.stream}")
+        return None
+    try:
+        with profiled(args.profile):
+            df = scraper.scrape_all_categories(categories)
+    finally:
+        scraper.driver_pool.close()
+        if product_index:
+            product_index.close()
     
+    TELEMETRY.emit('ocado', path=args.report, emf=False)
     # Save results
+    df = normalise(df, 'ocado')
     df.to_csv('ocado_products.csv', index=False)
     print(f"Scraped {len(df)} products across {len(categories)} categories")
     return df
@@ -0,0 +1,179 @@
+"""Turn scraped price/weight/name text into numeric columns for every retailer.
+
+``normalise`` parses prices (pounds or pence, out of stock), quantities,
+multipacks and units with one ``Series.str.extract`` per column, run over
+the distinct values and broadcast back, and
+``BrandStripper`` removes brand names with a word-level trie instead of one
+huge regex alternation.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# '£1,299.00' has a thousands separator; it is dropped before the number is parsed
+PRICE_PATTERN = re.compile(
+    r'^\s*(?:£\s*(?P<pounds>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)|(?P<pence>\d+(?:\.\d+)?)\s*p\b)')
+
+# "4 x 500g", "6x330ml", "1.5kg", "70cl", "12 pack"
+QUANTITY_PATTERN = re.compile(
+    r'(?:(?P<count>\d+)\s*[x×]\s*)?'
+    r'(?P<amount>\d+(?:\.\d+)?)\s*'
+    r'(?P<unit>kg|g|ml|cl|ltr|litres?|l|pack|pk|each|ea)\b',
+    re.IGNORECASE,
+)
+
+# unit -> (base unit, multiplier to base unit)
+UNITS: Dict[str, Tuple[str, float]] = {
+    'g': ('g', 1), 'kg': ('g', 1000),
+    'ml': ('ml', 1), 'cl': ('ml', 10), 'l': ('ml', 1000), 'ltr': ('ml', 1000),
+    'litre': ('ml', 1000), 'litres': ('ml', 1000),
+    'pack': ('each', 1), 'pk': ('each', 1), 'each': ('each', 1), 'ea': ('each', 1),
+}
+BASE_UNIT = {unit: base for unit, (base, _) in UNITS.items()}
+TO_BASE = {unit: multiplier for unit, (_, multiplier) in UNITS.items()}
+# price_per_unit is quoted per kg, per litre or per item
+UNIT_BASIS = {'g': 'kg', 'ml': 'l', 'each': 'each'}
+BASIS_DIVISOR = {'g': 1000, 'ml': 1000, 'each': 1}
+
+
+def extract(values: pd.Series, pattern: re.Pattern) -> pd.DataFrame:
+    """Series.str.extract over the distinct values only, broadcast back to every row.
+
+    Scraped prices and weights repeat heavily, so factorising first and
+    taking the extracted groups back by code is much cheaper than a regex per row.
+    """
+    codes, uniques = pd.factorize(values)
+    parts = pd.Series(uniques, dtype=object).str.extract(pattern)
+    # code -1 (missing) picks the extra all-None row
+    table = np.vstack([parts.to_numpy(dtype=object), np.full((1, pattern.groups), None, dtype=object)])
+    return pd.DataFrame(table[codes], columns=parts.columns, index=values.index)
+
+
+def parse_price(prices: pd.Series) -> pd.Series:
+    """'£1.29' -> 1.29, '£1,299.00' -> 1299.0, '75p' -> 0.75; no price (e.g. 'Out of Stock') -> NaN."""
+    parts = extract(prices, PRICE_PATTERN)
+    pounds = pd.to_numeric(parts['pounds'].str.replace(',', '', regex=False), errors='coerce')
+    pence = pd.to_numeric(parts['pence'], errors='coerce')
+    return pounds.fillna(pence / 100).astype('float64')
+
+
+def parse_quantity(text: pd.Series) -> pd.DataFrame:
+    """Extract pack_count, quantity, unit (base: g/ml/each) and total_quantity from text."""
+    parts = extract(text, QUANTITY_PATTERN)
+    unit = parts['unit'].str.lower()
+    base = unit.map(BASE_UNIT)
+    multiplier = unit.map(TO_BASE).astype('float64')
+    pack_count = pd.to_numeric(parts['count'], errors='coerce').fillna(1)
+    # "12 pack" is a count of items, not an amount of each item
+    is_pack = base == 'each'
+    amount = pd.to_numeric(parts['amount'], errors='coerce')
+    pack_count = pack_count.where(~is_pack | amount.isna(), pack_count * amount)
+    quantity = (amount * multiplier).where(~is_pack, 1.0)
+    return pd.DataFrame({
+        'pack_count': pack_count.where(unit.notna()).astype('float64'),
+        'quantity': quantity.astype('float64'),
+        'unit': base.astype('string'),
+        'total_quantity': (quantity * pack_count).astype('float64'),
+    }, index=text.index)
+
+
+class BrandStripper:
+    """Remove known brand names from product names with a word-level trie.
+
+    Each name is scanned once left to right; at every word the trie is walked
+    for the longest brand starting there, so cost grows with name length rather
+    than with the number of brands (unlike a regex alternation of all brands).
+    """
+
+    _END = object()
+
+    def __init__(self, brands: Iterable[str]):
+        self.root: dict = {}
+        for brand in brands:
+            words = brand.lower().split()
+            if not words:
+                continue
+            node = self.root
+            for word in words:
+                node = node.setdefault(word, {})
+            node[self._END] = brand
+
+    def match(self, words: List[str], start: int) -> Tuple[int, Optional[str]]:
+        """Length in words and name of the longest brand starting at words[start] (lowercased words)."""
+        node, best_len, best = self.root, 0, None
+        for i in range(start, len(words)):
+            node = node.get(words[i])
+            if node is None:
+                break
+            if self._END in node:
+                best_len, best = i - start + 1, node[self._END]
+        return best_len, best
+
+    def strip(self, name: str) -> Tuple[str, Optional[str]]:
+        """Return (name without brands or pack size, first brand found)."""
+        if not isinstance(name, str):
+            return name, None
+        words = name.split()
+        lowered = name.lower().split()
+        if len(lowered) != len(words):
+            lowered = [word.lower() for word in words]
+        root = self.root
+        kept, brand, position = [], None, 0
+        # Only words that start some brand need a trie walk
+        for i in [i for i, word in enumerate(lowered) if word in root]:
+            if i < position:
+                continue
+            length, found = self.match(lowered, i)
+            if length:
+                kept.extend(words[position:i])
+                position = i + length
+                brand = brand or found
+        kept.extend(words[position:])
+        return ' '.join(QUANTITY_PATTERN.sub('', ' '.join(kept)).split()), brand
+
+    def strip_series(self, names: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """Strip every name, doing the work once per distinct name."""
+        codes, uniques = pd.factorize(names)
+        stripped = [self.strip(name) for name in uniques]
+        cleaned = np.array([s[0] for s in stripped] + [None], dtype=object)
+        brands = np.array([s[1] for s in stripped] + [None], dtype=object)
+        return (pd.Series(cleaned[codes], index=names.index, dtype='string'),
+                pd.Series(brands[codes], index=names.index, dtype='string'))
+
+
+def normalise(df: pd.DataFrame, retailer: Optional[str] = None, brands: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Add numeric price, stock, quantity, unit and price_per_unit columns to scraped rows.
+
+    Quantities come from the weight column, falling back to the product name
+    (Tesco puts the pack size in the name). With ``brands`` given, a
+    ``brand`` column is filled and brands are stripped into ``clean_name``.
+    """
+    out = df.copy()
+    if retailer is not None:
+        out['retailer'] = retailer
+    price_text = out['price'] if 'price' in out else pd.Series(pd.NA, index=out.index, dtype='string')
+    out['price_gbp'] = parse_price(price_text)
+    # 'Out of Stock', 'N/A' and missing prices all fail to parse
+    out['in_stock'] = out['price_gbp'].notna()
+
+    # An empty scrape has no columns at all; it still gets every output column
+    names = out['product_name'] if 'product_name' in out else pd.Series(pd.NA, index=out.index, dtype='string')
+    if 'weight' in out:
+        source = out['weight'].where(out['weight'].notna(), names)
+    else:
+        source = names
+    quantities = parse_quantity(source)
+    missing = quantities['unit'].isna() & names.notna()
+    if 'weight' in out and missing.any():
+        quantities.loc[missing] = parse_quantity(names[missing])
+    out = out.join(quantities)
+
+    out['unit_basis'] = out['unit'].map(UNIT_BASIS).astype('string')
+    divisor = out['unit'].map(BASIS_DIVISOR).astype('float64')
+    out['price_per_unit'] = out['price_gbp'] / (out['total_quantity'] / divisor)
+
+    if brands is not None:
+        out['clean_name'], out['brand'] = BrandStripper(brands).strip_series(names)
+    return out
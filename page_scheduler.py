@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+from fetchers import looks_like_challenge
+from telemetry import TELEMETRY
+from rate_limit import FETCH_STATS, RATE_LIMITER, FetchStats, HostRateLimiter, RetryPolicy, ThrottledError, classify
+
+logger = logging.getLogger(__name__)
+
+
+async def _fetch_all(urls: List[str], fetchers: list, per_host_limit: int, rate_limiter: HostRateLimiter,
+                     retry: RetryPolicy, stats: FetchStats) -> List[Tuple[Optional[str], Optional[Exception]]]:
+    loop = asyncio.get_running_loop()
+    host_limits = defaultdict(lambda: asyncio.Semaphore(per_host_limit))
+    results: List[Tuple[Optional[str], Optional[Exception]]] = [(None, None)] * len(urls)
+    work = asyncio.Queue()
+    for index, url in enumerate(urls):
+        work.put_nowait((index, url, 0))
+    remaining = len(urls)
+
+    def finish(index: int, result: Tuple[Optional[str], Optional[Exception]]):
+        nonlocal remaining
+        results[index] = result
+        remaining -= 1
+        if not remaining:
+            for _ in fetchers:
+                work.put_nowait(None)
+
+    async def worker(fetcher):
+        while True:
+            item = await work.get()
+            if item is None:
+                return
+            index, url, attempt = item
+            async with host_limits[urlparse(url).netloc]:
+                wait = rate_limiter.reserve(url)
+                if wait > 0:
+                    TELEMETRY.record('rate_wait', wait, url)
+                    await asyncio.sleep(wait)
+                stats.add(url, 'requests')
+                try:
+                    with TELEMETRY.stage('fetch', url) as measured:
+                        html = await loop.run_in_executor(executor, fetcher.fetch, url)
+                        measured['bytes'] = len(html)
+                    if looks_like_challenge(html):
+                        raise ThrottledError(f"bot challenge served for {url}")
+                except Exception as e:
+                    throttled, retry_after = classify(e)
+                    stats.add(url, 'throttled' if throttled else 'errors')
+                    if throttled:
+                        rate_limiter.record_throttle(url, retry_after)
+                    if attempt + 1 < retry.max_attempts:
+                        # Back off, then go to the back of the queue behind pages not yet tried
+                        delay = max(retry.delay(attempt), retry_after or 0)
+                        logger.warning(f"Error fetching {url} (attempt {attempt + 1}/{retry.max_attempts}), "
+                                       f"retrying in {delay:.1f}s: {e}")
+                        stats.add(url, 'retries')
+                        loop.call_later(delay, work.put_nowait, (index, url, attempt + 1))
+                    else:
+                        logger.error(f"Giving up on {url} after {retry.max_attempts} attempts: {e}")
+                        stats.add(url, 'drops')
+                        finish(index, (None, e))
+                else:
+                    stats.add(url, 'ok')
+                    rate_limiter.record_success(url)
+                    finish(index, (html, None))
+
+    if not urls:
+        return results
+    with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+        await asyncio.gather(*(worker(fetcher) for fetcher in fetchers))
+    return results
+
+
+def fetch_pages(urls: List[str], fetchers: list, per_host_limit: int = 4, rate_limiter: HostRateLimiter = None,
+                retry: RetryPolicy = None, stats: FetchStats = None) -> List[Tuple[Optional[str], Optional[Exception]]]:
+    """Fetch urls concurrently across a bounded pool of fetchers.
+
+    Each fetcher (anything with a blocking ``fetch(url) -> str``) serves one
+    request at a time, so the pool size bounds the number of open drivers or
+    connections, and at most ``per_host_limit`` requests hit a host at once.
+    Requests are paced by the per-host ``rate_limiter``; failed pages are retried
+    with jittered backoff at the back of the queue, up to ``retry.max_attempts``.
+    Returns one ``(html, error)`` pair per url, in the same order as urls, with
+    the last error for pages that failed every attempt.
+    """
+    if not fetchers:
+        raise ValueError("fetch_pages needs at least one fetcher")
+    return asyncio.run(_fetch_all(urls, fetchers, per_host_limit, rate_limiter or RATE_LIMITER,
+                                  retry or RetryPolicy(), stats or FETCH_STATS))
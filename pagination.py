@@ -0,0 +1,175 @@
+"""Page-count discovery for paginated category listings.
+
+Page 1 has to be fetched anyway, so the count is read from that document and
+the document is handed back to be parsed rather than fetched again. In order:
+
+    pager   the site's own page links (each scraper knows its markup)
+    total   "1,234 products" / "1,234 results" divided by the rows on page 1
+    next    a rel=next / "Next page" link: pages are walked until one has none
+    probe   neither: exponential then binary search for the last page with rows
+
+Pagers are the most brittle markup on these sites; a missing one used to be
+read as "1 page" and the rest of the category was silently skipped.
+``COVERAGE`` records, per category, the rows collected against the total the
+site advertised, so a shortfall shows up in the run summary.
+"""
+import logging
+import math
+import re
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('auto', 'next', 'probe')
+
+TOTAL_PATTERN = re.compile(r'(\d[\d,]*)\s+(?:products|results|items)\b', re.IGNORECASE)
+NEXT_PATTERN = re.compile(r'<a\b[^>]*(?:rel="next"|aria-label="(?:go to )?next[^"]*")', re.IGNORECASE)
+
+# Upper bound for probing, far above any real category
+MAX_PROBE_PAGES = 1000
+
+
+def total_products(html: str) -> Optional[int]:
+    """Product total advertised on a listing page, e.g. '1,234 products'; None if there is none."""
+    match = TOTAL_PATTERN.search(html or '')
+    return int(match.group(1).replace(',', '')) if match else None
+
+
+def has_next_link(html: str) -> bool:
+    """Whether the page links to a next page."""
+    return bool(NEXT_PATTERN.search(html or ''))
+
+
+class PageCount:
+    """Pages in a category, how they were found, and the product total if the site gives one."""
+
+    def __init__(self, pages: Optional[int], source: str, total: Optional[int] = None, per_page: int = 0):
+        self.pages = pages
+        self.source = source
+        self.total = total
+        self.per_page = per_page
+
+    def __repr__(self):
+        pages = self.pages if self.pages is not None else '?'
+        total = f", {self.total} products" if self.total is not None else ''
+        return f"{pages} pages (from {self.source}{total})"
+
+
+class Paginator:
+    """Discover the page count of one category from its page 1.
+
+    ``fetch_page(page)`` returns ``(html, error)`` like ``page_scheduler.fetch_pages``,
+    ``count_rows(html)`` the number of products on a page and ``read_pager(html)``
+    the page count from the site's pager, or None when the pager is not there.
+    Every page fetched while discovering is kept in ``fetched`` for the caller
+    to parse, so page 1 (and any probed page) is only downloaded once.
+    """
+
+    def __init__(self, fetch_page: Callable[[int], Tuple[Optional[str], Optional[Exception]]],
+                 count_rows: Callable[[str], int], read_pager: Callable[[str], Optional[int]],
+                 strategy: str = 'auto'):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Supported pagination strategies are {', '.join(STRATEGIES)}")
+        self.fetch_page = fetch_page
+        self.count_rows = count_rows
+        self.read_pager = read_pager
+        self.strategy = strategy
+        self.fetched: Dict[int, Tuple[Optional[str], Optional[Exception]]] = {}
+
+    def _rows_on(self, page: int) -> int:
+        if page not in self.fetched:
+            self.fetched[page] = self.fetch_page(page)
+        html, error = self.fetched[page]
+        if error is not None:
+            logger.warning(f"Page {page} could not be fetched while counting pages: {error}")
+            return 0
+        return self.count_rows(html)
+
+    def discover(self) -> PageCount:
+        """Count pages from page 1; ``pages`` is None when they have to be walked through next links."""
+        per_page = self._rows_on(1)
+        html, error = self.fetched[1]
+        if error is not None:
+            # Left in fetched so the caller records page 1 as failed like any other page
+            return PageCount(1, 'error')
+        total = total_products(html)
+        if self.strategy == 'auto':
+            pages = self.read_pager(html)
+            if pages:
+                return PageCount(pages, 'pager', total, per_page)
+            if total is not None and per_page:
+                return PageCount(max(1, math.ceil(total / per_page)), 'total', total, per_page)
+        if self.strategy == 'next' or (self.strategy == 'auto' and has_next_link(html)):
+            return PageCount(None, 'next', total, per_page)
+        return PageCount(self.probe(), 'probe', total, per_page)
+
+    def probe(self, known: int = 1) -> int:
+        """Last page with products: double past ``known`` until a page is empty, then binary search."""
+        low, high = known, known * 2
+        while high <= MAX_PROBE_PAGES and self._rows_on(high):
+            low, high = high, high * 2
+        high = min(high, MAX_PROBE_PAGES + 1)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self._rows_on(middle):
+                low = middle
+            else:
+                high = middle
+        # Probed pages past the end carry nothing worth parsing
+        self.fetched = {page: result for page, result in self.fetched.items() if page <= low}
+        return low
+
+    def count(self) -> int:
+        """Page count, probing when the listing only has next links.
+
+        Raises page 1's fetch error when it could not be fetched: there is no
+        count to read, and guessing one page would drop the rest of the category.
+        """
+        found = self.discover()
+        if found.source == 'error':
+            raise self.fetched[1][1]
+        return found.pages if found.pages is not None else self.probe()
+
+    @staticmethod
+    def is_last(html: Optional[str], rows: int) -> bool:
+        """When walking next links: the page is the last one."""
+        return not rows or not has_next_link(html)
+
+
+class Coverage:
+    """Thread-safe rows collected against rows expected, per retailer and category."""
+
+    def __init__(self):
+        self.categories: Dict[Tuple[str, str], dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, retailer: str, category: str, found: PageCount, pages: int, rows: int):
+        expected = found.total
+        with self._lock:
+            self.categories[(retailer, category)] = {
+                'source': found.source,
+                'pages': pages,
+                'rows': rows,
+                'expected_rows': expected,
+                'coverage': round(rows / expected, 3) if expected else None,
+            }
+        if expected and rows < expected:
+            logger.warning(f"{retailer} {category}: collected {rows} of {expected} advertised products "
+                           f"over {pages} pages (page count from {found.source})")
+
+    def reset(self):
+        with self._lock:
+            self.categories = {}
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {f'{retailer}/{category}': dict(counts)
+                    for (retailer, category), counts in self.categories.items()}
+
+    def log_summary(self, log: Optional[logging.Logger] = None):
+        for category, counts in self.summary().items():
+            (log or logger).info(f"Coverage [{category}]: {counts}")
+
+
+COVERAGE = Coverage()
@@ -0,0 +1,160 @@
+"""Fast HTML extraction paths for the listing pages.
+
+The scrapers' own ``extract_page_data(soup)`` methods are the BeautifulSoup
+reference path. This module provides equivalent extractors on top of lxml
+(precompiled XPath) and selectolax (lexbor CSS engine). Both are pinned in
+requirements.txt but stay optional imports; ``default_backend`` picks the best
+one installed.
+"""
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('selectolax', 'lxml', 'bs4')
+# Bump when any extractor's output changes, so parse results cached by content hash are not reused
+PARSER_VERSION = 3
+
+
+def available_backends() -> List[str]:
+    installed = {'selectolax': LexborHTMLParser is not None, 'lxml': lxml is not None, 'bs4': True}
+    return [backend for backend in BACKENDS if installed[backend]]
+
+
+def default_backend() -> str:
+    """The fastest installed backend."""
+    return available_backends()[0]
+
+
+def _has_class(*classes: str) -> str:
+    """XPath predicate matching elements that carry every class in classes."""
+    return ' and '.join(f"contains(concat(' ', normalize-space(@class), ' '), ' {c} ')" for c in classes)
+
+
+# CSS selectors shared by the selectolax path; the lxml path compiles the same
+# selectors to XPath once at import time.
+ALDI_NAME = 'a.p.text-default-font'
+ALDI_PRICE = 'span.h4'
+ALDI_WEIGHT = 'div.text-gray-small'
+TESCO_TILE = 'div.styled__StyledVerticalTile-sc-1r1v9f3-1.iAEUS'
+TESCO_NAME = 'span.styled__Text-sc-1i711qa-1.bsLJsh.ddsweb-link__text'
+TESCO_PRICE = 'p.text__StyledText-sc-1jpzi8m-0.gyHOWz.ddsweb-text.styled__PriceText-sc-v0qv7n-1.cXlRF'
+OCADO_TILE = "li[class*='fops-item']"
+OCADO_NAME = 'h4.fop-title'
+OCADO_PRICE = 'span.fop-price'
+OCADO_WEIGHT = 'span.fop-catch-weight'
+
+if lxml is not None:
+    _ALDI_LINKS = etree.XPath(f"//a[{_has_class('p', 'text-default-font')}][@title]")
+    _ALDI_PRICES = etree.XPath(f"//span[{_has_class('h4')}]")
+    _ALDI_WEIGHTS = etree.XPath(f"//div[{_has_class('text-gray-small')}]")
+    _TESCO_TILES = etree.XPath(f"//div[{_has_class('styled__StyledVerticalTile-sc-1r1v9f3-1', 'iAEUS')}]")
+    _TESCO_NAME = etree.XPath(
+        f".//span[{_has_class('styled__Text-sc-1i711qa-1', 'bsLJsh', 'ddsweb-link__text')}]")
+    _TESCO_PRICE = etree.XPath(
+        f".//p[{_has_class('text__StyledText-sc-1jpzi8m-0', 'gyHOWz', 'ddsweb-text', 'styled__PriceText-sc-v0qv7n-1', 'cXlRF')}]")
+    _OCADO_TILES = etree.XPath("//li[contains(@class, 'fops-item')]")
+    _OCADO_NAME = etree.XPath(f".//h4[{_has_class('fop-title')}]/@title")
+    _OCADO_PRICE = etree.XPath(f".//span[{_has_class('fop-price')}]")
+    _OCADO_WEIGHT = etree.XPath(f".//span[{_has_class('fop-catch-weight')}]")
+
+
+def _lxml_root(html: str):
+    try:
+        return lxml.html.fromstring(html)
+    except etree.ParserError:
+        # Empty documents have no root element
+        return lxml.html.fromstring('<html></html>')
+
+
+def _first_text(elements, default: Optional[str]) -> Optional[str]:
+    return elements[0].text_content().strip() if elements else default
+
+
+def aldi_lxml(html: str) -> Tuple[List[str], List[str], List[str], List[str]]:
+    root = _lxml_root(html)
+    links = _ALDI_LINKS(root)
+    names = [link.get('title') for link in links]
+    urls = [link.get('href') for link in links]
+    prices = [x.text_content() for x in _ALDI_PRICES(root)]
+    weights = [x.text_content() for x in _ALDI_WEIGHTS(root)]
+    return names, prices, weights, urls
+
+
+def aldi_selectolax(html: str) -> Tuple[List[str], List[str], List[str], List[str]]:
+    tree = LexborHTMLParser(html)
+    links = tree.css(ALDI_NAME)
+    names = [x.attributes.get('title') for x in links]
+    urls = [x.attributes.get('href') for x in links]
+    prices = [x.text() for x in tree.css(ALDI_PRICE)]
+    weights = [x.text() for x in tree.css(ALDI_WEIGHT)]
+    return names, prices, weights, urls
+
+
+def tesco_lxml(html: str) -> Tuple[List[str], List[str]]:
+    names, prices = [], []
+    for item in _TESCO_TILES(_lxml_root(html)):
+        names.append(_first_text(_TESCO_NAME(item), "N/A"))
+        prices.append(_first_text(_TESCO_PRICE(item), "Out of Stock"))
+    return names, prices
+
+
+def tesco_selectolax(html: str) -> Tuple[List[str], List[str]]:
+    names, prices = [], []
+    for item in LexborHTMLParser(html).css(TESCO_TILE):
+        name = item.css_first(TESCO_NAME)
+        names.append(name.text().strip() if name is not None else "N/A")
+        price = item.css_first(TESCO_PRICE)
+        prices.append(price.text().strip() if price is not None else "Out of Stock")
+    return names, prices
+
+
+def ocado_lxml(html: str) -> Tuple[List[str], List[str], List[str]]:
+    names, prices, weights = [], [], []
+    for item in _OCADO_TILES(_lxml_root(html)):
+        title = _OCADO_NAME(item)
+        names.append(str(title[0]).strip() if title else None)
+        prices.append(_first_text(_OCADO_PRICE(item), None))
+        weights.append(_first_text(_OCADO_WEIGHT(item), None))
+    return names, prices, weights
+
+
+def ocado_selectolax(html: str) -> Tuple[List[str], List[str], List[str]]:
+    names, prices, weights = [], [], []
+    for item in LexborHTMLParser(html).css(OCADO_TILE):
+        name = item.css_first(OCADO_NAME)
+        title = name.attributes.get('title') if name is not None else None
+        names.append(title.strip() if title is not None else None)
+        price = item.css_first(OCADO_PRICE)
+        prices.append(price.text().strip() if price is not None else None)
+        weight = item.css_first(OCADO_WEIGHT)
+        weights.append(weight.text().strip() if weight is not None else None)
+    return names, prices, weights
+
+
+EXTRACTORS: Dict[Tuple[str, str], Callable] = {
+    ('aldi', 'lxml'): aldi_lxml,
+    ('aldi', 'selectolax'): aldi_selectolax,
+    ('tesco', 'lxml'): tesco_lxml,
+    ('tesco', 'selectolax'): tesco_selectolax,
+    ('ocado', 'lxml'): ocado_lxml,
+    ('ocado', 'selectolax'): ocado_selectolax,
+}
+
+
+def get_extractor(retailer: str, backend: str) -> Callable:
+    """Return the fast extractor for retailer, raising if the backend is not installed."""
+    if backend not in available_backends() or (retailer, backend) not in EXTRACTORS:
+        raise ValueError(f"Parser backend '{backend}' is not available for {retailer}")
+    return EXTRACTORS[(retailer, backend)]
@@ -0,0 +1,257 @@
+"""Change-data-capture for daily snapshots: store only prices that moved.
+
+The previous snapshot is kept as a compact index of sorted 64-bit product key
+hashes and integer prices in pence (12 bytes per product), so diffing millions
+of rows is a pair of vectorised ``searchsorted`` calls rather than a DataFrame
+merge. Each run writes a delta of inserts, deletes and price changes; the
+``compact`` job periodically folds deltas into a new full snapshot.
+
+Each date keeps the index built from its own scrape, and a date is diffed
+against the newest index strictly before it, so rerunning a day rewrites the
+same delta instead of diffing the scrape against itself.
+
+Layout under the target directory (local path or s3:// URI)::
+
+    index/retailer=<r>/date=<YYYY-MM-DD>/index.npz
+    deltas/retailer=<r>/date=<YYYY-MM-DD>/delta.parquet
+    snapshots/retailer=<r>/date=<YYYY-MM-DD>/snapshot.parquet
+
+Usage: python price_diff.py compact <target> <retailer>
+"""
+import argparse
+import io
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from lake_writer import resolve_target
+from normaliser import parse_price
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ['product_name', 'weight']
+NO_PRICE = -1
+
+
+def product_keys(df: pd.DataFrame) -> np.ndarray:
+    """64-bit hash of the columns that identify a product within a retailer.
+
+    Rows tagged by a ProductIndex are keyed by their stable product_id instead.
+    """
+    columns = [c for c in KEY_COLUMNS if c in df]
+    # Names are nearly all distinct, so categorising before hashing only adds a pass
+    keys = pd.util.hash_pandas_object(df[columns].astype('string'), index=False,
+                                      categorize=False).to_numpy(np.uint64)
+    if 'product_id' in df:
+        ids = df['product_id'].astype('Int64')
+        keys = np.where(ids.notna(), ids.fillna(0).to_numpy(np.int64).view(np.uint64), keys)
+    return keys
+
+
+def price_pence(df: pd.DataFrame) -> np.ndarray:
+    """Prices as integer pence; rows without a price (e.g. out of stock) get NO_PRICE."""
+    # parse_price already parses each distinct price string once
+    prices = df['price_gbp'] if 'price_gbp' in df else parse_price(df['price'])
+    return (prices * 100).round().fillna(NO_PRICE).to_numpy(np.int64)
+
+
+class PriceIndex:
+    """Sorted (product key hash -> price in pence) arrays for one retailer snapshot."""
+
+    def __init__(self, keys: np.ndarray, prices: np.ndarray):
+        self.keys = keys
+        self.prices = prices
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> Tuple['PriceIndex', np.ndarray]:
+        """Build the index and return it with the row position of each kept (first-seen) product."""
+        keys = product_keys(df)
+        prices = price_pence(df)
+        # A product listed in several categories is kept once
+        keys, rows = np.unique(keys, return_index=True)
+        return cls(keys, prices[rows]), rows
+
+    def lookup(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (found mask, positions) of keys in this index."""
+        positions = np.searchsorted(self.keys, keys)
+        clipped = np.minimum(positions, max(len(self.keys) - 1, 0))
+        found = (positions < len(self.keys)) & (self.keys[clipped] == keys) if len(self.keys) else np.zeros(len(keys), bool)
+        return found, clipped
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, keys=self.keys, prices=self.prices)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'PriceIndex':
+        arrays = np.load(io.BytesIO(data))
+        return cls(arrays['keys'], arrays['prices'])
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def diff(previous: PriceIndex, df: pd.DataFrame) -> Tuple[pd.DataFrame, PriceIndex]:
+    """Compare today's rows with the previous index.
+
+    Returns (delta, new index). delta holds today's row for every inserted or
+    repriced product, plus a key-only row for every deleted product, with a
+    ``change`` column of 'insert', 'update' or 'delete'.
+    """
+    current, rows = PriceIndex.from_frame(df)
+    found, positions = previous.lookup(current.keys)
+    old_prices = np.where(found, previous.prices[positions], NO_PRICE)
+    changed = ~found | (old_prices != current.prices)
+
+    upserts = df.iloc[rows[changed]].reset_index(drop=True)
+    upserts['product_key'] = current.keys[changed]
+    upserts['price_pence'] = current.prices[changed]
+    old = pd.array(old_prices[changed], dtype='Int64')
+    old[~found[changed]] = pd.NA
+    upserts['old_price_pence'] = old
+    upserts['change'] = np.where(found[changed], 'update', 'insert')
+
+    still_listed, _ = current.lookup(previous.keys)
+    deleted = ~still_listed
+    deletes = pd.DataFrame({
+        'product_key': previous.keys[deleted],
+        'old_price_pence': pd.array(previous.prices[deleted], dtype='Int64'),
+        'change': 'delete',
+    })
+    delta = pd.concat([upserts, deletes], ignore_index=True) if len(deletes) else upserts
+    return delta, current
+
+
+class ChangeCapture:
+    """Write per-day deltas for one retailer and periodically compact them into full snapshots."""
+
+    def __init__(self, target: str, retailer: str, filesystem: Optional[pafs.FileSystem] = None,
+                 compact_every: int = 7, keep_indexes: int = 7):
+        self.filesystem, self.base = resolve_target(target, filesystem)
+        self.base = self.base.rstrip('/')
+        self.retailer = retailer
+        self.compact_every = compact_every
+        # Days that can be captured again; each also needs the index of the day before it
+        self.keep_indexes = keep_indexes
+
+    def _path(self, kind: str, snapshot_date: Optional[str] = None, name: str = '') -> str:
+        path = f"{self.base}/{kind}/retailer={self.retailer}"
+        if snapshot_date:
+            path += f"/date={snapshot_date}"
+        return f"{path}/{name}" if name else path
+
+    def _write_table(self, df: pd.DataFrame, path: str):
+        self.filesystem.create_dir(path.rsplit('/', 1)[0], recursive=True)
+        with self.filesystem.open_output_stream(path) as stream:
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), stream, compression='zstd')
+
+    def _read_table(self, path: str) -> pd.DataFrame:
+        with self.filesystem.open_input_file(path) as stream:
+            return pq.read_table(stream).to_pandas()
+
+    def dates(self, kind: str) -> List[str]:
+        """Dates that have a delta or snapshot, oldest first."""
+        selector = pafs.FileSelector(self._path(kind), allow_not_found=True)
+        infos = self.filesystem.get_file_info(selector)
+        return sorted(info.base_name.split('=', 1)[1] for info in infos
+                      if info.type == pafs.FileType.Directory and info.base_name.startswith('date='))
+
+    def load_index(self, before: str) -> Optional[PriceIndex]:
+        """The newest index from a date strictly before ``before``, or None on the first run."""
+        earlier = [d for d in self.dates('index') if d < before]
+        if earlier:
+            path = self._path('index', earlier[-1], 'index.npz')
+        else:
+            # Written before indexes were kept per date
+            path = self._path('index', name='latest.npz')
+            if self.filesystem.get_file_info(path).type == pafs.FileType.NotFound:
+                return None
+        with self.filesystem.open_input_stream(path) as stream:
+            return PriceIndex.from_bytes(stream.read())
+
+    def save_index(self, index: PriceIndex, snapshot_date: str):
+        path = self._path('index', snapshot_date, 'index.npz')
+        self.filesystem.create_dir(path.rsplit('/', 1)[0], recursive=True)
+        with self.filesystem.open_output_stream(path) as stream:
+            stream.write(index.to_bytes())
+        # Only the newest keep_indexes days can be rerun; older indexes are not needed
+        for old_date in self.dates('index')[:-(self.keep_indexes + 1)]:
+            self.filesystem.delete_dir(self._path('index', old_date))
+
+    def capture(self, df: pd.DataFrame, snapshot_date: Optional[str] = None) -> pd.DataFrame:
+        """Diff a day's scrape against the day before it, write the delta and return it.
+
+        The first run (no earlier index) writes a full snapshot instead, and a
+        compaction runs once ``compact_every`` deltas have built up since the last
+        one. Capturing a date again replaces that date's delta and index; snapshots
+        compacted from its old delta are dropped and compacted again.
+        """
+        snapshot_date = snapshot_date or datetime.now().strftime('%Y-%m-%d')
+        later = [d for d in self.dates('index') if d > snapshot_date]
+        if later:
+            logger.warning(f"{self.retailer}: recapturing {snapshot_date}, deltas of {', '.join(later)} "
+                           f"were diffed against its previous capture")
+        previous = self.load_index(before=snapshot_date)
+        if previous is None:
+            index, rows = PriceIndex.from_frame(df)
+            snapshot = df.iloc[rows].reset_index(drop=True)
+            snapshot['product_key'] = index.keys
+            snapshot['price_pence'] = index.prices
+            self._write_table(snapshot, self._path('snapshots', snapshot_date, 'snapshot.parquet'))
+            self.save_index(index, snapshot_date)
+            logger.info(f"{self.retailer}: no previous snapshot, wrote full snapshot of {len(index)} products")
+            return snapshot.assign(change='insert')
+
+        delta, index = diff(previous, df)
+        self._write_table(delta, self._path('deltas', snapshot_date, 'delta.parquet'))
+        self.save_index(index, snapshot_date)
+        counts = delta['change'].value_counts().to_dict()
+        logger.info(f"{self.retailer} {snapshot_date}: {len(delta)}/{len(index)} products changed {counts}")
+
+        # Snapshots on or after this date were folded from the delta just replaced
+        stale = [d for d in self.dates('snapshots') if d >= snapshot_date]
+        for stale_date in stale:
+            self.filesystem.delete_dir(self._path('snapshots', stale_date))
+        snapshots = self.dates('snapshots')
+        pending = [d for d in self.dates('deltas') if not snapshots or d > snapshots[-1]]
+        if stale or len(pending) >= self.compact_every:
+            self.compact()
+        return delta
+
+    def compact(self) -> Optional[pd.DataFrame]:
+        """Fold every delta newer than the latest full snapshot into a new full snapshot."""
+        snapshots = self.dates('snapshots')
+        if not snapshots:
+            logger.warning(f"{self.retailer}: nothing to compact, no full snapshot yet")
+            return None
+        base_date = snapshots[-1]
+        pending = [d for d in self.dates('deltas') if d > base_date]
+        if not pending:
+            return None
+        current = self._read_table(self._path('snapshots', base_date, 'snapshot.parquet'))
+        for delta_date in pending:
+            delta = self._read_table(self._path('deltas', delta_date, 'delta.parquet'))
+            keys = delta['product_key'].to_numpy(np.uint64)
+            current = current[~np.isin(current['product_key'].to_numpy(np.uint64), keys)]
+            upserts = delta[delta['change'] != 'delete'].drop(columns=['change', 'old_price_pence'])
+            current = pd.concat([current, upserts], ignore_index=True)
+        self._write_table(current, self._path('snapshots', pending[-1], 'snapshot.parquet'))
+        logger.info(f"{self.retailer}: compacted {len(pending)} deltas into snapshot {pending[-1]} ({len(current)} products)")
+        return current
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild a full snapshot from the latest snapshot and its deltas")
+    parser.add_argument('command', choices=['compact'])
+    parser.add_argument('target', help="CDC root, a local directory or s3://bucket/prefix")
+    parser.add_argument('retailer')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    ChangeCapture(args.target, args.retailer).compact()
@@ -0,0 +1,360 @@
+"""Price comparison and price history over the Parquet data lake, without scanning it per query.
+
+``refresh`` turns each new or changed ``retailer=<r>/date=<d>`` partition of the
+lake (see lake_writer) into two small files under ``<lake>/_aggregates``::
+
+    products/retailer=<r>/date=<d>/part-0.parquet   one row per product: key, name tokens,
+                                                    price, price per unit and unit basis
+    daily/retailer=<r>/date=<d>/part-0.parquet      per category and unit basis: products,
+                                                    in stock, min/median/mean price and
+                                                    median price per unit
+    manifest.json                                   fingerprint of every partition done
+
+Partitions whose files have not changed since the manifest was written are not
+read again, so a daily refresh only reads that day's snapshots. pyarrow skips
+``_``-prefixed directories, so ``read_lake`` never sees the aggregates.
+
+``PriceQuery`` answers from the aggregates in memory: the cheapest equivalent
+product across retailers (name token overlap, same unit basis, ranked by
+``price_per_unit`` from normaliser), a product's price history and the daily
+aggregates. Product keys are ``price_diff.product_keys``: the ProductIndex
+product_id where there is one, otherwise a hash of name and weight.
+
+Usage: python price_query.py refresh <lake>
+       python price_query.py cheapest <lake> "semi skimmed milk 2 pints" [--date D] [--limit 10]
+       python price_query.py history <lake> "semi skimmed milk 2 pints" [--retailer r] [--start D] [--end D]
+       python price_query.py daily <lake> [--retailer r] [--category c] [--start D] [--end D]
+"""
+import argparse
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from lake_writer import resolve_target
+from normaliser import UNIT_BASIS, parse_quantity
+from price_diff import product_keys
+from product_index import OWN_BRAND_WORDS, normalise_name
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES_DIR = '_aggregates'
+PARTITIONING = ds.partitioning(pa.schema([('retailer', pa.string()), ('date', pa.string())]), flavor='hive')
+
+PRODUCT_COLUMNS = ['product_name', 'weight', 'product_id', 'category', 'price_gbp', 'in_stock',
+                   'total_quantity', 'unit_basis', 'price_per_unit']
+
+STOP_WORDS = {'with', 'the', 'of', 'in', 'for', 'per', 'x'} | OWN_BRAND_WORDS
+
+
+def name_tokens(name: str) -> List[str]:
+    """Distinct words of a product name as product_index normalises it, without numbers and stop words."""
+    return sorted({word for word in normalise_name(name).split()
+                   if len(word) > 1 and not word.isdigit() and word not in STOP_WORDS})
+
+
+def unit_basis_of(name: str) -> Optional[str]:
+    """'kg', 'l' or 'each' from a pack size in the name, e.g. '2 x 500g' -> 'kg'; None if there is none."""
+    unit = parse_quantity(pd.Series([name]))['unit'].iloc[0]
+    return UNIT_BASIS.get(unit) if isinstance(unit, str) else None
+
+
+def product_table(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per product of a retailer/date partition, with its key and name tokens."""
+    df = df.assign(product_key=product_keys(df))
+    # A product listed in several categories is kept once, like price_diff.PriceIndex
+    df = df.drop_duplicates('product_key').sort_values('product_key')
+    codes, uniques = pd.factorize(df['product_name'])
+    tokens = np.array([' '.join(name_tokens(name)) for name in uniques] + [''], dtype=object)
+    return pd.DataFrame({
+        'product_key': df['product_key'].to_numpy(np.uint64),
+        'product_name': df['product_name'].astype('string'),
+        'category': df['category'].astype('string'),
+        'tokens': pd.Series(tokens[codes], index=df.index, dtype='string'),
+        'unit_basis': df['unit_basis'].astype('string'),
+        'total_quantity': df['total_quantity'].astype('float64'),
+        'price_gbp': df['price_gbp'].astype('float64'),
+        'price_per_unit': df['price_per_unit'].astype('float64'),
+        'in_stock': df['in_stock'].astype(bool),
+    })
+
+
+def daily_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    """Per category and unit basis: product count, in-stock count and price statistics."""
+    grouped = df.assign(unit_basis=df['unit_basis'].fillna('unknown')).groupby(
+        ['category', 'unit_basis'], observed=True, dropna=False)
+    return grouped.agg(
+        products=('product_name', 'size'),
+        in_stock=('in_stock', 'sum'),
+        min_price=('price_gbp', 'min'),
+        median_price=('price_gbp', 'median'),
+        mean_price=('price_gbp', 'mean'),
+        median_price_per_unit=('price_per_unit', 'median'),
+    ).reset_index()
+
+
+class Snapshot:
+    """Every retailer's products on one day, with an inverted index from name token to rows."""
+
+    def __init__(self, products: pd.DataFrame):
+        self.products = products.reset_index(drop=True)
+        token_lists = [tokens.split() for tokens in self.products['tokens'].fillna('')]
+        self.n_tokens = np.array([len(tokens) for tokens in token_lists], dtype=np.int32)
+        postings: Dict[str, List[int]] = {}
+        for row, tokens in enumerate(token_lists):
+            for token in tokens:
+                postings.setdefault(token, []).append(row)
+        self.postings = {token: np.array(rows, dtype=np.int32) for token, rows in postings.items()}
+        self.price_per_unit = self.products['price_per_unit'].to_numpy(np.float64)
+        self.unit_basis = self.products['unit_basis'].to_numpy(object)
+        self.in_stock = self.products['in_stock'].to_numpy(bool)
+
+    def match(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows sharing at least one token with tokens, and their Jaccard similarity to them."""
+        hits = [self.postings[token] for token in tokens if token in self.postings]
+        if not hits:
+            return np.empty(0, np.int32), np.empty(0)
+        rows, overlap = np.unique(np.concatenate(hits), return_counts=True)
+        return rows, overlap / (len(tokens) + self.n_tokens[rows] - overlap)
+
+
+class PriceQuery:
+    """Refresh the aggregates of a lake and query them.
+
+    ``lake`` is a local directory or an 's3://bucket/prefix' URI, as for write_lake.
+    Snapshots and the history are loaded on first use and kept until the next refresh.
+    """
+
+    def __init__(self, lake: str, filesystem: Optional[pafs.FileSystem] = None):
+        self.filesystem, self.lake = resolve_target(lake, filesystem)
+        self.lake = self.lake.rstrip('/')
+        self.base = f"{self.lake}/{AGGREGATES_DIR}"
+        self._snapshots: Dict[Optional[str], Snapshot] = {}
+        self._history: Optional[pd.DataFrame] = None
+        self._history_blocks: Dict[str, Tuple[int, int]] = {}
+        self._daily: Optional[pd.DataFrame] = None
+
+    def _path(self, kind: str, retailer: str, snapshot_date: str) -> str:
+        return f"{self.base}/{kind}/retailer={retailer}/date={snapshot_date}/part-0.parquet"
+
+    def _write_table(self, df: pd.DataFrame, path: str):
+        self.filesystem.create_dir(path.rsplit('/', 1)[0], recursive=True)
+        with self.filesystem.open_output_stream(path) as stream:
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), stream, compression='zstd')
+
+    def _dataset(self, kind: str) -> Optional[ds.Dataset]:
+        path = f"{self.base}/{kind}"
+        if self.filesystem.get_file_info(path).type == pafs.FileType.NotFound:
+            return None
+        return ds.dataset(path, format='parquet', partitioning=PARTITIONING, filesystem=self.filesystem)
+
+    def load_manifest(self) -> Dict[str, str]:
+        path = f"{self.base}/manifest.json"
+        if self.filesystem.get_file_info(path).type == pafs.FileType.NotFound:
+            return {}
+        with self.filesystem.open_input_stream(path) as stream:
+            return json.loads(stream.read())
+
+    def save_manifest(self, manifest: Dict[str, str]):
+        self.filesystem.create_dir(self.base, recursive=True)
+        with self.filesystem.open_output_stream(f"{self.base}/manifest.json") as stream:
+            stream.write(json.dumps(manifest, indent=1, sort_keys=True).encode())
+
+    def partitions(self) -> Dict[Tuple[str, str], str]:
+        """Every retailer/date partition of the lake with a fingerprint of its files (names, sizes, mtimes)."""
+        found = {}
+        for retailer_dir in self.filesystem.get_file_info(pafs.FileSelector(self.lake, allow_not_found=True)):
+            if retailer_dir.type != pafs.FileType.Directory or not retailer_dir.base_name.startswith('retailer='):
+                continue
+            retailer = retailer_dir.base_name.split('=', 1)[1]
+            for date_dir in self.filesystem.get_file_info(pafs.FileSelector(retailer_dir.path)):
+                if date_dir.type != pafs.FileType.Directory or not date_dir.base_name.startswith('date='):
+                    continue
+                files = sorted((info.path, info.size, info.mtime_ns) for info in self.filesystem.get_file_info(
+                    pafs.FileSelector(date_dir.path, recursive=True)) if info.type == pafs.FileType.File)
+                found[(retailer, date_dir.base_name.split('=', 1)[1])] = hashlib.sha1(repr(files).encode()).hexdigest()
+        return found
+
+    def read_partition(self, retailer: str, snapshot_date: str) -> pd.DataFrame:
+        path = f"{self.lake}/retailer={retailer}/date={snapshot_date}"
+        dataset = ds.dataset(path, format='parquet', filesystem=self.filesystem,
+                             partitioning=ds.partitioning(pa.schema([('category', pa.string())]), flavor='hive'))
+        columns = [name for name in PRODUCT_COLUMNS if name in dataset.schema.names]
+        return dataset.to_table(columns=columns).to_pandas()
+
+    def refresh(self, full: bool = False) -> List[Tuple[str, str]]:
+        """Build aggregates for partitions added or changed since the last refresh; returns them.
+
+        With ``full`` every partition is rebuilt. Aggregates of partitions
+        removed from the lake are dropped.
+        """
+        manifest = {} if full else self.load_manifest()
+        current = self.partitions()
+        refreshed = []
+        for (retailer, snapshot_date), fingerprint in sorted(current.items()):
+            if manifest.get(f"{retailer}/{snapshot_date}") == fingerprint:
+                continue
+            df = self.read_partition(retailer, snapshot_date)
+            self._write_table(product_table(df), self._path('products', retailer, snapshot_date))
+            self._write_table(daily_aggregates(df), self._path('daily', retailer, snapshot_date))
+            manifest[f"{retailer}/{snapshot_date}"] = fingerprint
+            refreshed.append((retailer, snapshot_date))
+            logger.info(f"Aggregated {retailer} {snapshot_date}: {len(df)} rows")
+        for name in [name for name in manifest if tuple(name.split('/', 1)) not in current]:
+            retailer, snapshot_date = name.split('/', 1)
+            for kind in ('products', 'daily'):
+                self.filesystem.delete_dir(f"{self.base}/{kind}/retailer={retailer}/date={snapshot_date}")
+            del manifest[name]
+            refreshed.append((retailer, snapshot_date))
+            logger.info(f"Dropped aggregates of {retailer} {snapshot_date}, gone from the lake")
+        if refreshed or full:
+            self.save_manifest(manifest)
+            self._snapshots, self._history, self._daily = {}, None, None
+        logger.info(f"Refreshed {len(refreshed)} of {len(current)} partitions")
+        return refreshed
+
+    def snapshot(self, snapshot_date: Optional[str] = None) -> Snapshot:
+        """Each retailer's latest products on or before snapshot_date (default: the latest)."""
+        if snapshot_date not in self._snapshots:
+            dataset = self._dataset('products')
+            if dataset is None:
+                raise ValueError(f"No aggregates under {self.base}; run refresh first")
+            dates = self.load_manifest()
+            latest: Dict[str, str] = {}
+            for name in dates:
+                retailer, day = name.split('/', 1)
+                if (snapshot_date is None or day <= snapshot_date) and day > latest.get(retailer, ''):
+                    latest[retailer] = day
+            condition = None
+            for retailer, day in latest.items():
+                clause = (pc.field('retailer') == retailer) & (pc.field('date') == day)
+                condition = clause if condition is None else condition | clause
+            table = dataset.to_table(filter=condition) if condition is not None else dataset.schema.empty_table()
+            self._snapshots[snapshot_date] = Snapshot(table.to_pandas())
+        return self._snapshots[snapshot_date]
+
+    def cheapest_equivalent(self, name: str, snapshot_date: Optional[str] = None, unit_basis: Optional[str] = None,
+                            min_similarity: float = 0.5, limit: int = 10, in_stock: bool = True) -> pd.DataFrame:
+        """Products across retailers that match name, cheapest per kg / litre / item first.
+
+        A product matches when the Jaccard similarity of its name tokens to
+        name's is at least min_similarity and it is sold by the same unit
+        basis, taken from unit_basis or else from a pack size in name.
+        """
+        snapshot = self.snapshot(snapshot_date)
+        tokens = name_tokens(name)
+        rows, similarity = snapshot.match(tokens)
+        keep = (similarity >= min_similarity) & ~np.isnan(snapshot.price_per_unit[rows])
+        unit_basis = unit_basis or unit_basis_of(name)
+        if unit_basis:
+            keep &= snapshot.unit_basis[rows] == unit_basis
+        if in_stock:
+            keep &= snapshot.in_stock[rows]
+        rows, similarity = rows[keep], similarity[keep]
+        order = np.lexsort((-similarity, snapshot.price_per_unit[rows]))[:limit]
+        result = snapshot.products.iloc[rows[order]].reset_index(drop=True)
+        result['similarity'] = similarity[order].round(3)
+        return result[['retailer', 'date', 'product_name', 'category', 'price_gbp', 'price_per_unit',
+                       'unit_basis', 'similarity', 'product_key']]
+
+    def history(self) -> pd.DataFrame:
+        """Price of every product on every day, sorted by (retailer, product key, date)."""
+        if self._history is None:
+            dataset = self._dataset('products')
+            if dataset is None:
+                raise ValueError(f"No aggregates under {self.base}; run refresh first")
+            table = dataset.to_table(columns=['retailer', 'date', 'product_key', 'product_name',
+                                              'price_gbp', 'price_per_unit', 'in_stock'])
+            self._history = table.to_pandas().sort_values(['retailer', 'product_key', 'date'], ignore_index=True)
+            # Each retailer's rows are one block sorted by key, so a product is two binary searches away
+            self._history_blocks = {retailer: (positions[0], positions[-1] + 1) for retailer, positions
+                                    in self._history.groupby('retailer', observed=True).indices.items()}
+        return self._history
+
+    def price_history(self, name: Optional[str] = None, product_key: Optional[int] = None,
+                      retailer: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+                      min_similarity: float = 0.5) -> pd.DataFrame:
+        """Daily prices of one product: by product_key, or the closest match to name at each retailer."""
+        if product_key is None and name is None:
+            raise ValueError("price_history needs a name or a product_key")
+        if product_key is not None:
+            wanted = [(retailer, product_key)]
+        else:
+            matches = self.cheapest_equivalent(name, min_similarity=min_similarity, limit=1_000_000, in_stock=False)
+            if retailer:
+                matches = matches[matches['retailer'] == retailer]
+            best = matches.sort_values('similarity', ascending=False, kind='stable').drop_duplicates('retailer')
+            wanted = list(zip(best['retailer'], best['product_key']))
+        history = self.history()
+        keys = history['product_key'].to_numpy(np.uint64)
+        parts = []
+        for wanted_retailer, key in wanted:
+            for block_retailer, (first, last) in self._history_blocks.items():
+                if wanted_retailer not in (None, block_retailer):
+                    continue
+                low, high = np.searchsorted(keys[first:last], np.uint64(key), 'left'), \
+                    np.searchsorted(keys[first:last], np.uint64(key), 'right')
+                if high > low:
+                    parts.append(history.iloc[first + low:first + high])
+        result = pd.concat(parts, ignore_index=True) if parts else history.iloc[:0]
+        if start:
+            result = result[result['date'] >= start]
+        if end:
+            result = result[result['date'] <= end]
+        return result.sort_values(['date', 'retailer'], ignore_index=True)
+
+    def daily(self, retailer: Optional[str] = None, category: Optional[str] = None,
+              start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """Per-day aggregates per retailer, category and unit basis."""
+        if self._daily is None:
+            dataset = self._dataset('daily')
+            self._daily = dataset.to_table().to_pandas() if dataset is not None else pd.DataFrame(
+                columns=['retailer', 'date', 'category', 'unit_basis'])
+        df = self._daily
+        if retailer:
+            df = df[df['retailer'] == retailer]
+        if category:
+            df = df[df['category'] == category]
+        if start:
+            df = df[df['date'] >= start]
+        if end:
+            df = df[df['date'] <= end]
+        return df.sort_values(['date', 'retailer', 'category'], ignore_index=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare prices across retailers from the data lake")
+    parser.add_argument('command', choices=['refresh', 'cheapest', 'history', 'daily'])
+    parser.add_argument('lake', help="the lake written by write_lake, a local directory or s3://bucket/prefix")
+    parser.add_argument('name', nargs='?', help="product name to match (cheapest, history)")
+    parser.add_argument('--date', help="answer as of this date (YYYY-MM-DD)")
+    parser.add_argument('--retailer')
+    parser.add_argument('--category')
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--full', action='store_true', help="refresh: rebuild every partition")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command in ('cheapest', 'history') and not args.name:
+        parser.error(f"{args.command} needs a product name")
+
+    query = PriceQuery(args.lake)
+    pd.set_option('display.width', 200)
+    if args.command == 'refresh':
+        query.refresh(full=args.full)
+    elif args.command == 'cheapest':
+        print(query.cheapest_equivalent(args.name, args.date, limit=args.limit).to_string(index=False))
+    elif args.command == 'history':
+        print(query.price_history(args.name, retailer=args.retailer, start=args.start, end=args.end)
+              .to_string(index=False))
+    else:
+        print(query.daily(args.retailer, args.category, args.start, args.end).to_string(index=False))
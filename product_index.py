@@ -0,0 +1,345 @@
+"""Stable product IDs across runs and retailers.
+
+Every scraped row is resolved to a ``product_id`` through natural keys, in order
+of preference: a retailer SKU, the canonical product URL, or a hash of the
+normalised name and pack size. A new product's ID is a deterministic 63-bit hash
+of its best key; any other keys seen for the same row are stored as aliases, so
+the ID survives e.g. a missing URL on a later run. Keys are held in an in-memory
+dict backed by SQLite, so lookups while scraping are O(1).
+
+``match_across_retailers`` links the same product sold by different retailers.
+Candidates come from MinHash/LSH buckets (blocked by unit), so only names that
+share a band are compared instead of every pair.
+
+Usage: python product_index.py match [products.sqlite]
+"""
+import hashlib
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from normaliser import BASE_UNIT, QUANTITY_PATTERN, TO_BASE
+
+logger = logging.getLogger(__name__)
+
+# Trailing run of digits in a product URL, e.g. /product/cheddar-500g-000000000000123456
+SKU_PATTERN = re.compile(r'(\d{6,})$')
+MISSING = {'', '#', 'n/a', 'none', 'nan'}
+# Own-brand prefixes ('Tesco ...', 'M&S ...') say nothing about the product itself
+OWN_BRAND_WORDS = {'aldi', 'tesco', 'ocado', 'm', 's', 'and'}
+
+
+def canonical_url(url: Optional[str]) -> Optional[str]:
+    """Lowercased URL path without scheme, host, query or trailing slash; None if there is no real link."""
+    if not isinstance(url, str) or url.strip().lower() in MISSING:
+        return None
+    path = urlsplit(url.strip()).path.rstrip('/').lower()
+    return path or None
+
+
+def sku_from_url(url: Optional[str]) -> Optional[str]:
+    path = canonical_url(url)
+    match = SKU_PATTERN.search(path) if path else None
+    if match is None:
+        return None
+    return match.group(1).lstrip('0') or '0'
+
+
+def normalise_name(name: Optional[str]) -> str:
+    """Lowercase words with punctuation removed, '&' spelled out and pack sizes dropped."""
+    if not isinstance(name, str):
+        return ''
+    text = QUANTITY_PATTERN.sub(' ', name.lower().replace('&', ' and '))
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+# Placeholders as normalise_name leaves them ('N/A' -> 'n a'); they name no product
+PLACEHOLDER_NAMES = {normalise_name(value) for value in MISSING} - {''}
+
+
+def pack_size(*texts: Optional[str]) -> str:
+    """Canonical pack size ('4x500g' -> '4x500g', '1.5kg' -> '1500g') from the first text that has one."""
+    for text in texts:
+        match = QUANTITY_PATTERN.search(text) if isinstance(text, str) else None
+        if match:
+            unit = match.group('unit').lower()
+            amount = float(match.group('amount')) * TO_BASE[unit]
+            count = match.group('count')
+            size = f"{amount:g}{BASE_UNIT[unit]}"
+            return f"{count}x{size}" if count else size
+    return ''
+
+
+def natural_keys(name: Optional[str], weight: Optional[str] = None, url: Optional[str] = None,
+                 sku: Optional[str] = None) -> List[str]:
+    """Identity keys for one row, most reliable first."""
+    keys = []
+    sku = None if pd.isna(sku) or str(sku).strip().lower() in MISSING else str(sku).strip()
+    sku = sku or sku_from_url(url)
+    if sku:
+        keys.append(f"sku:{sku}")
+    path = canonical_url(url)
+    if path:
+        keys.append(f"url:{path}")
+    normalised = normalise_name(name)
+    if normalised and normalised not in PLACEHOLDER_NAMES:
+        keys.append(f"name:{normalised}|{pack_size(weight, name)}")
+    return keys
+
+
+def stable_id(retailer: str, key: str) -> int:
+    """Deterministic positive 63-bit ID, so every machine assigns the same ID to a new product."""
+    digest = hashlib.blake2b(f"{retailer}\x00{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') >> 1
+
+
+class ProductIndex:
+    """Natural key -> product_id map per retailer, cached in memory and persisted in SQLite.
+
+    New keys are buffered and written in batches; call ``flush`` (or ``close``)
+    at the end of a run.
+    """
+
+    def __init__(self, path: str = 'products.sqlite', flush_every: int = 5000):
+        self.path = path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS product_keys (
+                retailer TEXT NOT NULL,
+                key TEXT NOT NULL,
+                product_id INTEGER NOT NULL,
+                PRIMARY KEY (retailer, key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS products (
+                product_id INTEGER PRIMARY KEY,
+                retailer TEXT NOT NULL,
+                name TEXT,
+                pack_size TEXT,
+                url TEXT,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS matches (
+                product_id INTEGER PRIMARY KEY,
+                match_id INTEGER NOT NULL,
+                similarity REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS matches_by_group ON matches (match_id);"""
+        )
+        self._conn.commit()
+        self._keys: Dict[str, Dict[str, int]] = {}
+        self._new_keys: List[Tuple[str, str, int]] = []
+        self._seen: Dict[int, tuple] = {}
+
+    def _retailer_keys(self, retailer: str) -> Dict[str, int]:
+        keys = self._keys.get(retailer)
+        if keys is None:
+            cursor = self._conn.execute("SELECT key, product_id FROM product_keys WHERE retailer = ?", (retailer,))
+            keys = self._keys[retailer] = dict(cursor.fetchall())
+        return keys
+
+    def resolve(self, retailer: str, name: Optional[str], weight: Optional[str] = None,
+                url: Optional[str] = None, sku: Optional[str] = None) -> Optional[int]:
+        """product_id for one scraped row, registering it if it is new. None if the row has no usable key."""
+        keys = natural_keys(name, weight, url, sku)
+        if not keys:
+            return None
+        with self._lock:
+            known = self._retailer_keys(retailer)
+            product_id = next((known[key] for key in keys if key in known), None)
+            if product_id is None:
+                product_id = stable_id(retailer, keys[0])
+            for key in keys:
+                if key not in known:
+                    known[key] = product_id
+                    self._new_keys.append((retailer, key, product_id))
+            self._seen[product_id] = (retailer, name, pack_size(weight, name), canonical_url(url))
+            if len(self._new_keys) >= self.flush_every:
+                self._flush()
+        return product_id
+
+    def tag(self, retailer: str, rows: List[dict]) -> List[dict]:
+        """Add a product_id to each row dict in place (used per page while scraping)."""
+        for row in rows:
+            row['product_id'] = self.resolve(retailer, row.get('product_name'), row.get('weight'),
+                                             row.get('product_url'), row.get('sku'))
+        return rows
+
+    def assign(self, df: pd.DataFrame, retailer: str) -> pd.Series:
+        """product_id for every row of a scraped DataFrame, resolving each distinct row once."""
+        fields = df.reindex(columns=['product_name', 'weight', 'product_url', 'sku'])
+        codes, uniques = pd.factorize(pd.Series(list(fields.itertuples(index=False, name=None)), dtype=object))
+        ids = np.array([self.resolve(retailer, *row) for row in uniques] + [None], dtype=object)
+        return pd.Series(ids[codes], index=df.index, name='product_id', dtype='Int64')
+
+    def _flush(self):
+        now = datetime.now().isoformat()
+        self._conn.executemany("INSERT OR IGNORE INTO product_keys VALUES (?, ?, ?)", self._new_keys)
+        self._conn.executemany(
+            """INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (product_id) DO UPDATE SET
+                   name = excluded.name, pack_size = excluded.pack_size,
+                   url = COALESCE(excluded.url, products.url), last_seen = excluded.last_seen""",
+            [(product_id, retailer, name, size, url, now, now)
+             for product_id, (retailer, name, size, url) in self._seen.items()],
+        )
+        self._conn.commit()
+        self._new_keys, self._seen = [], {}
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def products(self) -> pd.DataFrame:
+        """Every known product with its name and pack size."""
+        self.flush()
+        with self._lock:
+            return pd.read_sql_query("SELECT product_id, retailer, name, pack_size FROM products", self._conn)
+
+    def save_matches(self, matches: pd.DataFrame):
+        """Store cross-retailer groups from match_across_retailers, replacing earlier ones."""
+        with self._lock:
+            self._conn.execute("DELETE FROM matches")
+            self._conn.executemany("INSERT INTO matches VALUES (?, ?, ?)",
+                                   matches[['product_id', 'match_id', 'similarity']].itertuples(index=False))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._conn.close()
+
+
+def shingles(name: str) -> Set[str]:
+    """Word unigrams and bigrams of a normalised name, without retailer own-brand words."""
+    normalised = normalise_name(name)
+    if normalised in PLACEHOLDER_NAMES:
+        return set()
+    words = [word for word in normalised.split() if word not in OWN_BRAND_WORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash_signatures(token_sets: List[Set[str]], num_perm: int = 64, seed: int = 1,
+                       chunk_tokens: int = 100_000) -> np.ndarray:
+    """(len(token_sets), num_perm) MinHash signatures.
+
+    Each permutation is a multiply-add-shift hash ((a * x + b) mod 2**64) >> 32
+    of the token's crc32, which is 2-universal for 32-bit keys.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+    # crc32 keeps token hashes stable across processes (str hash is salted)
+    hashes = np.fromiter((zlib.crc32(t.encode()) for tokens in token_sets for t in tokens), np.uint64)
+    lengths = np.fromiter((len(tokens) for tokens in token_sets), np.int64, len(token_sets))
+    offsets = np.r_[0, np.cumsum(lengths)]
+    signatures = np.full((len(token_sets), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    # Hash a bounded chunk of tokens at a time and take the minimum per name with reduceat
+    start = 0
+    while start < len(token_sets):
+        stop = int(np.searchsorted(offsets, offsets[start] + chunk_tokens, side='right')) - 1
+        stop = min(max(stop, start + 1), len(token_sets))
+        rows = np.arange(start, stop)[lengths[start:stop] > 0]
+        if len(rows):
+            values = (np.outer(hashes[offsets[start]:offsets[stop]], a) + b) >> np.uint64(32)
+            signatures[rows] = np.minimum.reduceat(values, offsets[rows] - offsets[start], axis=0)
+        start = stop
+    return signatures
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def match_across_retailers(products: pd.DataFrame, threshold: float = 0.6, num_perm: int = 64, bands: int = 16,
+                           max_bucket: int = 200) -> pd.DataFrame:
+    """Group the same product across retailers.
+
+    products has product_id, retailer, name and pack_size columns (see
+    ``ProductIndex.products``). Names are only compared when they share an LSH
+    band and a unit, and pairs are confirmed with exact Jaccard similarity of
+    their shingles. Buckets bigger than max_bucket (very generic names) are
+    skipped. Returns product_id, match_id (smallest product_id in the group)
+    and similarity for every product that matched something.
+    """
+    products = products.reset_index(drop=True)
+    tokens = [shingles(name) for name in products['name']]
+    signatures = minhash_signatures(tokens, num_perm)
+    units = products['pack_size'].fillna('').str.extract(r'(g|ml|each)$')[0].fillna('')
+    unit_codes = pd.factorize(units)[0].astype(np.uint64)
+    retailers = products['retailer'].tolist()
+    rows_per_band = num_perm // bands
+    rows = np.flatnonzero([bool(t) for t in tokens])
+    mix = np.random.default_rng(bands).integers(0, 1 << 63, rows_per_band + 1, dtype=np.uint64) | np.uint64(1)
+
+    candidates: Set[Tuple[int, int]] = set()
+    for band in range(bands):
+        # One 64-bit key per (band values, unit); sorting groups equal keys into buckets
+        block = signatures[rows, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+        keys = (block * mix[:-1]).sum(axis=1) + unit_codes[rows] * mix[-1]
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, len(sorted_keys)])
+        keep = (sizes > 1) & (sizes <= max_bucket)
+        for start, size in zip(starts[keep], sizes[keep]):
+            members = rows[order[start:start + size]].tolist()
+            for i, left in enumerate(members):
+                for right in members[i + 1:]:
+                    if retailers[left] != retailers[right]:
+                        candidates.add((left, right) if left < right else (right, left))
+
+    # Keep each product's best match above the threshold, then union the pairs into groups
+    best: Dict[int, Tuple[float, int]] = {}
+    for left, right in candidates:
+        similarity = _jaccard(tokens[left], tokens[right])
+        if similarity >= threshold:
+            for row, other in ((left, right), (right, left)):
+                if similarity > best.get(row, (0.0, -1))[0]:
+                    best[row] = (similarity, other)
+
+    parent = list(range(len(products)))
+
+    def find(row: int) -> int:
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    for row, (_, other) in best.items():
+        parent[find(row)] = find(other)
+
+    ids = products['product_id'].tolist()
+    group_ids: Dict[int, int] = {}
+    for row in best:
+        root = find(row)
+        group_ids[root] = min(group_ids.get(root, ids[row]), ids[row])
+    logger.info(f"Matched {len(best)} of {len(products)} products from {len(candidates)} candidate pairs")
+    return pd.DataFrame({
+        'product_id': [ids[row] for row in best],
+        'match_id': [group_ids[find(row)] for row in best],
+        'similarity': [best[row][0] for row in best],
+    })
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2 or sys.argv[1] != 'match':
+        sys.exit(__doc__)
+    index = ProductIndex(sys.argv[2] if len(sys.argv) > 2 else 'products.sqlite')
+    matches = match_across_retailers(index.products())
+    index.save_matches(matches)
+    index.close()
+    print(f"Saved {len(matches)} matched products in {matches['match_id'].nunique()} groups")
@@ -0,0 +1,194 @@
+"""Per-host rate limiting, retry backoff and fetch counters shared by all scrapers.
+
+``HostRateLimiter`` keeps one token bucket per host and adapts its rate AIMD
+style: every success adds a little, every throttled response (429, 403, 503 or
+a bot challenge) halves it and pauses the host, honouring Retry-After. The
+module-level ``RATE_LIMITER`` and ``FETCH_STATS`` are shared by every scraper in
+the process, so running Aldi, Tesco and Ocado together cannot overrun a host.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUS = (429, 403, 503)
+
+
+class ThrottledError(Exception):
+    """The site refused or challenged a request; retry_after is in seconds if the site gave one."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc or url
+
+
+def classify(error: Exception) -> Tuple[bool, Optional[float]]:
+    """Return (is the error a throttle, Retry-After seconds) for a fetch error."""
+    if isinstance(error, ThrottledError):
+        return True, error.retry_after
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status not in THROTTLE_STATUS:
+        return False, None
+    retry_after = None
+    try:
+        retry_after = float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        pass
+    return True, retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``reserve`` books a token and returns how long to wait for it."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class HostRateLimiter:
+    """One adaptive token bucket per host.
+
+    Hosts start at ``rate`` requests/second. Each success adds ``increase``
+    (up to ``max_rate``); each throttle halves the rate (down to ``min_rate``)
+    and pauses the host for Retry-After or ``pause`` seconds. ``rate=None``
+    turns pacing off (offline replay, local benchmarks).
+    """
+
+    def __init__(self, rate: Optional[float] = 4.0, burst: float = 4.0, min_rate: float = 0.2,
+                 max_rate: float = 20.0, increase: float = 0.1, pause: float = 5.0,
+                 rates: Optional[Dict[str, float]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.pause = pause
+        # Optional starting rate per host, e.g. {'www.tesco.com': 1.0}
+        self.rates = rates or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = host_of(url)
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rates.get(host, self.rate), self.burst)
+            return self._buckets[host]
+
+    def reserve(self, url: str) -> float:
+        """Book a request slot for url's host and return the seconds to wait before sending it."""
+        if self.rate is None:
+            return 0.0
+        return self.bucket(url).reserve()
+
+    def acquire(self, url: str):
+        """Block until a request to url's host is allowed."""
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    def record_success(self, url: str):
+        if self.rate is None:
+            return
+        bucket = self.bucket(url)
+        with bucket._lock:
+            bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def record_throttle(self, url: str, retry_after: Optional[float] = None):
+        if self.rate is None:
+            return
+        bucket = self.bucket(url)
+        with bucket._lock:
+            bucket.rate = max(self.min_rate, bucket.rate / 2)
+            rate = bucket.rate
+        bucket.pause(retry_after if retry_after is not None else self.pause)
+        logger.warning(f"{host_of(url)} throttled us, slowing to {rate:.2f} req/s")
+
+    def split(self, parts: int):
+        """Scale this limiter to a 1/parts share, for one of ``parts`` processes pacing the same hosts.
+
+        Rates, rate bounds and the AIMD step are divided, so ``parts`` processes
+        together stay within the rates one process would use. Buckets already
+        made keep their rate, so split before the first request.
+        """
+        if self.rate is None or parts <= 1:
+            return
+        self.rate /= parts
+        self.min_rate /= parts
+        self.max_rate /= parts
+        self.increase /= parts
+        self.burst = max(1.0, self.burst / parts)
+        self.rates = {host: rate / parts for host, rate in self.rates.items()}
+
+    def rates_by_host(self) -> Dict[str, float]:
+        with self._lock:
+            return {host: round(bucket.rate, 2) for host, bucket in self._buckets.items()}
+
+
+class RetryPolicy:
+    """Jittered exponential backoff: attempt n waits uniform(0, min(max_delay, base_delay * 2**n))."""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class FetchStats:
+    """Thread-safe per-host counters of requests, retries, drops and throttled responses."""
+
+    COUNTERS = ('requests', 'ok', 'errors', 'throttled', 'retries', 'drops')
+
+    def __init__(self):
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, url: str, counter: str, amount: int = 1):
+        with self._lock:
+            counts = self.counts.setdefault(host_of(url), dict.fromkeys(self.COUNTERS, 0))
+            counts[counter] += amount
+
+    def reset(self):
+        with self._lock:
+            self.counts = {}
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {host: dict(counts) for host, counts in self.counts.items()}
+
+    def log_summary(self, log: Optional[logging.Logger] = None):
+        for host, counts in self.summary().items():
+            (log or logger).info(f"Fetch stats [{host}]: {counts}")
+
+
+RATE_LIMITER = HostRateLimiter()
+FETCH_STATS = FetchStats()
@@ -0,0 +1,138 @@
+import bisect
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+COUNT_JS = "return document.querySelectorAll(arguments[0]).length;"
+NETWORK_JS = """
+return [document.readyState,
+        performance.getEntriesByType('resource').length];
+"""
+
+
+def wait_until(condition: Callable[[], bool], timeout: float, poll: float = 0.1) -> bool:
+    """Poll condition until it is truthy or timeout passes. Returns whether it succeeded."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if condition():
+                return True
+        except Exception as e:
+            logger.debug(f"Readiness check failed: {e}")
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll)
+
+
+def wait_for_selector(driver, selector: str, timeout: float = 10, poll: float = 0.1) -> bool:
+    """Wait until at least one element matches selector."""
+    return wait_until(lambda: driver.execute_script(COUNT_JS, selector) > 0, timeout, poll)
+
+
+def wait_for_absent(driver, selector: str, timeout: float = 5, poll: float = 0.1) -> bool:
+    """Wait until no element matches selector (e.g. a dismissed cookie banner)."""
+    script = ("var e = document.querySelector(arguments[0]);"
+              "return !e || e.offsetParent === null;")
+    return wait_until(lambda: driver.execute_script(script, selector), timeout, poll)
+
+
+def wait_for_count_stable(driver, selector: str, timeout: float = 10, settle: float = 0.5,
+                          poll: float = 0.1, min_count: int = 1, rendered_selector: str = None) -> bool:
+    """Wait until the number of elements matching selector stops changing for settle seconds.
+
+    The count must reach min_count, unless an element matching rendered_selector
+    (a pager or result count) shows the page has rendered, so an empty listing
+    settles instead of waiting out the timeout.
+    """
+    state = {'count': -1, 'since': time.monotonic()}
+
+    def settled():
+        count = driver.execute_script(COUNT_JS, selector)
+        now = time.monotonic()
+        if count != state['count']:
+            state['count'], state['since'] = count, now
+            return False
+        if now - state['since'] < settle:
+            return False
+        return count >= min_count or bool(rendered_selector and driver.execute_script(COUNT_JS, rendered_selector) > 0)
+
+    return wait_until(settled, timeout, poll)
+
+
+def wait_for_network_idle(driver, timeout: float = 10, idle: float = 0.5, poll: float = 0.1) -> bool:
+    """Wait until the document has loaded and no new resources arrived for idle seconds."""
+    state = {'resources': -1, 'since': time.monotonic()}
+
+    def quiet():
+        ready_state, resources = driver.execute_script(NETWORK_JS)
+        now = time.monotonic()
+        if ready_state != 'complete' or resources != state['resources']:
+            state['resources'], state['since'] = resources, now
+            return False
+        return now - state['since'] >= idle
+
+    return wait_until(quiet, timeout, poll)
+
+
+def tiles_ready(selector: str, timeout: float = 10, settle: float = 0.5, rendered_selector: str = None) -> Callable:
+    """Readiness check for listing pages: product tiles present (or the page rendered empty) and their count settled."""
+    def ready(driver) -> bool:
+        return wait_for_count_stable(driver, selector, timeout=timeout, settle=settle,
+                                     rendered_selector=rendered_selector)
+    return ready
+
+
+class TimeToContent:
+    """Thread-safe per-label histogram of seconds from navigation to ready content."""
+
+    BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16)
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.timeouts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, label: str, seconds: float, ready: bool = True):
+        with self._lock:
+            bisect.insort(self.samples.setdefault(label, []), seconds)
+            if not ready:
+                self.timeouts[label] = self.timeouts.get(label, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.samples = {}
+            self.timeouts = {}
+
+    def histogram(self, label: str) -> Dict[str, int]:
+        """Cumulative bucket counts, Prometheus style ('le' upper bounds)."""
+        with self._lock:
+            samples = list(self.samples.get(label, []))
+        counts = {f'le_{bound}': bisect.bisect_right(samples, bound) for bound in self.BUCKETS}
+        counts['le_inf'] = len(samples)
+        return counts
+
+    def summary(self) -> Dict[str, dict]:
+        """Count, timeouts and p50/p90/p99/max per label."""
+        report = {}
+        with self._lock:
+            items = [(label, list(samples)) for label, samples in self.samples.items()]
+        for label, samples in items:
+            def pct(p):
+                return samples[min(len(samples) - 1, int(p * len(samples)))]
+            report[label] = {
+                'count': len(samples),
+                'timeouts': self.timeouts.get(label, 0),
+                'p50': round(pct(0.5), 3),
+                'p90': round(pct(0.9), 3),
+                'p99': round(pct(0.99), 3),
+                'max': round(samples[-1], 3),
+                'total': round(sum(samples), 3),
+            }
+        return report
+
+    def log_summary(self, log: Optional[logging.Logger] = None):
+        for label, stats in self.summary().items():
+            (log or logger).info(f"Time to content [{label}]: {stats}")
@@ -0,0 +1,248 @@
+"""On-disk cache of fetched listing pages, for revalidation and offline replay.
+
+Each URL keeps its latest HTML (gzipped and content-addressed, so identical
+pages share one file), its ETag/Last-Modified validators and a content hash.
+HttpFetcher sends conditional requests when it has validators and serves the
+cached body on 304. Parsed rows are cached by (content hash, parser), so an
+unchanged page, whether revalidated or re-downloaded with the same bytes, is
+not parsed again. The cache is size-bounded with least-recently-used eviction.
+``ReplayFetcher`` serves a previous run entirely from the cache.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(html: str) -> str:
+    return hashlib.blake2b(html.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class CacheEntry:
+    """Cached response for one URL."""
+
+    __slots__ = ('url', 'etag', 'last_modified', 'content_hash', 'size')
+
+    def __init__(self, url: str, etag: Optional[str], last_modified: Optional[str], content_hash: str, size: int):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+        self.size = size
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of HTML responses and their parsed rows, shared across threads.
+
+    Hit and byte counters are kept per label (normally the retailer):
+    ``not_modified`` pages were revalidated with a 304, ``unchanged`` pages were
+    downloaded again with identical content, ``parse_reused`` pages skipped
+    parsing, and ``bytes_saved`` counts body bytes a 304 did not transfer.
+    ``replayed`` pages were served offline by ReplayFetcher and are not requests.
+    """
+
+    COUNTERS = ('requests', 'not_modified', 'unchanged', 'changed', 'parse_reused', 'bytes_saved', 'bytes_fetched',
+                'replayed')
+
+    def __init__(self, directory: str = '.response_cache', max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.bodies_dir = os.path.join(directory, 'bodies')
+        os.makedirs(self.bodies_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.sqlite'), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                label TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_by_use ON responses (last_used);
+            CREATE TABLE IF NOT EXISTS parsed (
+                content_hash TEXT NOT NULL,
+                parser TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (content_hash, parser)
+            );"""
+        )
+        self._conn.commit()
+        # Uncompressed HTML bytes of all cached responses, the quantity bounded by max_bytes
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, label: str, counter: str, amount: int = 1):
+        stats = self.stats.setdefault(label, dict.fromkeys(self.COUNTERS, 0))
+        stats[counter] += amount
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.bodies_dir, digest[:2], f'{digest}.html.gz')
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Validators and hash of the cached response for url, marking it recently used."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, size FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+        return CacheEntry(url, *row)
+
+    def body(self, entry: CacheEntry) -> str:
+        with gzip.open(self._body_path(entry.content_hash), 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def not_modified(self, entry: CacheEntry, label: str = 'default') -> str:
+        """Record a 304 for entry and return its cached HTML."""
+        with self._lock:
+            self._count(label, 'requests')
+            self._count(label, 'not_modified')
+            self._count(label, 'bytes_saved', entry.size)
+        return self.body(entry)
+
+    def replay(self, entry: CacheEntry, label: str = 'default') -> str:
+        """Record an offline replay of entry and return its cached HTML."""
+        with self._lock:
+            self._count(label, 'replayed')
+        return self.body(entry)
+
+    def store(self, url: str, html: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+              label: str = 'default') -> str:
+        """Save a freshly downloaded response and return its content hash."""
+        digest = content_hash(html)
+        path = self._body_path(digest)
+        size = len(html.encode('utf-8'))
+        with self._lock:
+            previous = self._conn.execute("SELECT content_hash, size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._total += size - (previous[1] if previous else 0)
+            self._count(label, 'requests')
+            self._count(label, 'bytes_fetched', size)
+            self._count(label, 'unchanged' if previous and previous[0] == digest else 'changed')
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write then rename so a concurrent reader never sees a partial file
+                with gzip.open(f'{path}.{threading.get_ident()}.tmp', 'wt', encoding='utf-8') as f:
+                    f.write(html)
+                os.replace(f'{path}.{threading.get_ident()}.tmp', path)
+            now = time.time()
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               (url, label, etag, last_modified, digest, size, now, now))
+            if previous and previous[0] != digest:
+                # The page changed; its old body may no longer be referenced by any URL
+                self._release(previous[0])
+            self._conn.commit()
+            self._evict()
+        return digest
+
+    def _evict(self):
+        """Drop least recently used responses until the bodies fit in max_bytes."""
+        if self._total <= self.max_bytes:
+            return
+        evicted = 0
+        cursor = self._conn.execute("SELECT url, content_hash, size FROM responses ORDER BY last_used")
+        for url, digest, size in cursor.fetchall():
+            if self._total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._total -= size
+            evicted += 1
+            self._release(digest)
+        self._conn.commit()
+        logger.info(f"Response cache evicted {evicted} entries")
+
+    def _release(self, digest: str):
+        """Delete a body and its parsed rows once no cached response refers to it."""
+        still_used = self._conn.execute(
+            "SELECT 1 FROM responses WHERE content_hash = ? LIMIT 1", (digest,)).fetchone()
+        if not still_used:
+            self._conn.execute("DELETE FROM parsed WHERE content_hash = ?", (digest,))
+            try:
+                os.remove(self._body_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def bodies(self, label: str) -> Iterator[Tuple[str, str]]:
+        """(url, html) of every cached page stored under label, e.g. to benchmark parsers offline."""
+        with self._lock:
+            rows = self._conn.execute("SELECT url, etag, last_modified, content_hash, size FROM responses "
+                                      "WHERE label = ? ORDER BY url", (label,)).fetchall()
+        for row in rows:
+            yield row[0], self.body(CacheEntry(*row))
+
+    def load_parsed(self, html: str, parser: str, label: str = 'default'):
+        """Parsed result previously stored for identical HTML, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM parsed WHERE content_hash = ? AND parser = ?",
+                                     (content_hash(html), parser)).fetchone()
+            if row is not None:
+                self._count(label, 'parse_reused')
+        return json.loads(row[0]) if row is not None else None
+
+    def store_parsed(self, html: str, parser: str, result):
+        """Remember the parser's output for this exact HTML (only kept while the body is cached)."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO parsed VALUES (?, ?, ?)",
+                               (content_hash(html), parser, json.dumps(result)))
+            self._conn.commit()
+
+    def reset_stats(self):
+        """Zero the counters; cached responses are kept."""
+        with self._lock:
+            self.stats = {}
+
+    def summary(self) -> Dict[str, dict]:
+        """Counters plus hit rate (304s and unchanged downloads over requests) per label."""
+        with self._lock:
+            report = {label: dict(stats) for label, stats in self.stats.items()}
+        for stats in report.values():
+            hits = stats['not_modified'] + stats['unchanged']
+            stats['hit_rate'] = round(hits / stats['requests'], 3) if stats['requests'] else 0.0
+        return report
+
+    def log_summary(self, log: Optional[logging.Logger] = None):
+        for label, stats in self.summary().items():
+            (log or logger).info(f"Response cache [{label}]: {stats}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ReplayFetcher:
+    """Serve pages from a ResponseCache without any network access (offline replay of a run)."""
+
+    name = 'replay'
+
+    def __init__(self, cache: ResponseCache, label: str = 'default'):
+        self.cache = cache
+        self.label = label
+
+    def fetch(self, url: str) -> str:
+        entry = self.cache.lookup(url)
+        if entry is None:
+            raise KeyError(f"{url} is not in the response cache")
+        return self.cache.replay(entry, self.label)
+
+    def close(self):
+        pass
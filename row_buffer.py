@@ -0,0 +1,138 @@
+"""Column-oriented buffer for scraped rows.
+
+Pages arrive as lists of row dicts (what checkpoints, the product index and
+the streaming writer work with). Keeping every one of those dicts until the
+end of a category, building a DataFrame per category and concatenating them
+costs a dict per product plus two copies of everything. ``RowBuffer`` takes
+each page's values into one list per field as the page arrives, so the dicts
+are dropped straight away. The category, which repeats on every row, is
+interned and kept as an ``array('i')`` of codes, which become a pandas
+Categorical or an Arrow dictionary column without being expanded per row.
+Collecting takes about as long as the per-category DataFrames did; the gain
+is peak memory (see ``benchmarks.bench_row_buffer``).
+"""
+from array import array
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CATEGORY = 'category'
+
+
+class RowBuffer:
+    """Rows held as one list per field, with the category as int codes into ``categories``.
+
+    Fields keep the order they were first seen in, as a DataFrame built from
+    the row dicts would; a field missing from some rows is None there.
+    """
+
+    __slots__ = ('fields', 'columns', 'codes', 'categories', '_category_codes', 'length')
+
+    def __init__(self):
+        self.fields: List[str] = []
+        self.columns: Dict[str, list] = {}
+        self.codes = array('i')
+        self.categories: List[Optional[str]] = []
+        self._category_codes: Dict[Optional[str], int] = {}
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _code(self, category: Optional[str]) -> int:
+        code = self._category_codes.get(category)
+        if code is None:
+            code = self._category_codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def _add_field(self, field: str):
+        self.fields.append(field)
+        if field != CATEGORY:
+            self.columns[field] = [None] * self.length
+
+    def _extend_codes(self, categories: Sequence[Optional[str]]):
+        # Every row of a page is almost always in the same category
+        if categories.count(categories[0]) == len(categories):
+            self.codes.extend(array('i', [self._code(categories[0])]) * len(categories))
+        else:
+            self.codes.extend(self._code(category) for category in categories)
+
+    def extend(self, rows: List[dict]):
+        """Append one page of row dicts."""
+        if not rows:
+            return
+        new = set().union(*rows).difference(self.fields)
+        for row in rows if new else ():
+            for field in row:
+                if field in new:
+                    self._add_field(field)
+                    new.discard(field)
+        for field, column in self.columns.items():
+            column.extend([row.get(field) for row in rows])
+        self._extend_codes([row.get(CATEGORY) for row in rows])
+        self.length += len(rows)
+
+    def merge(self, other: 'RowBuffer'):
+        """Append every row of another buffer."""
+        for field in other.fields:
+            if field not in self.fields:
+                self._add_field(field)
+        for field, column in self.columns.items():
+            column.extend(other.columns[field] if field in other.columns else [None] * other.length)
+        remap = [self._code(category) for category in other.categories]
+        self.codes.extend(remap[code] for code in other.codes)
+        self.length += other.length
+
+    @classmethod
+    def concat(cls, buffers: Iterable['RowBuffer']) -> 'RowBuffer':
+        combined = cls()
+        for buffer in buffers:
+            combined.merge(buffer)
+        return combined
+
+    def category_column(self) -> 'pd.Categorical':
+        """The category of every row as a Categorical built from the codes; a missing category is NaN."""
+        import numpy as np
+        import pandas as pd
+        codes = np.frombuffer(self.codes, dtype=np.intc)
+        named = [category for category in self.categories if category is not None]
+        if len(named) < len(self.categories):
+            positions = {category: code for code, category in enumerate(named)}
+            codes = np.array([positions.get(category, -1) for category in self.categories], dtype=np.intc)[codes]
+        return pd.Categorical.from_codes(codes, named)
+
+    def to_pandas(self) -> 'pd.DataFrame':
+        """The rows as a DataFrame with the columns and dtypes of ``pd.DataFrame(rows)``, except the category.
+
+        The category column is categorical. Other columns go in as object
+        arrays without a copy, with numbers inferred as ``pd.DataFrame(rows)``
+        would.
+        """
+        import numpy as np
+        import pandas as pd
+        if not self.length:
+            return pd.DataFrame()
+        data = {field: self.category_column() if field == CATEGORY
+                else np.fromiter(self.columns[field], dtype=object, count=self.length)
+                for field in self.fields}
+        return pd.DataFrame(data, columns=self.fields, copy=False).infer_objects()
+
+    def to_arrow(self, schema=None):
+        """The rows as a pyarrow Table; the category is a dictionary column.
+
+        The category indices are the code array's own buffer rather than a
+        copy, so the buffer can not grow while the table is alive. Fields in
+        ``schema`` (e.g. ``row_pipeline.ROW_SCHEMA``) get its types.
+        """
+        import pyarrow as pa
+        arrays = []
+        for field in self.fields:
+            if field == CATEGORY:
+                indices = pa.Array.from_buffers(pa.int32(), self.length, [None, pa.py_buffer(self.codes)])
+                arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(self.categories, pa.string())))
+            else:
+                kind = schema.field(field).type if schema is not None and field in schema.names else None
+                arrays.append(pa.array(self.columns[field], type=kind))
+        return pa.Table.from_arrays(arrays, names=list(self.fields))
@@ -0,0 +1,185 @@
+"""Stream scraped rows to Parquet as pages arrive instead of building one big DataFrame.
+
+Scrapers expose ``iter_category(category)`` which yields each page's rows. Category
+producers turn pages into Arrow record batches and push them into a bounded
+queue; a single writer drains it into Parquet row groups, so peak memory depends
+on the queue and row group size, not on how many categories are scraped.
+"""
+import io
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+ROW_SCHEMA = pa.schema([
+    ('product_name', pa.string()),
+    ('price', pa.string()),
+    ('weight', pa.string()),
+    ('category', pa.string()),
+    ('product_url', pa.string()),
+    ('product_id', pa.int64()),
+])
+
+_DONE = object()
+
+
+def rows_to_batch(rows: List[dict], schema: pa.Schema = ROW_SCHEMA) -> pa.RecordBatch:
+    """Convert one page of row dicts to a typed record batch; missing keys become null."""
+    return pa.RecordBatch.from_pylist(rows, schema=schema)
+
+
+class S3MultipartSink(io.RawIOBase):
+    """Write-only file object that uploads to S3 in multipart chunks as data arrives.
+
+    Small outputs that never fill a part are sent with a single put_object.
+    """
+
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, bucket: str, key: str, part_size: int = 8 * 1024 * 1024, s3_client=None,
+                 content_type: str = 'application/octet-stream'):
+        if s3_client is None:
+            import boto3
+            s3_client = boto3.client('s3')
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, self.MIN_PART_SIZE)
+        self.content_type = content_type
+        self._buffer = bytearray()
+        self._position = 0
+        self._upload_id = None
+        self._parts = []
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def _upload_part(self, body: bytes):
+        if self._upload_id is None:
+            self._upload_id = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type)['UploadId']
+        number = len(self._parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=number, Body=body)
+        self._parts.append({'PartNumber': number, 'ETag': response['ETag']})
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                self.s3_client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer),
+                                          ContentType=self.content_type)
+            else:
+                if self._buffer:
+                    self._upload_part(bytes(self._buffer))
+                self.s3_client.complete_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                    MultipartUpload={'Parts': self._parts})
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._buffer = bytearray()
+            super().close()
+
+    def abort(self):
+        if self._upload_id is not None:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            self._upload_id = None
+
+
+class ParquetStreamWriter:
+    """Accumulate record batches and flush them as Parquet row groups of row_group_size rows."""
+
+    def __init__(self, sink, schema: pa.Schema = ROW_SCHEMA, row_group_size: int = 50_000,
+                 compression: str = 'snappy'):
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.writer = pq.ParquetWriter(sink, schema, compression=compression)
+        self.rows_written = 0
+        self.row_groups = 0
+        self._pending: List[pa.RecordBatch] = []
+        self._pending_rows = 0
+
+    def write_batch(self, batch: pa.RecordBatch):
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        if self._pending_rows >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending_rows:
+            return
+        table = pa.Table.from_batches(self._pending, schema=self.schema)
+        self.writer.write_table(table, row_group_size=self.row_group_size)
+        self.rows_written += table.num_rows
+        self.row_groups += 1
+        self._pending, self._pending_rows = [], 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def stream_categories(scraper, categories: List[str], sink, max_workers: int = 2, queue_size: int = 16,
+                      row_group_size: int = 50_000, schema: pa.Schema = ROW_SCHEMA) -> int:
+    """Scrape categories concurrently and stream their rows into a Parquet sink.
+
+    ``sink`` is a local path or a writable file object such as S3MultipartSink.
+    At most ``queue_size`` page batches wait in memory; producers block when the
+    writer falls behind. Returns the number of rows written.
+    """
+    batches = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def produce(category: str):
+        try:
+            for rows in scraper.iter_category(category):
+                if stop.is_set():
+                    break
+                batches.put(rows_to_batch(rows, schema))
+        except Exception as e:
+            logger.error(f"Streaming {category} failed: {e}")
+        finally:
+            batches.put(_DONE)
+
+    writer = ParquetStreamWriter(sink, schema=schema, row_group_size=row_group_size)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for category in categories:
+            executor.submit(produce, category)
+        remaining = len(categories)
+        try:
+            while remaining:
+                item = batches.get()
+                if item is _DONE:
+                    remaining -= 1
+                else:
+                    writer.write_batch(item)
+            writer.close()
+        except BaseException:
+            # Unblock producers so the executor can shut down, then surface the error
+            stop.set()
+            while remaining:
+                if batches.get() is _DONE:
+                    remaining -= 1
+            raise
+    logger.info(f"Streamed {writer.rows_written} rows in {writer.row_groups} row groups")
+    return writer.rows_written
@@ -0,0 +1,201 @@
+"""Per-stage timings, bytes and rows for a scrape, with a JSON / CloudWatch EMF run report.
+
+Stages are timed with ``TELEMETRY.stage(name, ...)`` around the work:
+
+    chrome_start   starting a Chrome driver          site_setup   cookie banner / restoring cookies
+    download       HTTP GET of a page                navigate     driver.get of a page
+    wait           readiness wait after navigation   rate_wait    sleeping for the host rate limiter
+    render         DOMContentLoaded time, with the bytes the browser transferred for the page
+    fetch          a whole page fetch (any backend)  parse        HTML to names/prices/...
+    build_rows     building, tagging and checkpointing the rows of a page
+    dataframe      building a category's DataFrame   serialise / upload   saving the output
+
+Fetch-side code only knows the url, so scrapers ``label`` each url with its
+category and page; the report then breaks time down per stage, per category
+and per page. ``TELEMETRY`` is shared by everything in the process, like
+``rate_limit.FETCH_STATS``.
+"""
+import cProfile
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EMF_NAMESPACE = 'UKSupermarketScraper'
+
+
+class Telemetry:
+    """Thread-safe per-stage samples, with totals per category and per page."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a new run (e.g. at the top of a warm Lambda invocation)."""
+        with self._lock:
+            self.started = time.time()
+            self.samples: Dict[str, List[float]] = {}
+            self.bytes: Dict[str, int] = {}
+            self.rows: Dict[str, int] = {}
+            self.pages: Dict[Tuple[str, int], Dict[str, float]] = {}
+            self.categories: Dict[str, Dict[str, float]] = {}
+            self.labels: Dict[str, Tuple[str, int]] = {}
+
+    def label(self, url: str, category: str, page: int = 1):
+        """Attribute later stages recorded for url to this category and page."""
+        with self._lock:
+            self.labels[url] = (category, page)
+
+    def record(self, name: str, seconds: float, url: Optional[str] = None, category: Optional[str] = None,
+               page: Optional[int] = None, nbytes: int = 0, rows: int = 0):
+        with self._lock:
+            if url is not None and url in self.labels:
+                category, page = self.labels[url]
+            self.samples.setdefault(name, []).append(seconds)
+            self.bytes[name] = self.bytes.get(name, 0) + nbytes
+            self.rows[name] = self.rows.get(name, 0) + rows
+            if category is not None:
+                totals = self.categories.setdefault(category, {})
+                totals[name] = totals.get(name, 0.0) + seconds
+                if page is not None:
+                    page_totals = self.pages.setdefault((category, page), {})
+                    page_totals[name] = page_totals.get(name, 0.0) + seconds
+                    # Several stages see the same page's bytes and rows, so keep the largest
+                    page_totals['bytes'] = max(page_totals.get('bytes', 0), nbytes)
+                    page_totals['rows'] = max(page_totals.get('rows', 0), rows)
+
+    @contextmanager
+    def stage(self, name: str, url: Optional[str] = None, category: Optional[str] = None,
+              page: Optional[int] = None):
+        """Time the block as stage name. Set ``m['bytes']`` / ``m['rows']`` on the yielded dict to count them."""
+        measured = {'bytes': 0, 'rows': 0}
+        start = time.perf_counter()
+        try:
+            yield measured
+        finally:
+            self.record(name, time.perf_counter() - start, url, category, page,
+                        measured['bytes'], measured['rows'])
+
+    def summary(self) -> Dict[str, dict]:
+        """Count, total seconds, p50/p95/p99/max seconds, bytes and rows per stage."""
+        with self._lock:
+            items = [(name, sorted(samples)) for name, samples in self.samples.items()]
+            nbytes, rows = dict(self.bytes), dict(self.rows)
+        report = {}
+        for name, samples in items:
+            def pct(p):
+                return samples[min(len(samples) - 1, int(p * len(samples)))]
+            report[name] = {
+                'count': len(samples),
+                'total': round(sum(samples), 3),
+                'p50': round(pct(0.5), 4),
+                'p95': round(pct(0.95), 4),
+                'p99': round(pct(0.99), 4),
+                'max': round(samples[-1], 4),
+                'bytes': nbytes.get(name, 0),
+                'rows': rows.get(name, 0),
+            }
+        return report
+
+    def report(self, retailer: Optional[str] = None) -> dict:
+        """The whole run: per-stage summary plus seconds per stage for every category and page."""
+        with self._lock:
+            categories = {category: {name: round(seconds, 3) for name, seconds in totals.items()}
+                          for category, totals in self.categories.items()}
+            pages = [{'category': category, 'page': page,
+                      **{name: round(value, 4) for name, value in totals.items()}}
+                     for (category, page), totals in sorted(self.pages.items())]
+        for page in pages:
+            totals = categories[page['category']]
+            totals['pages'] = totals.get('pages', 0) + 1
+            totals['bytes'] = totals.get('bytes', 0) + page['bytes']
+            totals['rows'] = totals.get('rows', 0) + page['rows']
+        return {
+            'retailer': retailer,
+            'started': self.started,
+            'wall_seconds': round(time.time() - self.started, 3),
+            'stages': self.summary(),
+            'categories': categories,
+            'pages': pages,
+        }
+
+    def emf(self, retailer: str, namespace: str = EMF_NAMESPACE) -> List[dict]:
+        """One CloudWatch Embedded Metric Format record per stage."""
+        timestamp = int(time.time() * 1000)
+        records = []
+        for name, stats in self.summary().items():
+            records.append({
+                '_aws': {
+                    'Timestamp': timestamp,
+                    'CloudWatchMetrics': [{
+                        'Namespace': namespace,
+                        'Dimensions': [['Retailer', 'Stage']],
+                        'Metrics': [{'Name': 'Seconds', 'Unit': 'Seconds'},
+                                    {'Name': 'P95Seconds', 'Unit': 'Seconds'},
+                                    {'Name': 'Count', 'Unit': 'Count'},
+                                    {'Name': 'Bytes', 'Unit': 'Bytes'},
+                                    {'Name': 'Rows', 'Unit': 'Count'}],
+                    }],
+                },
+                'Retailer': retailer,
+                'Stage': name,
+                'Seconds': stats['total'],
+                'P95Seconds': stats['p95'],
+                'Count': stats['count'],
+                'Bytes': stats['bytes'],
+                'Rows': stats['rows'],
+            })
+        return records
+
+    def emit(self, retailer: str, path: Optional[str] = None, emf: bool = True):
+        """End-of-run report: EMF lines on stdout (picked up from Lambda logs) and the full JSON at path."""
+        if emf:
+            for record in self.emf(retailer):
+                print(json.dumps(record))
+        if path:
+            with open(path, 'w') as f:
+                json.dump(self.report(retailer), f, indent=2)
+            logger.info(f"Run report written to {path}")
+
+    def log_summary(self, log: Optional[logging.Logger] = None):
+        for name, stats in self.summary().items():
+            (log or logger).info(f"Stage [{name}]: {stats}")
+
+
+@contextmanager
+def profiled(path: Optional[str]):
+    """Profile the block into path: pyinstrument HTML if path ends in .html, otherwise cProfile stats.
+
+    Only the calling thread is profiled; page fetches running on scheduler
+    threads show up in the stage timings instead.
+    """
+    if not path:
+        yield
+        return
+    if path.endswith('.html'):
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(path, 'w') as f:
+                f.write(profiler.output_html())
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+    logger.info(f"Profile written to {path}")
+
+
+TELEMETRY = Telemetry()
@@ -0,0 +1,91 @@
+import logging
+
+from category_scraper import PagedCategoryScraper
+from checkpoints import SQLiteCheckpointStore
+from pagination import COVERAGE
+from rate_limit import HostRateLimiter, RetryPolicy
+from readiness import TimeToContent
+
+PAGES = {1: ['Peas', 'Chips'], 2: ['Pizza', 'Kale'], 3: ['Soup']}
+
+
+class PageFetcher:
+    name = 'fake'
+
+    def __init__(self, fetched=None, failing=()):
+        self.fetched = fetched if fetched is not None else []
+        self.failing = failing
+
+    def fetch(self, url):
+        page = int(url.rsplit('=', 1)[1])
+        self.fetched.append(page)
+        if page in self.failing:
+            raise ConnectionError(f"page {page} timed out")
+        return f"pages={len(PAGES)};" + ';'.join(PAGES.get(page, []))
+
+    def close(self):
+        pass
+
+
+class ListingScraper(PagedCategoryScraper):
+    retailer = 'test'
+    row_fields = ('product_name', 'category', 'price')
+
+    def __init__(self, checkpoint_store=None, resume=False, failing=()):
+        self.fetched = []
+        self.failing = failing
+        self.page_workers = 2
+        self.page_window = 4
+        self.per_host_limit = 2
+        self.pagination = 'auto'
+        self.rate_limiter = HostRateLimiter(rate=None)
+        self.retry = RetryPolicy(max_attempts=1)
+        self.checkpoint_store = checkpoint_store
+        self.resume = resume
+        self.run_date = '20260101'
+        self.product_index = None
+        self.logger = logging.getLogger(__name__)
+        self.time_to_content = TimeToContent()
+
+    def category_url(self, category, page):
+        return f"http://stub/{category}?page={page}"
+
+    def make_fetcher(self):
+        return PageFetcher(self.fetched, self.failing)
+
+    def read_pager(self, html):
+        return int(html.split(';')[0].split('=')[1])
+
+    def parse_page(self, html):
+        names = [name for name in html.split(';')[1:] if name]
+        return names, [f'£{len(name)}' for name in names]
+
+
+def test_paged_scraper_collects_every_page_with_fields_in_order():
+    scraper = ListingScraper()
+    df = scraper.scrape_all_categories(['frozen', 'fresh'])
+    assert list(df.columns) == ['product_name', 'category', 'price']
+    assert df['product_name'].tolist() == [name for _ in range(2) for page in sorted(PAGES) for name in PAGES[page]]
+    assert df.loc[0].tolist() == ['Peas', 'frozen', '£4']
+    assert COVERAGE.summary()['test/fresh']['pages'] == 3
+    assert scraper.count_pages('frozen') == 3
+
+
+def test_page_range_of_a_work_unit():
+    rows = [row for page in ListingScraper().iter_category('frozen', 2, 3) for row in page]
+    assert [row['product_name'] for row in rows] == ['Pizza', 'Kale', 'Soup']
+
+
+def test_resume_fetches_only_the_pages_that_failed(tmp_path):
+    store = SQLiteCheckpointStore(str(tmp_path / 'checkpoints.sqlite'))
+    first = ListingScraper(store, resume=True, failing={2})
+    assert first.scrape_category('frozen')['product_name'].tolist() == ['Peas', 'Chips', 'Soup']
+    assert sorted(store.load_completed('test', 'frozen', '20260101')) == [1, 3]
+
+    second = ListingScraper(store, resume=True)
+    df = second.scrape_category('frozen')
+    assert df['product_name'].tolist() == ['Peas', 'Chips', 'Pizza', 'Kale', 'Soup']
+    # Page 1 is still fetched for the page count; page 3 comes from the checkpoint
+    assert sorted(second.fetched) == [1, 2]
+    assert sorted(store.load_completed('test', 'frozen', '20260101')) == [1, 2, 3]
+    store.close()
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from driver_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.healthy = True
+        self.quit_called = False
+        self.cookies = []
+        self.visited = []
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise ConnectionError('browser crashed')
+        return 1
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def get_cookies(self):
+        return [{'name': 'consent', 'value': 'yes'}]
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_drivers_are_reused_and_bounded():
+    pool = DriverPool(FakeDriver, size=2)
+    with pool.driver() as first:
+        pass
+    with pool.driver() as second:
+        assert second is first
+    a, b = pool.acquire(), pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+    released = threading.Timer(0.05, pool.release, (a,))
+    released.start()
+    assert pool.acquire(timeout=2) is a
+    assert pool.started == 2
+    pool.close()
+
+
+def test_worn_out_and_unhealthy_drivers_are_replaced():
+    pool = DriverPool(FakeDriver, size=1, max_pages_per_driver=2)
+    with pool.driver(pages=2) as worn:
+        pass
+    assert worn.quit_called and pool.recycled == 1
+    with pool.driver() as crashed:
+        crashed.healthy = False
+    with pool.driver() as fresh:
+        assert fresh is not crashed and crashed.quit_called
+    assert pool.started == 3
+    pool.close()
+
+
+def test_consent_runs_once_per_site_and_cookies_carry_over():
+    pool = DriverPool(FakeDriver, size=2)
+    consented = []
+    first = pool.acquire('https://aldi', consented.append)
+    second = pool.acquire('https://aldi', consented.append)
+    assert consented == [first.driver]
+    assert second.driver.cookies == [{'name': 'consent', 'value': 'yes'}]
+    pool.release(first)
+    pool.release(second)
+    pool.close()
+    assert first.driver.quit_called and second.driver.quit_called
+    with pytest.raises(RuntimeError):
+        pool.acquire()
@@ -0,0 +1,108 @@
+import pytest
+import requests
+
+from fetchers import FallbackFetcher, looks_like_challenge
+
+LISTING_WITH_RECAPTCHA = """<html><head><title>Frozen | Aldi</title>
+<script src="https://www.google.com/recaptcha/api.js" async defer></script></head>
+<body><div class="product-tile">Peas 1kg £1.09</div>
+<form class="newsletter"><div class="g-recaptcha" data-sitekey="abc"></div></form>
+<footer><a href="/help/access-denied">Access Denied? Contact us</a></footer></body></html>"""
+
+CLOUDFLARE_CHALLENGE = """<html><head><title>Just a moment...</title></head><body>
+<div id="cf-chl-widget-abc"></div>
+<script>window._cf_chl_opt={cvId: '3'};</script>
+<script src="/cdn-cgi/challenge-platform/h/b/orchestrate/chl_page/v1"></script></body></html>"""
+
+AKAMAI_DENIED = """<html><head><title>Access Denied</title></head><body><h1>Access Denied</h1>
+You don't have permission to access this server.<p>Reference #18.2f1b
+<p>https://errors.edgesuite.net/18.2f1b</p></body></html>"""
+
+
+class FailingFetcher:
+    name = 'http'
+
+    def __init__(self, error):
+        self.error = error
+
+    def fetch(self, url):
+        raise self.error
+
+    def close(self):
+        pass
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} Client Error", response=response)
+
+
+class StaticFetcher:
+    def __init__(self, name, html):
+        self.name = name
+        self.html = html
+        self.calls = 0
+
+    def fetch(self, url):
+        self.calls += 1
+        return self.html
+
+    def close(self):
+        pass
+
+
+def test_normal_page_with_recaptcha_is_not_a_challenge():
+    assert not looks_like_challenge(LISTING_WITH_RECAPTCHA)
+    assert not looks_like_challenge(LISTING_WITH_RECAPTCHA, 200)
+
+
+def test_vendor_challenges_are_detected():
+    assert looks_like_challenge(CLOUDFLARE_CHALLENGE)
+    assert looks_like_challenge(AKAMAI_DENIED)
+
+
+def test_throttling_status_is_a_challenge():
+    for status in (403, 429, 503):
+        assert looks_like_challenge('<html></html>', status)
+
+
+def test_recaptcha_page_does_not_fall_back():
+    primary = StaticFetcher('http', LISTING_WITH_RECAPTCHA)
+    fallback = StaticFetcher('selenium', '')
+    fetcher = FallbackFetcher(primary, fallback)
+    assert fetcher.fetch('https://example.com/frozen') == LISTING_WITH_RECAPTCHA
+    assert fallback.calls == 0
+
+
+def test_challenge_page_falls_back():
+    fetcher = FallbackFetcher(StaticFetcher('http', CLOUDFLARE_CHALLENGE), StaticFetcher('selenium', '<html/>'))
+    assert fetcher.fetch('https://example.com/frozen') == '<html/>'
+    assert fetcher.fallback_count == 1
+
+
+def test_throttle_is_raised_not_retried_on_the_fallback():
+    for status in (403, 429, 503):
+        fallback = StaticFetcher('selenium', '<html/>')
+        fetcher = FallbackFetcher(FailingFetcher(http_error(status)), fallback)
+        with pytest.raises(requests.HTTPError):
+            fetcher.fetch('https://example.com/frozen')
+        assert fallback.calls == 0
+
+
+def test_other_errors_fall_back():
+    fallback = StaticFetcher('selenium', '<html/>')
+    fetcher = FallbackFetcher(FailingFetcher(http_error(404)), fallback)
+    assert fetcher.fetch('https://example.com/frozen') == '<html/>'
+    assert fallback.calls == 1
+
+
+def test_aldi_tile_check_matches_parser():
+    from Aldi import AldiScraper
+    from benchmarks.fixtures import aldi_listing_html
+
+    scraper = AldiScraper(fetch_backend='http')
+    html = aldi_listing_html(1, 3)
+    assert scraper.page_has_products(html)
+    assert len(scraper.parse_page(html)[0]) > 0
+    assert not scraper.page_has_products('<html><body>No products</body></html>')
@@ -0,0 +1,50 @@
+import pandas as pd
+import pyarrow.dataset as ds
+
+from lake_writer import read_lake, write_lake
+
+
+def snapshot(prices):
+    return pd.DataFrame({
+        'product_name': ['Peas 1kg', 'Chips 2kg', 'Kale 200g'],
+        'price': prices,
+        'weight': [None, None, None],
+        'category': ['frozen', 'frozen', 'fresh'],
+    })
+
+
+def rows(target, **filters):
+    expression = None
+    for name, value in filters.items():
+        term = ds.field(name) == value
+        expression = term if expression is None else expression & term
+    return read_lake(target).to_table(filter=expression).to_pandas()
+
+
+def test_partitions_and_numeric_prices(tmp_path):
+    target = str(tmp_path / 'lake')
+    paths = write_lake(snapshot(['£1.00', '£2.50', '75p']), target, 'aldi', '2026-01-01')
+    assert sorted(p.split('lake/')[1].rsplit('/', 1)[0] for p in paths) == [
+        'retailer=aldi/date=2026-01-01/category=fresh', 'retailer=aldi/date=2026-01-01/category=frozen']
+    frozen = rows(target, category='frozen')
+    assert sorted(frozen['price_gbp'].tolist()) == [1.0, 2.5]
+
+
+def test_rerun_overwrites_the_same_partition(tmp_path):
+    target = str(tmp_path / 'lake')
+    write_lake(snapshot(['£1.00', '£2.50', '75p']), target, 'aldi', '2026-01-01')
+    write_lake(snapshot(['£1.00', '£2.50', '75p']), target, 'aldi', '2026-01-02')
+    write_lake(snapshot(['£1.10', '£2.60', '80p']), target, 'aldi', '2026-01-01')
+    day = rows(target, date='2026-01-01')
+    assert len(day) == 3
+    assert sorted(day['price_gbp'].tolist()) == [0.8, 1.1, 2.6]
+    assert len(rows(target, date='2026-01-02')) == 3
+
+
+def test_part_names_let_units_share_a_partition(tmp_path):
+    target = str(tmp_path / 'lake')
+    df = snapshot(['£1.00', '£2.50', '75p'])
+    write_lake(df.iloc[:2], target, 'aldi', '2026-01-01', part_name='unit-1')
+    write_lake(df.iloc[2:], target, 'aldi', '2026-01-01', part_name='unit-2')
+    write_lake(df.iloc[:2], target, 'aldi', '2026-01-01', part_name='unit-1')
+    assert len(rows(target, date='2026-01-01')) == 3
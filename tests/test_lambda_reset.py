@@ -0,0 +1,34 @@
+import pandas as pd
+
+import Aldi
+from pagination import COVERAGE, PageCount
+from rate_limit import FETCH_STATS
+from response_cache import ResponseCache
+from telemetry import TELEMETRY
+
+
+def test_warm_invocation_reports_only_its_own_run(tmp_path, monkeypatch):
+    scraper = Aldi.AldiScraper(fetch_backend='http', response_cache=ResponseCache(str(tmp_path / 'cache')))
+    monkeypatch.setattr(Aldi, 'get_scraper', lambda checkpoint_uri: scraper)
+    runs = []
+
+    def scrape_category(category):
+        runs.append((FETCH_STATS.summary(), COVERAGE.summary(), scraper.time_to_content.summary(),
+                     scraper.response_cache.summary(), TELEMETRY.summary()))
+        FETCH_STATS.add('https://www.aldi.co.uk/frozen', 'requests')
+        COVERAGE.record('aldi', category, PageCount(1, 'pager', 30, 30), 1, 30)
+        scraper.time_to_content.record('aldi', 0.5)
+        scraper.response_cache._count('aldi', 'requests')
+        with TELEMETRY.stage('parse', category=category):
+            pass
+        return pd.DataFrame()
+
+    monkeypatch.setattr(scraper, 'scrape_category', scrape_category)
+    monkeypatch.setattr(scraper, 'save_df_to_s3', lambda **kwargs: None)
+    monkeypatch.setattr(TELEMETRY, 'emit', lambda *args, **kwargs: None)
+    try:
+        for _ in range(2):
+            Aldi.lambda_handler({}, None)
+    finally:
+        scraper.driver_pool.close()
+    assert runs[1] == ({}, {}, {}, {}, {})
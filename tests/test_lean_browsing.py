@@ -0,0 +1,61 @@
+from fnmatch import fnmatchcase
+
+from selenium.webdriver.chrome.options import Options
+
+from lean_browsing import blocked_url_patterns, lean_options, page_weight, prepare_driver
+
+
+class CdpDriver:
+    def __init__(self, fail=False):
+        self.commands = []
+        self.fail = fail
+
+    def execute_cdp_cmd(self, command, params):
+        if self.fail:
+            raise AttributeError('not a Chromium driver')
+        self.commands.append((command, params))
+
+    def execute_script(self, script):
+        return [123456, 42, 850.0]
+
+
+def blocked(url):
+    # setBlockedURLs patterns use '*' wildcards like fnmatch
+    return any(fnmatchcase(url, pattern) for pattern in blocked_url_patterns())
+
+
+def test_heavy_and_third_party_requests_are_blocked():
+    assert blocked('https://groceries.aldi.co.uk/images/peas.jpg')
+    assert blocked('https://www.ocado.com/productImages/123.webp?width=200')
+    assert blocked('https://fonts.example.com/font.woff2')
+    assert blocked('https://www.googletagmanager.com/gtm.js?id=1')
+    assert blocked('https://static.hotjar.com/c/hotjar.js')
+
+
+def test_pages_and_first_party_scripts_load():
+    assert not blocked('https://groceries.aldi.co.uk/en-GB/frozen?&page=2')
+    assert not blocked('https://www.tesco.com/groceries/en-GB/shop/frozen-food/all?page=1')
+    assert not blocked('https://www.ocado.com/static/app.js')
+    assert not blocked('https://cdn.cookielaw.org/scripttemplates/otSDKStub.js')
+
+
+def test_prepare_driver_blocks_only_when_lean():
+    lean = CdpDriver()
+    prepare_driver(lean)
+    assert [command for command, _ in lean.commands] == [
+        'Page.addScriptToEvaluateOnNewDocument', 'Network.enable', 'Network.setBlockedURLs']
+    full = CdpDriver()
+    prepare_driver(full, lean=False)
+    assert [command for command, _ in full.commands] == ['Page.addScriptToEvaluateOnNewDocument']
+    failing = CdpDriver(fail=True)
+    assert prepare_driver(failing) is failing
+
+
+def test_lean_options_turn_images_off():
+    options = lean_options(Options())
+    assert options.experimental_options['prefs']['profile.managed_default_content_settings.images'] == 2
+    assert '--blink-settings=imagesEnabled=false' in options.arguments
+
+
+def test_page_weight():
+    assert page_weight(CdpDriver()) == {'bytes': 123456, 'resources': 42, 'dom_ready': 0.85}
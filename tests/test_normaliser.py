@@ -0,0 +1,45 @@
+import pandas as pd
+
+from normaliser import normalise, parse_price
+from price_diff import NO_PRICE, price_pence
+
+
+def test_parse_price_formats():
+    prices = pd.Series(['£1.29', '75p', '£1,299.00', '£12,345', 'Out of Stock', None, 'N/A'])
+    parsed = parse_price(prices)
+    assert parsed.tolist()[:4] == [1.29, 0.75, 1299.0, 12345.0]
+    assert parsed.iloc[4:].isna().all()
+
+
+def test_comma_price_in_pence():
+    assert price_pence(pd.DataFrame({'price': ['£1,299.00', '£2.50', 'Out of Stock']})).tolist() [:2] == [129900, 250]
+
+
+def test_normalise_multipack_price_per_unit():
+    df = pd.DataFrame({'product_name': ['Cola', 'Big TV'], 'price': ['£3.00', '£1,000.00'],
+                       'weight': ['6 x 330ml', '1 each']})
+    out = normalise(df, 'aldi')
+    assert out['total_quantity'].tolist() == [1980.0, 1.0]
+    assert out['price_per_unit'].round(4).tolist() == [round(3 / 1.98, 4), 1000.0]
+    assert out['in_stock'].all()
+
+
+def test_missing_ocado_weight_falls_back_to_name():
+    df = pd.DataFrame({'product_name': ['Peas 1kg', None], 'price': [None, '£1.00'], 'weight': [None, None]})
+    out = normalise(df, 'ocado')
+    assert out['in_stock'].tolist() == [False, True]
+    assert out['total_quantity'].iloc[0] == 1000 and out['unit'].iloc[0] == 'g'
+
+
+def test_empty_scrape_gets_the_output_columns():
+    for df in (pd.DataFrame(), pd.DataFrame(columns=['product_name', 'price', 'category'])):
+        out = normalise(df, 'tesco', brands=['Tesco'])
+        assert out.empty
+        for column in ('price_gbp', 'in_stock', 'pack_count', 'quantity', 'unit', 'total_quantity',
+                       'unit_basis', 'price_per_unit', 'clean_name', 'brand'):
+            assert column in out, column
+
+
+def test_price_pence_without_any_price():
+    for prices in ([None, None], ['Out of Stock', 'Out of Stock'], []):
+        assert price_pence(pd.DataFrame({'price': pd.Series(prices, dtype=object)})).tolist() == [NO_PRICE] * len(prices)
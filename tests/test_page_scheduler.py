@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from page_scheduler import fetch_pages
+from rate_limit import FetchStats, HostRateLimiter, RetryPolicy
+
+
+class SlowFetcher:
+    """Takes longer for earlier pages, so pages finish out of order; tracks concurrency."""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        self.busy = False
+
+    def fetch(self, url):
+        assert not self.busy, 'a fetcher served two requests at once'
+        self.busy = True
+        with SlowFetcher.lock:
+            SlowFetcher.active += 1
+            SlowFetcher.peak = max(SlowFetcher.peak, SlowFetcher.active)
+        try:
+            page = int(url.rsplit('=', 1)[1])
+            time.sleep(0.01 * (10 - page))
+            return f'<html>page {page}</html>'
+        finally:
+            with SlowFetcher.lock:
+                SlowFetcher.active -= 1
+            self.busy = False
+
+
+def no_pacing():
+    return dict(rate_limiter=HostRateLimiter(rate=None), retry=RetryPolicy(max_attempts=1), stats=FetchStats())
+
+
+def test_results_keep_url_order_with_bounded_concurrency():
+    SlowFetcher.peak = 0
+    urls = [f'http://stub/frozen?page={page}' for page in range(1, 10)]
+    results = fetch_pages(urls, [SlowFetcher() for _ in range(4)], per_host_limit=3, **no_pacing())
+    assert [html for html, _ in results] == [f'<html>page {page}</html>' for page in range(1, 10)]
+    assert all(error is None for _, error in results)
+    assert SlowFetcher.peak == 3
+
+
+def test_failed_page_is_returned_with_its_error():
+    class Failing:
+        def fetch(self, url):
+            if url.endswith('2'):
+                raise ConnectionError('reset')
+            return url
+
+    results = fetch_pages(['http://stub/?page=1', 'http://stub/?page=2'], [Failing()], **no_pacing())
+    assert results[0] == ('http://stub/?page=1', None)
+    assert results[1][0] is None and isinstance(results[1][1], ConnectionError)
+
+
+def test_needs_a_fetcher():
+    with pytest.raises(ValueError):
+        fetch_pages(['http://stub/?page=1'], [])
+    assert fetch_pages([], [SlowFetcher()], **no_pacing()) == []
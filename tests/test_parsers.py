@@ -0,0 +1,39 @@
+import pytest
+
+from Aldi import AldiScraper
+from Tesco import TescoScraper
+from marks import OcadoScraper
+from parsers import available_backends, default_backend
+from benchmarks.fixtures import aldi_listing_html, ocado_listing_html, tesco_listing_html
+
+CASES = [
+    (AldiScraper, aldi_listing_html(2, 5)),
+    (TescoScraper, tesco_listing_html(2, 5)),
+    (OcadoScraper, ocado_listing_html(120)),
+]
+
+
+def test_selectolax_is_the_default():
+    assert available_backends() == ['selectolax', 'lxml', 'bs4']
+    assert default_backend() == 'selectolax'
+
+
+@pytest.mark.parametrize('scraper_class, html', CASES, ids=['aldi', 'tesco', 'ocado'])
+def test_backends_match_the_bs4_reference(scraper_class, html):
+    reference = scraper_class(parser='bs4').parse_page(html)
+    assert len(reference[0]) > 0
+    for backend in ('lxml', 'selectolax'):
+        assert scraper_class(parser=backend).parse_page(html) == reference, backend
+
+
+@pytest.mark.parametrize('scraper_class', [AldiScraper, TescoScraper, OcadoScraper], ids=['aldi', 'tesco', 'ocado'])
+def test_backends_agree_on_an_empty_page(scraper_class):
+    results = {backend: scraper_class(parser=backend).parse_page('') for backend in ('bs4', 'lxml', 'selectolax')}
+    assert all(not any(columns) for columns in results.values())
+
+
+def test_ocado_missing_fields_are_none_on_every_backend():
+    html = ('<ul><li class="fops-item"><h4 class="fop-title" title="Peas 1kg">x</h4></li>'
+            '<li class="fops-item"><span class="fop-price">£1.00</span></li></ul>')
+    for backend in ('bs4', 'lxml', 'selectolax'):
+        assert OcadoScraper(parser=backend).parse_page(html) == (['Peas 1kg', None], [None, '£1.00'], [None, None]), backend
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from price_diff import ChangeCapture
+
+
+def scrape(prices):
+    return pd.DataFrame({'product_name': list(prices), 'weight': '500g',
+                         'price': [f'£{price:.2f}' for price in prices.values()], 'category': 'frozen'})
+
+
+def changes(delta):
+    return sorted(zip(delta['product_name'].fillna(''), delta['change']))
+
+
+def test_rerunning_a_date_keeps_its_delta(tmp_path):
+    cdc = ChangeCapture(str(tmp_path), 'aldi')
+    cdc.capture(scrape({'Peas': 1.00, 'Chips': 2.00}), '2026-01-01')
+    day_two = scrape({'Peas': 1.10, 'Chips': 2.00, 'Pizza': 3.00})
+    first = cdc.capture(day_two, '2026-01-02')
+    assert changes(first) == [('Peas', 'update'), ('Pizza', 'insert')]
+    rerun = cdc.capture(day_two, '2026-01-02')
+    assert changes(rerun) == changes(first)
+    stored = cdc._read_table(cdc._path('deltas', '2026-01-02', 'delta.parquet'))
+    assert changes(stored) == changes(first)
+    assert cdc.dates('index') == ['2026-01-01', '2026-01-02']
+
+
+def test_rerunning_the_first_date_rewrites_the_snapshot(tmp_path):
+    cdc = ChangeCapture(str(tmp_path), 'aldi')
+    cdc.capture(scrape({'Peas': 1.00}), '2026-01-01')
+    again = cdc.capture(scrape({'Peas': 1.00, 'Chips': 2.00}), '2026-01-01')
+    assert changes(again) == [('Chips', 'insert'), ('Peas', 'insert')]
+    assert cdc.dates('deltas') == []
+
+
+def test_rerun_after_compaction_recompacts(tmp_path):
+    cdc = ChangeCapture(str(tmp_path), 'aldi', compact_every=1)
+    cdc.capture(scrape({'Peas': 1.00}), '2026-01-01')
+    cdc.capture(scrape({'Peas': 1.50}), '2026-01-02')
+    cdc.capture(scrape({'Peas': 1.20}), '2026-01-02')
+    snapshot = cdc._read_table(cdc._path('snapshots', '2026-01-02', 'snapshot.parquet'))
+    assert snapshot['price_pence'].tolist() == [120]
+
+
+def test_old_indexes_are_pruned(tmp_path):
+    cdc = ChangeCapture(str(tmp_path), 'aldi', keep_indexes=2)
+    for day in range(1, 6):
+        cdc.capture(scrape({'Peas': 1.00 + day / 100}), f'2026-01-0{day}')
+    assert cdc.dates('index') == ['2026-01-03', '2026-01-04', '2026-01-05']
@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from lake_writer import write_lake
+from price_query import PriceQuery, name_tokens, unit_basis_of
+
+
+def snapshot(rows):
+    return pd.DataFrame(rows, columns=['product_name', 'price', 'weight', 'category'])
+
+
+@pytest.fixture
+def lake(tmp_path):
+    target = str(tmp_path / 'lake')
+    write_lake(snapshot([['Whole Milk 1l', '£1.00', None, 'dairy'],
+                         ['Milk Chocolate 100g', '80p', None, 'sweets']]), target, 'aldi', '2026-01-01')
+    write_lake(snapshot([['Tesco Whole Milk 2l', '£1.50', None, 'dairy']]), target, 'tesco', '2026-01-01')
+    return target
+
+
+def test_name_tokens_and_unit_basis():
+    assert name_tokens('Tesco Whole Milk 2 x 1l') == ['milk', 'whole']
+    assert unit_basis_of('whole milk 2 x 500ml') == 'l'
+    assert unit_basis_of('whole milk') is None
+
+
+def test_refresh_only_reads_new_or_changed_partitions(lake):
+    query = PriceQuery(lake)
+    assert query.refresh() == [('aldi', '2026-01-01'), ('tesco', '2026-01-01')]
+    assert query.refresh() == []
+    write_lake(snapshot([['Whole Milk 1l', '£1.10', None, 'dairy']]), lake, 'aldi', '2026-01-02')
+    assert query.refresh() == [('aldi', '2026-01-02')]
+    assert sorted(query.load_manifest()) == ['aldi/2026-01-01', 'aldi/2026-01-02', 'tesco/2026-01-01']
+
+
+def test_cheapest_equivalent_ranks_by_price_per_unit(lake):
+    query = PriceQuery(lake)
+    query.refresh()
+    found = query.cheapest_equivalent('whole milk 1 litre')
+    assert found['product_name'].tolist() == ['Tesco Whole Milk 2l', 'Whole Milk 1l']
+    assert found['price_per_unit'].tolist() == [0.75, 1.0]
+    # Milk chocolate shares a token, but is too far from the name and sold by weight
+    assert 'Milk Chocolate 100g' not in query.cheapest_equivalent('whole milk')['product_name'].tolist()
+    assert 'Milk Chocolate 100g' in query.cheapest_equivalent('milk', min_similarity=0.3)['product_name'].tolist()
+    by_litre = query.cheapest_equivalent('milk', unit_basis='l', min_similarity=0.3)
+    assert 'Milk Chocolate 100g' not in by_litre['product_name'].tolist()
+
+
+def test_cheapest_equivalent_needs_a_refresh(lake):
+    with pytest.raises(ValueError):
+        PriceQuery(lake).cheapest_equivalent('whole milk')
+
+
+def test_price_history_and_snapshot_dates(lake):
+    query = PriceQuery(lake)
+    query.refresh()
+    write_lake(snapshot([['Whole Milk 1l', '£1.10', None, 'dairy']]), lake, 'aldi', '2026-01-02')
+    query.refresh()
+    history = query.price_history('whole milk 1l', retailer='aldi')
+    assert history['date'].tolist() == ['2026-01-01', '2026-01-02']
+    assert history['price_gbp'].tolist() == [1.0, 1.1]
+    assert query.price_history(product_key=history['product_key'].iloc[0], start='2026-01-02')['price_gbp'].tolist() == [1.1]
+    # As of the first day, Aldi's milk is at its old price
+    def aldi_price(snapshot_date):
+        found = query.cheapest_equivalent('whole milk', snapshot_date)
+        return found.loc[found['retailer'] == 'aldi', 'price_gbp'].tolist()
+    assert aldi_price('2026-01-01') == [1.0]
+    assert aldi_price(None) == [1.1]
+
+
+def test_daily_aggregates(lake):
+    query = PriceQuery(lake)
+    query.refresh()
+    dairy = query.daily(category='dairy')
+    assert dairy['retailer'].tolist() == ['aldi', 'tesco']
+    assert dairy['unit_basis'].tolist() == ['l', 'l']
+    assert dairy['min_price'].tolist() == [1.0, 1.5]
+    assert query.daily(retailer='aldi', start='2026-01-02').empty
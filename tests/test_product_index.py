@@ -0,0 +1,22 @@
+from product_index import ProductIndex, natural_keys, shingles
+
+
+def test_placeholder_names_are_not_keys():
+    for name in ('N/A', 'n/a', 'None', 'nan', '#', None):
+        assert natural_keys(name, '500g') == []
+        assert shingles(name) == set()
+
+
+def test_nameless_rows_keep_their_url_key():
+    assert natural_keys('N/A', None, '/product/peas-1kg') == ['url:/product/peas-1kg']
+
+
+def test_nameless_rows_do_not_share_a_product_id(tmp_path):
+    index = ProductIndex(str(tmp_path / 'products.sqlite'))
+    rows = [{'product_name': 'N/A', 'weight': '500g'},
+            {'product_name': 'N/A', 'weight': '500g', 'product_url': '/product/peas-1kg'},
+            {'product_name': 'N/A', 'weight': '500g', 'product_url': '/product/chips-1kg'}]
+    index.tag('aldi', rows)
+    index.close()
+    assert rows[0]['product_id'] is None
+    assert rows[1]['product_id'] != rows[2]['product_id']
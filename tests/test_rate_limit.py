@@ -0,0 +1,84 @@
+import requests
+
+from page_scheduler import fetch_pages
+from rate_limit import FetchStats, HostRateLimiter, RetryPolicy, ThrottledError, classify
+
+
+def test_split_shares_the_rate():
+    limiter = HostRateLimiter(rate=4.0, burst=4.0, min_rate=0.2, max_rate=20.0, increase=0.1,
+                              rates={'www.tesco.com': 1.0})
+    limiter.split(4)
+    assert (limiter.rate, limiter.burst, limiter.min_rate, limiter.max_rate) == (1.0, 1.0, 0.05, 5.0)
+    assert limiter.increase == 0.025
+    assert limiter.rates == {'www.tesco.com': 0.25}
+    assert limiter.bucket('https://www.tesco.com/groceries').rate == 0.25
+
+
+def test_split_workers_together_keep_one_process_rate():
+    limiter = HostRateLimiter(rate=8.0, burst=1.0)
+    limiter.split(2)
+    # After the burst, each reservation waits another 1/rate seconds
+    waits = [limiter.reserve('https://www.aldi.co.uk/') for _ in range(5)]
+    assert abs(waits[-1] - 4 / 4.0) < 0.05
+
+
+def test_split_without_pacing_is_a_no_op():
+    limiter = HostRateLimiter(rate=None)
+    limiter.split(8)
+    assert limiter.rate is None and limiter.reserve('https://www.aldi.co.uk/') == 0.0
+
+
+def test_throttle_halves_the_rate_and_pauses_the_host():
+    limiter = HostRateLimiter(rate=4.0, burst=4.0, min_rate=1.5, increase=0.5)
+    limiter.record_throttle('https://www.aldi.co.uk/a', retry_after=2)
+    assert limiter.rates_by_host() == {'www.aldi.co.uk': 2.0}
+    assert 1.9 < limiter.reserve('https://www.aldi.co.uk/b') <= 2.0
+    # Other hosts are not affected
+    assert limiter.reserve('https://www.tesco.com/') == 0.0
+    limiter.record_throttle('https://www.aldi.co.uk/a')
+    assert limiter.rates_by_host()['www.aldi.co.uk'] == 1.5
+    limiter.record_success('https://www.aldi.co.uk/a')
+    assert limiter.rates_by_host()['www.aldi.co.uk'] == 2.0
+
+
+def test_classify_reads_status_and_retry_after():
+    response = requests.Response()
+    response.status_code = 429
+    response.headers['Retry-After'] = '7'
+    assert classify(requests.HTTPError(response=response)) == (True, 7.0)
+    assert classify(ThrottledError('challenge', retry_after=3)) == (True, 3)
+    assert classify(ConnectionError('reset')) == (False, None)
+
+
+def test_scheduler_retries_a_throttled_page():
+    class ThrottledOnce:
+        calls = 0
+
+        def fetch(self, url):
+            ThrottledOnce.calls += 1
+            if ThrottledOnce.calls == 1:
+                raise ThrottledError('slow down', retry_after=0)
+            return '<html>ok</html>'
+
+    limiter = HostRateLimiter(rate=10.0, burst=10.0, pause=0)
+    stats = FetchStats()
+    results = fetch_pages(['https://www.aldi.co.uk/?page=1'], [ThrottledOnce()], rate_limiter=limiter,
+                          retry=RetryPolicy(max_attempts=3, base_delay=0.01), stats=stats)
+    assert results == [('<html>ok</html>', None)]
+    counts = stats.summary()['www.aldi.co.uk']
+    assert (counts['requests'], counts['throttled'], counts['retries'], counts['ok']) == (2, 1, 1, 1)
+    # Halved on the throttle, then one additive step back up
+    assert limiter.rates_by_host()['www.aldi.co.uk'] == 5.1
+
+
+def test_scheduler_drops_a_page_after_max_attempts():
+    class Down:
+        def fetch(self, url):
+            raise ConnectionError('reset')
+
+    stats = FetchStats()
+    results = fetch_pages(['https://www.aldi.co.uk/?page=1'], [Down()], rate_limiter=HostRateLimiter(rate=None),
+                          retry=RetryPolicy(max_attempts=2, base_delay=0.01), stats=stats)
+    assert isinstance(results[0][1], ConnectionError)
+    counts = stats.summary()['www.aldi.co.uk']
+    assert (counts['requests'], counts['errors'], counts['retries'], counts['drops']) == (2, 2, 1, 1)
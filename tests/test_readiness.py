@@ -0,0 +1,49 @@
+import time
+
+from readiness import COUNT_JS, TimeToContent, wait_for_count_stable
+
+
+class FakeDriver:
+    """Answers COUNT_JS from a fixed count per selector, or a list of counts consumed per call."""
+
+    def __init__(self, counts):
+        self.counts = counts
+
+    def execute_script(self, script, selector):
+        assert script == COUNT_JS
+        count = self.counts.get(selector, 0)
+        if isinstance(count, list):
+            return count.pop(0) if len(count) > 1 else count[0]
+        return count
+
+
+def timed(driver, **kwargs):
+    start = time.monotonic()
+    ready = wait_for_count_stable(driver, 'a.tile', timeout=2, settle=0.05, poll=0.01, **kwargs)
+    return ready, time.monotonic() - start
+
+
+def test_tiles_settle_once_the_count_stops_changing():
+    ready, seconds = timed(FakeDriver({'a.tile': [0, 10, 20, 30]}))
+    assert ready and seconds < 1
+
+
+def test_empty_page_waits_out_the_timeout_without_a_marker():
+    ready, seconds = timed(FakeDriver({'a.tile': 0, 'span.pager': 1}))
+    assert not ready and seconds >= 2
+
+
+def test_empty_page_settles_when_rendered():
+    ready, seconds = timed(FakeDriver({'a.tile': 0, 'span.pager': 1}), rendered_selector='span.pager')
+    assert ready and seconds < 1
+
+
+def test_time_to_content_counts_timeouts():
+    ttc = TimeToContent()
+    ttc.record('aldi_page', 0.2)
+    ttc.record('aldi_page', 10, ready=False)
+    summary = ttc.summary()['aldi_page']
+    assert summary['count'] == 2 and summary['timeouts'] == 1
+    assert ttc.histogram('aldi_page')['le_0.25'] == 1
+    ttc.reset()
+    assert ttc.summary() == {}
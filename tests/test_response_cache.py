@@ -0,0 +1,74 @@
+import os
+
+from response_cache import ResponseCache, ReplayFetcher
+
+
+def body_files(cache):
+    return sorted(name for _, _, names in os.walk(cache.bodies_dir) for name in names)
+
+
+def page(n, size=1000):
+    return f'<html>{n}</html>'.ljust(size, ' ')
+
+
+def test_eviction_keeps_bodies_within_max_bytes(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=3000)
+    for n in range(3):
+        cache.store(f'http://x/{n}', page(n))
+    cache.lookup('http://x/0')
+    cache.store('http://x/3', page(3))
+    # Page 1 is now the least recently used
+    assert cache.lookup('http://x/1') is None
+    assert all(cache.lookup(f'http://x/{n}') is not None for n in (0, 2, 3))
+    assert len(body_files(cache)) == 3
+    cache.close()
+    reopened = ResponseCache(str(tmp_path), max_bytes=3000)
+    assert reopened._total == 3000
+    reopened.close()
+
+
+def test_shared_body_outlives_one_url(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=2500)
+    cache.store('http://x/a', page('same'))
+    cache.store('http://x/b', page('same'))
+    cache.lookup('http://x/a')
+    cache.store('http://x/c', page('other'))
+    assert cache.lookup('http://x/b') is None
+    assert cache.body(cache.lookup('http://x/a')) == page('same')
+    assert len(body_files(cache)) == 2
+    cache.close()
+
+
+def test_changed_page_drops_the_old_body_and_parse(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    old, new = page('old'), page('new')
+    cache.store('http://x/1', old)
+    cache.store_parsed(old, 'aldi:lxml', [['Peas']])
+    cache.store('http://x/1', new)
+    assert len(body_files(cache)) == 1
+    assert cache.load_parsed(old, 'aldi:lxml') is None
+    assert cache.body(cache.lookup('http://x/1')) == new
+    assert cache.summary()['default']['changed'] == 2
+    cache.close()
+
+
+def test_unchanged_page_reuses_the_parse(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store('http://x/1', page(1), label='aldi')
+    cache.store_parsed(page(1), 'aldi:lxml', [['Peas']])
+    cache.store('http://x/1', page(1), label='aldi')
+    assert cache.load_parsed(page(1), 'aldi:lxml', 'aldi') == [['Peas']]
+    stats = cache.summary()['aldi']
+    assert (stats['unchanged'], stats['parse_reused'], stats['hit_rate']) == (1, 1, 0.5)
+    cache.close()
+
+
+def test_replay_has_its_own_counter(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store('http://x/1', page(1), label='aldi')
+    cache.reset_stats()
+    assert ReplayFetcher(cache, label='aldi').fetch('http://x/1') == page(1)
+    stats = cache.summary()['aldi']
+    assert stats['replayed'] == 1
+    assert stats['requests'] == stats['not_modified'] == stats['bytes_saved'] == 0
+    cache.close()
@@ -0,0 +1,57 @@
+import pandas as pd
+
+from row_buffer import RowBuffer
+
+
+def nulls_as_none(df):
+    return df.astype(object).where(df.notna(), None)
+
+
+def check(buffer, rows):
+    assert len(buffer.codes) == len(buffer) == len(rows)
+    pd.testing.assert_frame_equal(nulls_as_none(buffer.to_pandas()), nulls_as_none(pd.DataFrame(rows)))
+
+
+def test_rows_without_category_keep_codes_aligned():
+    rows = [{'product_name': 'Peas', 'price': '£1'}, {'product_name': 'Chips', 'price': '£2'}]
+    buffer = RowBuffer()
+    buffer.extend(rows[:1])
+    buffer.extend(rows[1:])
+    check(buffer, rows)
+
+
+def test_category_seen_after_rows_without_one():
+    first = [{'product_name': 'Peas', 'price': '£1'}, {'product_name': 'Chips', 'price': '£2'}]
+    later = [{'product_name': 'Pizza', 'price': '£3', 'category': 'frozen'}]
+    buffer = RowBuffer()
+    buffer.extend(first)
+    buffer.extend(first)
+    buffer.extend(later)
+    check(buffer, first + first + later)
+    assert buffer.to_arrow().column('category').to_pylist() == [None] * 4 + ['frozen']
+
+
+def test_merge_buffers_with_and_without_category():
+    plain = RowBuffer()
+    plain.extend([{'product_name': 'Peas'}, {'product_name': 'Chips'}])
+    plain.extend([{'product_name': 'Kale'}])
+    tagged = RowBuffer()
+    tagged.extend([{'product_name': 'Pizza', 'category': 'frozen'}])
+    combined = RowBuffer.concat([plain, tagged, plain])
+    check(combined, [{'product_name': 'Peas'}, {'product_name': 'Chips'}, {'product_name': 'Kale'},
+                     {'product_name': 'Pizza', 'category': 'frozen'},
+                     {'product_name': 'Peas'}, {'product_name': 'Chips'}, {'product_name': 'Kale'}])
+
+
+def test_category_is_categorical_and_numbers_are_inferred():
+    rows = [{'product_name': 'Peas', 'product_id': 1, 'category': 'frozen'},
+            {'product_name': 'Kale', 'product_id': None},
+            {'product_name': 'Pizza', 'product_id': 3, 'category': 'frozen'}]
+    buffer = RowBuffer()
+    buffer.extend(rows)
+    df = buffer.to_pandas()
+    assert isinstance(df['category'].dtype, pd.CategoricalDtype)
+    assert list(df['category'].cat.categories) == ['frozen']
+    assert df['category'].isna().tolist() == [False, True, False]
+    assert df['product_id'].dtype == pd.DataFrame(rows)['product_id'].dtype
+    assert df['product_name'].dtype == object
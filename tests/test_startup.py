@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from Aldi import AldiScraper
+from benchmarks.fixtures import aldi_listing_html
+
+HEAVY = ('pandas', 'numpy', 'pyarrow', 'bs4', 'requests', 'boto3', 'selenium')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_after(code):
+    script = f"import json, sys\n{code}\nprint(json.dumps(sorted(m for m in {HEAVY!r} if m in sys.modules)))"
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True, cwd=ROOT,
+                            env=dict(os.environ, PYTHONPATH=ROOT))
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_importing_aldi_loads_no_heavy_modules():
+    assert loaded_after('import Aldi') == []
+
+
+def test_prewarm_imports_without_building_clients():
+    code = "import Aldi\nAldi.prewarm()\nassert Aldi._S3_CLIENT is None and Aldi._SCRAPER is None"
+    assert loaded_after(code) == ['bs4', 'numpy', 'pandas', 'pyarrow', 'requests', 'selenium']
+
+
+@pytest.mark.parametrize('layout, pages', [('pager', 7), ('none', None)])
+def test_pager_is_read_without_bs4(layout, pages):
+    assert AldiScraper(fetch_backend='http').read_pager(aldi_listing_html(1, 7, layout=layout)) == pages
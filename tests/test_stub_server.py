@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from Aldi import AldiScraper
+from benchmarks.fixtures import write_aldi_fixtures
+from benchmarks.stub_server import EMPTY_PAGE, serve_fixtures
+from rate_limit import HostRateLimiter, RetryPolicy
+
+
+def test_scraper_reads_every_page_and_hits_are_counted(tmp_path):
+    paths = write_aldi_fixtures(str(tmp_path), max_pages=6, n_products=10)
+    server, hits = serve_fixtures(paths)
+    try:
+        scraper = AldiScraper(fetch_backend='http', page_workers=4, rate_limiter=HostRateLimiter(rate=None),
+                              retry=RetryPolicy(max_attempts=1))
+        scraper.base_url = f'http://127.0.0.1:{server.server_port}/en-GB'
+        assert len(scraper.scrape_category('frozen')) == 60
+        # Page 1 is fetched once, for the page count and its rows
+        assert hits['count'] == 6
+    finally:
+        server.shutdown()
+
+
+def test_etags_throttling_and_pages_past_the_end(tmp_path):
+    paths = write_aldi_fixtures(str(tmp_path), max_pages=2, n_products=5)
+    server, hits = serve_fixtures(paths, etags=True, max_rate=5, cycle=False)
+    base = f'http://127.0.0.1:{server.server_port}/en-GB/frozen'
+    try:
+        first = requests.get(f'{base}?page=1')
+        assert first.status_code == 200 and first.headers['ETag']
+        # Sent straight after the first request, faster than max_rate allows
+        assert requests.get(f'{base}?page=2').status_code == 429
+        with ThreadPoolExecutor(8) as pool:
+            statuses = list(pool.map(lambda _: requests.get(f'{base}?page=3').status_code, range(16)))
+        assert statuses.count(429) == hits['throttled'] - 1
+        assert hits['count'] == 18
+    finally:
+        server.shutdown()
+    quiet, _ = serve_fixtures(paths, etags=True, cycle=False)
+    base = f'http://127.0.0.1:{quiet.server_port}/en-GB/frozen'
+    try:
+        etag = requests.get(f'{base}?page=1').headers['ETag']
+        assert requests.get(f'{base}?page=1', headers={'If-None-Match': etag}).status_code == 304
+        assert requests.get(f'{base}?page=3').content == EMPTY_PAGE
+    finally:
+        quiet.shutdown()
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+import driver_pool
+import work_queue
+from Aldi import AldiScraper
+from Tesco import TescoScraper
+from pagination import Paginator
+from rate_limit import HostRateLimiter, RetryPolicy
+from work_queue import SQSWorkQueue, expand_units
+
+
+def test_count_raises_when_page_one_fails():
+    paginator = Paginator(lambda page: (None, ConnectionError('refused')), len, lambda html: None)
+    with pytest.raises(ConnectionError):
+        paginator.count()
+
+
+def test_failed_page_count_queues_the_whole_category():
+    scraper = AldiScraper(fetch_backend='http', rate_limiter=HostRateLimiter(rate=None),
+                          retry=RetryPolicy(max_attempts=1))
+    # Nothing listens here, so page 1 can not be fetched
+    scraper.base_url = 'http://127.0.0.1:9'
+    try:
+        units = expand_units('aldi', ['frozen'], pages_per_unit=5, scraper=scraper, run_date='20260101')
+    finally:
+        scraper.driver_pool.close()
+    assert units == [{'retailer': 'aldi', 'category': 'frozen', 'first_page': None, 'last_page': None,
+                      'run_date': '20260101'}]
+
+
+class FakeSQS:
+    """Fails the given entry ids once per listed failure; SenderFault ones always fail."""
+
+    def __init__(self, transient=(), sender_fault=()):
+        self.transient = list(transient)
+        self.sender_fault = set(sender_fault)
+        self.bodies = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        ok, failed = [], []
+        for entry in Entries:
+            if entry['Id'] in self.sender_fault:
+                failed.append({'Id': entry['Id'], 'SenderFault': True, 'Code': 'InvalidMessageContents'})
+            elif entry['Id'] in self.transient:
+                self.transient.remove(entry['Id'])
+                failed.append({'Id': entry['Id'], 'SenderFault': False, 'Code': 'InternalError'})
+            else:
+                ok.append({'Id': entry['Id']})
+                self.bodies.append(json.loads(entry['MessageBody']))
+        return {'Successful': ok, 'Failed': failed}
+
+
+def sqs_queue(client):
+    queue = SQSWorkQueue.__new__(SQSWorkQueue)
+    queue.sqs_client, queue.queue_url = client, 'https://sqs.test/units'
+    return queue
+
+
+def test_sqs_put_resends_failed_entries(monkeypatch):
+    monkeypatch.setattr(work_queue.time, 'sleep', lambda seconds: None)
+    client = FakeSQS(transient=['3', '3'])
+    units = [{'retailer': 'aldi', 'category': str(n)} for n in range(12)]
+    assert sqs_queue(client).put(units) == 12
+    assert sorted(client.bodies, key=lambda unit: int(unit['category'])) == units
+
+
+def test_sqs_put_raises_when_entries_keep_failing(monkeypatch):
+    monkeypatch.setattr(work_queue.time, 'sleep', lambda seconds: None)
+    with pytest.raises(RuntimeError, match='rejected 1 units'):
+        sqs_queue(FakeSQS(transient=['0'] * 3)).put([{'retailer': 'aldi'}])
+    client = FakeSQS(sender_fault=['1'])
+    with pytest.raises(RuntimeError, match='InvalidMessageContents'):
+        sqs_queue(client).put([{'retailer': 'aldi'}, {'retailer': 'tesco'}])
+    assert client.bodies == [{'retailer': 'aldi'}]
+
+
+def test_lambda_reuses_scrapers_across_invocations(monkeypatch):
+    made, used = [], []
+    monkeypatch.setattr(work_queue, '_LAMBDA_SCRAPERS', {})
+    monkeypatch.setattr(work_queue, 'make_scraper', lambda retailer: made.append(retailer) or object())
+    monkeypatch.setattr(work_queue, 'run_unit', lambda unit, output, scraper: used.append(scraper) or 1)
+    unit = {'retailer': 'tesco', 'category': 'frozen-food', 'first_page': 1, 'last_page': 5, 'run_date': '20260101'}
+    event = {'Records': [{'messageId': 'm1', 'body': json.dumps(unit)}]}
+    for _ in range(2):
+        assert work_queue.lambda_handler(event, None) == {'batchItemFailures': []}
+    assert made == ['tesco'] and used[0] is used[1]
+
+
+def test_tesco_uses_the_lambda_chrome(monkeypatch):
+    monkeypatch.setattr(driver_pool, 'in_lambda_image', lambda: True)
+    scraper = TescoScraper()
+    assert scraper.chrome_options.binary_location == driver_pool.LAMBDA_CHROME
+    assert scraper.service.path == driver_pool.LAMBDA_CHROMEDRIVER
+    assert '--no-sandbox' in scraper.chrome_options.arguments
+    scraper.driver_pool.close()
+    monkeypatch.setattr(driver_pool, 'in_lambda_image', lambda: False)
+    local = TescoScraper()
+    assert local.service is None and not local.chrome_options.binary_location
+    local.driver_pool.close()
@@ -0,0 +1,459 @@
+"""Work queue runner for all retailers in one job.
+
+Every retailer's categories are expanded into (retailer, category, page range)
+units and put on a queue, and N worker processes (on one machine or many)
+lease units, scrape them and write their rows to the lake:
+
+    python work_queue.py enqueue queue.sqlite --pages-per-unit 5
+    python work_queue.py work queue.sqlite --output lake/ --workers 4
+    python work_queue.py status queue.sqlite
+
+The queue is a SQLite file locally and an SQS queue (``sqs://<name>`` or the
+queue URL) in production, where each node runs ``work`` against the same
+queue or Lambda consumes it through ``lambda_handler``. A unit whose worker
+dies is handed out again when its lease times out, and each unit writes one
+lake file named after it, so running a unit twice overwrites its own output
+instead of duplicating rows.
+
+Scrapers pace each host with a per-process ``HostRateLimiter``. ``run_workers``
+gives each of its N processes a 1/N share of the limiter, so one machine
+sends at most the configured rate per host (4 req/s by default) however many
+workers it runs. Nodes do not share a limiter: K nodes working the same queue
+send up to K times that rate, so give their scrapers a lower rate (through
+``scraper_factory``) when running a fleet.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Aldi import AldiScraper
+from Tesco import TescoScraper
+from marks import OcadoScraper
+from lake_writer import write_lake
+from row_buffer import RowBuffer
+
+logger = logging.getLogger(__name__)
+
+SCRAPERS = {'aldi': AldiScraper, 'tesco': TescoScraper, 'ocado': OcadoScraper}
+DEFAULT_CATEGORIES = {
+    'aldi': ['frozen', 'food-cupboard', 'fresh-food', 'bakery', 'chilled-food'],
+    'tesco': ['frozen-food', 'food-cupboard', 'fresh-food', 'bakery'],
+    'ocado': ['frozen-303714', 'best-of-fresh-294566', 'food-cupboard-drinks-bakery-294572'],
+}
+
+
+def unit_id(unit: dict) -> str:
+    pages = f"{unit['first_page']}-{unit['last_page']}" if unit.get('last_page') else 'all'
+    return f"{unit['run_date']}/{unit['retailer']}/{unit['category']}/{pages}"
+
+
+def expand_units(retailer: str, categories: List[str], pages_per_unit: int = 5, scraper=None,
+                 run_date: Optional[str] = None) -> List[dict]:
+    """Split each category into units of at most pages_per_unit pages.
+
+    Retailers without numbered pages (Ocado lists a category on one page) get
+    one unit per category, as does a category whose page count could not be
+    read; its worker then discovers the pages itself.
+    """
+    run_date = run_date or datetime.now().strftime('%Y%m%d')
+    scraper = scraper or SCRAPERS[retailer]()
+    units = []
+    for category in categories:
+        whole_category = {'retailer': retailer, 'category': category, 'first_page': None,
+                          'last_page': None, 'run_date': run_date}
+        if not hasattr(scraper, 'count_pages'):
+            units.append(whole_category)
+            continue
+        try:
+            max_pages = scraper.count_pages(category)
+        except Exception as e:
+            logger.warning(f"{retailer}/{category}: could not count pages ({e}), queued as one unit")
+            units.append(whole_category)
+            continue
+        firsts = range(1, max_pages + 1, pages_per_unit)
+        units += [{'retailer': retailer, 'category': category, 'first_page': first,
+                   'last_page': min(max_pages, first + pages_per_unit - 1), 'run_date': run_date}
+                  for first in firsts]
+        logger.info(f"{retailer}/{category}: {max_pages} pages in {len(firsts)} units")
+    return units
+
+
+class SQLiteWorkQueue:
+    """Units in a SQLite file, leased to one worker at a time.
+
+    Safe to share between threads and processes on one machine. A lease is
+    identified by a token; only the current holder can complete or release
+    it, so a worker that outlived its lease cannot mark someone else's run done.
+    """
+
+    def __init__(self, path: str = 'work_queue.sqlite', lease_seconds: float = 900, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS units (
+                id TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_token TEXT,
+                lease_until REAL,
+                error TEXT,
+                updated_at TEXT NOT NULL
+            )"""
+        )
+
+    def put(self, units: List[dict]) -> int:
+        """Enqueue units; ones already queued (same id) are ignored. Returns the number added."""
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO units (id, body, status, updated_at) VALUES (?, ?, 'queued', ?)",
+                [(unit_id(unit), json.dumps(unit), datetime.now().isoformat()) for unit in units],
+            )
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def lease(self) -> Optional[Tuple[str, dict]]:
+        """Take the next queued (or abandoned) unit. Returns (token, unit), or None if there is none."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE units SET status = 'failed', error = 'lease expired', updated_at = ? "
+                    "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                    (datetime.now().isoformat(), now, self.max_attempts),
+                )
+                row = self._conn.execute(
+                    "SELECT id, body FROM units WHERE status = 'queued' OR (status = 'leased' AND lease_until < ?) "
+                    "ORDER BY rowid LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    return None
+                token = uuid.uuid4().hex
+                self._conn.execute(
+                    "UPDATE units SET status = 'leased', attempts = attempts + 1, lease_token = ?, "
+                    "lease_until = ?, updated_at = ? WHERE id = ?",
+                    (token, now + self.lease_seconds, datetime.now().isoformat(), row[0]),
+                )
+                return token, json.loads(row[1])
+            finally:
+                self._conn.execute("COMMIT")
+
+    def _update(self, sql: str, params: tuple) -> bool:
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount == 1
+
+    def extend(self, token: str) -> bool:
+        """Push the lease deadline out again; False if the lease was lost."""
+        return self._update("UPDATE units SET lease_until = ? WHERE lease_token = ? AND status = 'leased'",
+                            (time.time() + self.lease_seconds, token))
+
+    def complete(self, token: str) -> bool:
+        """Mark a leased unit done. Completing twice, or after losing the lease, returns False."""
+        return self._update("UPDATE units SET status = 'done', error = NULL, updated_at = ? "
+                            "WHERE lease_token = ? AND status = 'leased'", (datetime.now().isoformat(), token))
+
+    def release(self, token: str, error: Optional[Exception] = None) -> bool:
+        """Give a unit back after a failure; it is failed for good after max_attempts."""
+        return self._update("UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                            "error = ?, updated_at = ? WHERE lease_token = ? AND status = 'leased'",
+                            (self.max_attempts, str(error) if error is not None else None,
+                             datetime.now().isoformat(), token))
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status").fetchall())
+
+    def pending(self) -> int:
+        """Units not yet done or failed, including ones leased by other workers."""
+        counts = self.counts()
+        return counts.get('queued', 0) + counts.get('leased', 0)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SQSWorkQueue:
+    """Same interface as SQLiteWorkQueue on Amazon SQS (or any SQS-compatible endpoint).
+
+    The lease is the message visibility timeout; releasing a unit makes it
+    visible again at once. Configure a redrive policy on the queue to move
+    units that keep failing to a dead-letter queue.
+    """
+
+    def __init__(self, queue: str, lease_seconds: float = 900, endpoint_url: Optional[str] = None,
+                 wait_seconds: int = 20):
+        import boto3
+        self.sqs_client = boto3.client('sqs', endpoint_url=endpoint_url)
+        self.queue_url = queue if queue.startswith('https://') else \
+            self.sqs_client.get_queue_url(QueueName=queue)['QueueUrl']
+        self.lease_seconds = int(lease_seconds)
+        self.wait_seconds = wait_seconds
+
+    def put(self, units: List[dict], attempts: int = 3) -> int:
+        """Enqueue units ten per batch, resending entries SQS reports as failed. Returns the number sent.
+
+        Raises once a batch still has failed entries after ``attempts`` sends
+        (or at once for failures SQS blames on the request itself).
+        """
+        sent = 0
+        for start in range(0, len(units), 10):
+            entries = {str(i): json.dumps(unit) for i, unit in enumerate(units[start:start + 10])}
+            for attempt in range(attempts):
+                response = self.sqs_client.send_message_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[{'Id': i, 'MessageBody': body} for i, body in entries.items()],
+                )
+                sent += len(response.get('Successful', []))
+                failed = response.get('Failed', [])
+                entries = {entry['Id']: entries[entry['Id']] for entry in failed}
+                if not entries or any(entry.get('SenderFault') for entry in failed):
+                    break
+                logger.warning(f"SQS did not take {len(entries)} units ({failed[0].get('Code')}), resending")
+                time.sleep(0.5 * 2 ** attempt)
+            if entries:
+                raise RuntimeError(f"SQS rejected {len(entries)} units after {sent} were sent: "
+                                   f"{failed[0].get('Code')} {failed[0].get('Message')}")
+        return sent
+
+    def lease(self) -> Optional[Tuple[str, dict]]:
+        messages = self.sqs_client.receive_message(
+            QueueUrl=self.queue_url, MaxNumberOfMessages=1, VisibilityTimeout=self.lease_seconds,
+            WaitTimeSeconds=self.wait_seconds,
+        ).get('Messages', [])
+        if not messages:
+            return None
+        return messages[0]['ReceiptHandle'], json.loads(messages[0]['Body'])
+
+    def _visibility(self, token: str, seconds: int) -> bool:
+        try:
+            self.sqs_client.change_message_visibility(QueueUrl=self.queue_url, ReceiptHandle=token,
+                                                      VisibilityTimeout=seconds)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not change visibility of a unit: {e}")
+            return False
+
+    def extend(self, token: str) -> bool:
+        return self._visibility(token, self.lease_seconds)
+
+    def complete(self, token: str) -> bool:
+        try:
+            self.sqs_client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=token)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not delete a completed unit: {e}")
+            return False
+
+    def release(self, token: str, error: Optional[Exception] = None) -> bool:
+        return self._visibility(token, 0)
+
+    def counts(self) -> Dict[str, int]:
+        attributes = self.sqs_client.get_queue_attributes(
+            QueueUrl=self.queue_url,
+            AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible'],
+        )['Attributes']
+        return {'queued': int(attributes['ApproximateNumberOfMessages']),
+                'leased': int(attributes['ApproximateNumberOfMessagesNotVisible'])}
+
+    def pending(self) -> int:
+        return sum(self.counts().values())
+
+    def close(self):
+        pass
+
+
+def open_work_queue(uri: str, lease_seconds: float = 900):
+    """Open 'sqs://name' or an SQS URL as an SQSWorkQueue, anything else as a SQLite file path."""
+    if uri.startswith('sqs://'):
+        return SQSWorkQueue(uri[len('sqs://'):], lease_seconds=lease_seconds)
+    if uri.startswith('https://sqs.'):
+        return SQSWorkQueue(uri, lease_seconds=lease_seconds)
+    return SQLiteWorkQueue(uri, lease_seconds=lease_seconds)
+
+
+def make_scraper(retailer: str):
+    """Default scraper for a worker; built once per retailer per process and reused across units."""
+    return SCRAPERS[retailer]()
+
+
+# Kept at module level so warm Lambda invocations reuse each retailer's
+# scraper and its Chrome drivers instead of starting new ones (as Aldi.get_scraper does)
+_LAMBDA_SCRAPERS: Dict[str, object] = {}
+
+
+def get_scraper(retailer: str):
+    """The Lambda container's scraper for retailer, created on first use."""
+    if retailer not in _LAMBDA_SCRAPERS:
+        _LAMBDA_SCRAPERS[retailer] = make_scraper(retailer)
+    return _LAMBDA_SCRAPERS[retailer]
+
+
+def run_unit(unit: dict, output: str, scraper) -> int:
+    """Scrape one unit and write its rows to the lake. Returns the number of rows."""
+    pages = {} if unit.get('last_page') is None else \
+        {'first_page': unit['first_page'], 'last_page': unit['last_page']}
+    scraper.run_date = unit['run_date']
+    rows = RowBuffer()
+    for page_rows in scraper.iter_category(unit['category'], **pages):
+        rows.extend(page_rows)
+    if not rows:
+        raise ValueError(f"no rows scraped for {unit_id(unit)}")
+    part_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', unit_id(unit).split('/', 2)[2])
+    write_lake(rows.to_pandas(), output, retailer=unit['retailer'],
+               snapshot_date=datetime.strptime(unit['run_date'], '%Y%m%d').date(), part_name=part_name)
+    return len(rows)
+
+
+def _keep_leased(queue, token: str, stop: threading.Event, every: float):
+    while not stop.wait(every):
+        queue.extend(token)
+
+
+def work(queue_uri: str, output: str, scraper_factory: Callable = make_scraper, lease_seconds: float = 900,
+         poll_seconds: float = 5.0, name: str = 'worker', rate_share: int = 1) -> int:
+    """Lease and run units until the queue is drained. Returns the number of units this worker completed.
+
+    With ``rate_share`` N, each scraper's rate limiter is cut to 1/N of its
+    rate, for one of N workers pacing the same hosts.
+    """
+    queue = open_work_queue(queue_uri, lease_seconds=lease_seconds)
+    scrapers = {}
+    # Scrapers of different retailers usually share the process-wide limiter; split each limiter once
+    split_limiters = []
+    completed = 0
+    try:
+        while True:
+            leased = queue.lease()
+            if leased is None:
+                if not queue.pending():
+                    break
+                # Other workers still hold units; one may die and its lease expire
+                time.sleep(poll_seconds)
+                continue
+            token, unit = leased
+            # Keep the lease alive while a long unit runs
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=_keep_leased, args=(queue, token, stop, lease_seconds / 3),
+                                         daemon=True)
+            heartbeat.start()
+            try:
+                if unit['retailer'] not in scrapers:
+                    scraper = scrapers[unit['retailer']] = scraper_factory(unit['retailer'])
+                    limiter = getattr(scraper, 'rate_limiter', None)
+                    if limiter is not None and not any(limiter is split for split in split_limiters):
+                        limiter.split(rate_share)
+                        split_limiters.append(limiter)
+                rows = run_unit(unit, output, scrapers[unit['retailer']])
+            except Exception as e:
+                logger.error(f"[{name}] {unit_id(unit)} failed: {e}")
+                queue.release(token, e)
+            else:
+                if queue.complete(token):
+                    completed += 1
+                    logger.info(f"[{name}] {unit_id(unit)} done, {rows} rows")
+                else:
+                    logger.warning(f"[{name}] {unit_id(unit)} finished after its lease was lost")
+            finally:
+                stop.set()
+                heartbeat.join()
+    finally:
+        for scraper in scrapers.values():
+            if hasattr(scraper, 'driver_pool'):
+                scraper.driver_pool.close()
+        queue.close()
+    return completed
+
+
+def run_workers(queue_uri: str, output: str, workers: int = 4, scraper_factory: Callable = make_scraper,
+                lease_seconds: float = 900, poll_seconds: float = 5.0) -> Dict[str, int]:
+    """Run ``workers`` worker processes until the queue is drained and return the queue's status counts.
+
+    Each process paces hosts at 1/``workers`` of the scraper's rate, so together
+    they send no more than a single process would.
+    """
+    ctx = multiprocessing.get_context('fork')
+    procs = [ctx.Process(target=work, args=(queue_uri, output, scraper_factory, lease_seconds, poll_seconds,
+                                            f"worker-{n}", workers))
+             for n in range(workers)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    queue = open_work_queue(queue_uri)
+    try:
+        return queue.counts()
+    finally:
+        queue.close()
+
+
+def lambda_handler(event, context):
+    """SQS-triggered entry point: each record is one unit, failed ones are handed back for redelivery."""
+    output = os.environ.get('WORK_OUTPUT', 's3://uksupermarketdata/lake')
+    failures = []
+    for record in event.get('Records', []):
+        unit = json.loads(record['body'])
+        try:
+            rows = run_unit(unit, output, get_scraper(unit['retailer']))
+            logger.info(f"{unit_id(unit)} done, {rows} rows")
+        except Exception as e:
+            logger.error(f"{unit_id(unit)} failed: {e}")
+            failures.append({'itemIdentifier': record['messageId']})
+    return {'batchItemFailures': failures}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Scrape every retailer through a shared work queue")
+    commands = parser.add_subparsers(dest='command', required=True)
+    enqueue = commands.add_parser('enqueue', help="expand categories into units and queue them")
+    enqueue.add_argument('queue', help="SQLite path, sqs://name or SQS queue URL")
+    enqueue.add_argument('--retailers', nargs='+', default=list(SCRAPERS), choices=list(SCRAPERS))
+    enqueue.add_argument('--pages-per-unit', type=int, default=5)
+    worker = commands.add_parser('work', help="run worker processes until the queue is drained")
+    worker.add_argument('queue')
+    worker.add_argument('--output', required=True, help="lake directory or s3://bucket/prefix")
+    worker.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="worker processes; they share the per-host rate limit between them")
+    worker.add_argument('--lease', type=float, default=900, help="seconds before an unfinished unit is retried")
+    status = commands.add_parser('status', help="print unit counts by status")
+    status.add_argument('queue')
+    args = parser.parse_args()
+
+    if args.command == 'enqueue':
+        queue = open_work_queue(args.queue)
+        for retailer in args.retailers:
+            scraper = make_scraper(retailer)
+            try:
+                units = expand_units(retailer, DEFAULT_CATEGORIES[retailer], args.pages_per_unit, scraper)
+            finally:
+                scraper.driver_pool.close()
+            print(f"{retailer}: queued {queue.put(units)} of {len(units)} units")
+        queue.close()
+    elif args.command == 'work':
+        print(run_workers(args.queue, args.output, workers=args.workers, lease_seconds=args.lease))
+    else:
+        queue = open_work_queue(args.queue)
+        print(queue.counts())
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()